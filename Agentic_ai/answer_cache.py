@@ -0,0 +1,216 @@
+## answer_cache.py -- semantic cache of generic career-guidance answers, keyed by query embedding and user segment
+import re
+import threading
+import time
+
+import numpy as np
+
+# How long a cached answer may be served
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Maximum cached answers per user segment (oldest are evicted first)
+MAX_ENTRIES_PER_SEGMENT = 500
+
+# Sentence embedding model used when sentence-transformers is installed
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Minimum cosine similarity to serve a cached answer, per embedding backend
+SIMILARITY_THRESHOLDS = {
+    'sentence-transformers': 0.9,
+    'hashing': 0.92
+}
+
+# Question phrasing that does not change the topic. Every other word (role, skill, company, level...)
+# must appear in both queries, after stemming, so "product manager" never matches "project manager"
+# however close they embed, while "negotiate salary" still matches "salary negotiation"
+KEY_TERM_STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "for", "of", "in", "on", "at", "with", "about", "as", "into",
+    "i", "me", "my", "we", "our", "you", "your", "it", "its", "this", "that", "some", "any",
+    "how", "what", "which", "when", "where", "why", "who", "is", "are", "am", "be", "was", "do", "does",
+    "did", "can", "could", "should", "would", "will", "shall", "may", "might", "must", "get",
+    "tips", "advice", "ways", "way", "best", "good", "know", "need", "want", "like", "give", "suggest"
+}
+
+# Inflectional and nominal endings stripped from key terms (longest first; one per word)
+STEM_SUFFIXES = (
+    "ations", "ation", "ating", "ated", "ates", "ate", "ments", "ment", "ings", "ing", "ions", "ion", "ies", "es", "ed", "s", "e"
+)
+MIN_STEM_LENGTH = 3
+
+# A question's answer is generalized and cached only once it has been asked this many times in
+# a segment; one-off questions would otherwise each pay an LLM generalization call
+MIN_ASKS_BEFORE_CACHING = 2
+
+# Query categories whose answers are generic enough to share between users
+CACHEABLE_CATEGORIES = {"CAREER_GUIDANCE"}
+
+# Conversational filler that does not change what is being asked
+FILLER_PATTERN = re.compile(
+    r"\b(hi|hello|hey|please|pls|kindly|thanks|thank you|can you|could you|would you|tell me|help me|i want to know|asha)\b"
+)
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def normalize_query(query):
+    """Lowercase a query and strip punctuation and filler so paraphrases embed alike"""
+    text = str(query or "").lower()
+    text = FILLER_PATTERN.sub(" ", text)
+    text = re.sub(r"[^a-z0-9+#\s]", " ", text)
+    return " ".join(text.split())
+
+
+def stem_word(word):
+    """Strip one common ending so 'negotiate', 'negotiation' and 'negotiating' compare equal"""
+    if word.endswith("ss"):
+        return word
+    for suffix in STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def key_terms(query):
+    """Return the stemmed words of a normalized query that carry its topic"""
+    return frozenset(stem_word(word) for word in normalize_query(query).split() if word not in KEY_TERM_STOPWORDS)
+
+
+def _load_embedder():
+    """Pick the embedding backend once: a sentence-transformers model if installed, else hashed character n-grams"""
+    global _embedder
+    if _embedder is not None:
+        return _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+                _embedder = ('sentence-transformers', lambda texts: model.encode(texts, normalize_embeddings=True))
+            except Exception as e:
+                print(f"sentence-transformers unavailable, using hashed n-gram embeddings: {e}")
+                from sklearn.feature_extraction.text import HashingVectorizer
+                vectorizer = HashingVectorizer(
+                    analyzer="char_wb", ngram_range=(3, 5), n_features=2 ** 18, alternate_sign=False, norm="l2"
+                )
+                _embedder = ('hashing', lambda texts: vectorizer.transform(texts).toarray())
+    return _embedder
+
+
+def warm_embedder():
+    """Load the embedding model (downloading it on first run) before the first chat turn needs it"""
+    backend, _ = _load_embedder()
+    return backend
+
+
+def embed_query(query):
+    """
+    Embed a query as a unit vector
+
+    A sentence model embeds the whole normalized query. Character n-grams cannot tell
+    paraphrases from different questions, so the hashing backend embeds only the key terms.
+    """
+    backend, encode = _load_embedder()
+    text = normalize_query(query) if backend == 'sentence-transformers' else " ".join(sorted(key_terms(query)))
+    return np.asarray(encode([text])[0], dtype=np.float32)
+
+
+class SemanticAnswerCache:
+    """Per-segment store of (query embedding, generic answer) pairs searched by cosine similarity"""
+
+    def __init__(self, ttl_seconds=ANSWER_CACHE_TTL_SECONDS, max_entries=MAX_ENTRIES_PER_SEGMENT):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # segment -> {'vectors': 2-D array, 'entries': [{'query', 'key_terms', 'answer', 'expires_at'}]}
+        self._segments = {}
+        # segment -> {key terms: (times asked, expires_at)} for questions not cached yet
+        self._asked = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _prune(self, segment, now):
+        """Drop expired entries, then the oldest ones beyond the size bound"""
+        keep = [i for i, entry in enumerate(segment['entries']) if entry['expires_at'] > now]
+        keep = keep[-self.max_entries:]
+        segment['entries'] = [segment['entries'][i] for i in keep]
+        segment['vectors'] = segment['vectors'][keep]
+
+    def lookup(self, query, user_segment):
+        """
+        Find a cached answer to a similar question from the same user segment
+
+        Returns:
+        tuple or None: (answer, similarity, cached query), or None on a miss
+        """
+        backend, _ = _load_embedder()
+        vector = embed_query(query)
+        terms = key_terms(query)
+        now = time.time()
+
+        with self._lock:
+            segment = self._segments.get(user_segment)
+            if segment and segment['entries']:
+                self._prune(segment, now)
+            if not segment or not segment['entries']:
+                self._record_miss(user_segment, terms, now)
+                return None
+
+            # Most similar first; the first close-enough entry about the same terms is served
+            similarities = segment['vectors'] @ vector
+            for best in np.argsort(-similarities):
+                similarity = float(similarities[best])
+                if similarity < SIMILARITY_THRESHOLDS[backend]:
+                    break
+                entry = segment['entries'][best]
+                if entry['key_terms'] == terms:
+                    self._stats["hits"] += 1
+                    return entry['answer'], similarity, entry['query']
+
+            self._record_miss(user_segment, terms, now)
+            return None
+
+    def _record_miss(self, user_segment, terms, now):
+        """Count a miss and how often this question has been asked (call with the lock held)"""
+        self._stats["misses"] += 1
+        asked = self._asked.setdefault(user_segment, {})
+        count, expires_at = asked.get(terms, (0, 0))
+        asked[terms] = (count + 1 if expires_at > now else 1, now + self.ttl_seconds)
+        if len(asked) > self.max_entries * 4:
+            # Forget the questions asked longest ago
+            for stale in sorted(asked, key=lambda key: asked[key][1])[:len(asked) - self.max_entries * 4]:
+                del asked[stale]
+
+    def worth_caching(self, query, user_segment):
+        """Whether a missed question has been asked often enough to generalize and cache its answer"""
+        with self._lock:
+            count, expires_at = self._asked.get(user_segment, {}).get(key_terms(query), (0, 0))
+        return count >= MIN_ASKS_BEFORE_CACHING and expires_at > time.time()
+
+    def store(self, query, user_segment, answer):
+        """Cache a generic answer for a query in a user segment"""
+        vector = embed_query(query)
+        now = time.time()
+
+        with self._lock:
+            segment = self._segments.setdefault(
+                user_segment, {'vectors': np.zeros((0, vector.shape[0]), dtype=np.float32), 'entries': []}
+            )
+            segment['entries'].append({
+                'query': query, 'key_terms': key_terms(query), 'answer': answer, 'expires_at': now + self.ttl_seconds
+            })
+            segment['vectors'] = np.vstack([segment['vectors'], vector[np.newaxis, :]])
+            self._prune(segment, now)
+            self._asked.get(user_segment, {}).pop(key_terms(query), None)
+
+    def stats(self):
+        """Return hit/miss counts, hit rate and entries per segment"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = {name: len(segment['entries']) for name, segment in self._segments.items()}
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+# Shared by every Streamlit session in the process
+answer_cache = SemanticAnswerCache()
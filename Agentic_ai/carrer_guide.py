@@ -3,35 +3,50 @@
 import os
 import json
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
 from crewai import Agent, Task, Crew, Process
+from utils.abandonable_executor import AbandonableExecutor
 from utils.input import DateTimeEncoder
-from Agentic_ai.herkey_rag import create_profile_analyzer_agent
-from Agentic_ai.herkey_rag import create_profile_analysis_task
+from utils.prompt_budget import fit_prompt_sections, record_prompt_usage
+from Agentic_ai.herkey_rag import analyze_candidate_profile
 from Agentic_ai.herkey_rag import parse_json_result
+from Agentic_ai.query_classifier import classify_query
+from Agentic_ai.guardrails import apply_guardrails, check_response
+from Agentic_ai.answer_cache import answer_cache, CACHEABLE_CATEGORIES
+from Agentic_ai.search_cache import cached_search
 from tavily import TavilyClient
 from backend.database import get_profile
+from backend.job_queue import enqueue_job
+from backend.user_context import (
+    context_from_snapshot,
+    context_is_stale,
+    cross_session_analysis_due,
+    get_user_context,
+    pattern_summary_from_snapshot
+)
 import google.generativeai as genai
-from langchain_community.chat_models import ChatLiteLLM
+from utils.llm_registry import get_chat_llm
 import streamlit as st
 from session_context.session_context_manager import (
     generate_consolidated_context, 
     generate_contextual_followups
 )
+from session_context.context_precompute import schedule_context_refresh
 from session_context.user_pattern_anlaysis import (
-    enhanced_cross_session_analysis,
     get_user_pattern_summary,
     should_analyze_cross_session_patterns
 )
 GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
 
+# Model behind the general-purpose agent, also used directly when streaming its answers
+GUIDANCE_MODEL = "gemini/gemini-2.0-flash-lite"
+GUIDANCE_TEMPERATURE = 0.2
+
 # General-purpose LLM setup
 def general_purpose_agent():
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model=GUIDANCE_MODEL, temperature=GUIDANCE_TEMPERATURE)
     
     return Agent(
         role="Women's Career Empowerment Assistant",
@@ -54,6 +69,116 @@ def general_purpose_agent():
         llm=llm
     )
 
+def guardrail_check_task(response, flags=None):
+    """Task that rewrites a flagged response to comply with the guardrail guidelines"""
+    flagged_section = ""
+    if flags:
+        flagged_section = "The automatic check flagged these passages:\n        " + "\n        ".join(
+            f"- {flag['category']} ({flag['rule']}): \"{flag['match']}\"" for flag in flags
+        )
+    
+    return Task(
+        description=f"""
+        Review this response for appropriateness: "{response}"
+        
+        {flagged_section}
+        
+        Ensure it:
+        1. Contains no gender stereotypes or biased language
+        2. Avoids suggesting acceptance of discrimination or inequality
+        3. Focuses on empowerment rather than limitations
+        4. Uses inclusive, respectful language
+        5. Provides evidence-based guidance when making claims
+        6. Balances realism with optimism and actionable strategies
+        7. Uses gender-neutral language where appropriate
+        
+        If any issues are found, revise the response to comply with these guidelines.
+        If the response is appropriate, return it unchanged.
+        """,
+        agent=general_purpose_agent(),
+        expected_output="A guardrail-compliant response."
+    )
+
+def rewrite_with_guardrails(response, flags):
+    """Run the LLM guardrail rewrite; used only for responses the local guardrails flagged"""
+    task = guardrail_check_task(response, flags)
+    final_crew = Crew(
+        agents=[task.agent],
+        tasks=[task],
+        verbose=False,
+        process=Process.sequential
+    )
+    return str(final_crew.kickoff())
+
+def personalize_cached_answer_task(cached_answer, user_query, candidate_profile):
+    """Short task that adapts a cached generic answer to the current user"""
+    profile = candidate_profile or {}
+    job_preferences = profile.get('job_preferences') or {}
+    profile_summary = {
+        'skills': profile.get('skills', [])[:10],
+        'experience_years': profile.get('experience_years', 0),
+        'current_status': profile.get('current_status', ''),
+        'preferred_roles': job_preferences.get('roles', []),
+        'short_term_goal': job_preferences.get('short_term_goal', ''),
+        'city': (profile.get('location') or {}).get('city', ''),
+        'work_mode': (profile.get('location') or {}).get('work_mode', '')
+    }
+    
+    return Task(
+        description=f"""
+        The user asked: "{user_query}"
+        
+        Here is a proven answer to this question:
+        {cached_answer}
+        
+        User profile:
+        {json.dumps(profile_summary, cls=DateTimeEncoder)}
+        
+        Lightly personalize the answer for this user: reference their skills, goals or location where it helps,
+        keep every link and the structure, and end with one natural follow-up question.
+        Do not add new facts or links. Keep it within 350 words.
+        """,
+        agent=general_purpose_agent(),
+        expected_output="The answer adapted to the user's profile, with links and formatting preserved."
+    )
+
+def generalize_answer_task(answer, user_query):
+    """Task that strips user-specific details from an answer so it can be shared with similar users"""
+    return Task(
+        description=f"""
+        The following answer was written for one user who asked: "{user_query}"
+        
+        {answer}
+        
+        Rewrite it as a generic answer to the same question that suits anyone asking it:
+        remove names, personal history, previous-session references, profile details and the closing follow-up question.
+        Keep the guidance, structure, emojis and every link unchanged.
+        """,
+        agent=general_purpose_agent(),
+        expected_output="A generic version of the answer with no user-specific details."
+    )
+
+def _run_single_task(task):
+    crew = Crew(
+        agents=[task.agent],
+        tasks=[task],
+        verbose=False,
+        process=Process.sequential
+    )
+    return str(crew.kickoff()).strip()
+
+def cache_generic_answer(user_query, user_segment, answer):
+    """Store a generalized copy of an answer in the semantic cache (runs off the request path)"""
+    try:
+        generic_answer = _run_single_task(generalize_answer_task(answer, user_query))
+        if generic_answer:
+            answer_cache.store(user_query, user_segment, generic_answer)
+            print(f"🗂️ Cached generic answer for {user_segment}: {user_query}")
+    except Exception as e:
+        print(f"⚠️ Could not cache generic answer: {e}")
+
+_answer_cache_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="answer-cache")
+
 # Define classification function for incoming queries
 def classify_query_task(user_query):
     return Task(
@@ -76,6 +201,16 @@ def classify_query_task(user_query):
         expected_output="A category classification"
     )
 
+def classify_query_with_llm(user_query):
+    """Classify a query with the LLM; used only when the local classifier is not confident"""
+    classify_crew = Crew(
+        agents=[general_purpose_agent()],
+        tasks=[classify_query_task(user_query)],
+        verbose=False,
+        process=Process.sequential
+    )
+    return str(classify_crew.kickoff()).strip()
+
 
 # Initialize Tavily client
 tavily_client = TavilyClient("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")
@@ -152,15 +287,19 @@ def get_tavily_search_results(query, search_type="general"):
     try:
         if search_type == "jobs":
             # For job searches, include specific parameters
-            response = tavily_client.search(
-                query=query,
+            response = cached_search(
+                tavily_client,
+                query,
+                search_type,
                 search_depth="advanced",
                 max_results=8
             )
         else:
             # For general searches (courses, resources, communities)
-            response = tavily_client.search(
-                query=query,
+            response = cached_search(
+                tavily_client,
+                query,
+                search_type,
                 search_depth="basic",
                 max_results=6
             )
@@ -193,11 +332,14 @@ def format_tavily_results(tavily_response, query_type="general"):
     
     return formatted_results
 
-def get_resources_with_links(user_query):
+def get_resources_with_links(user_query, user_id=None):
     """
     Enhanced function to get resources using Tavily search
+    
+    user_id must be passed when called off the Streamlit script thread, where session state is unavailable.
     """
-    user_id = st.session_state.get('user_id')
+    if user_id is None:
+        user_id = st.session_state.get('user_id')
     
     # Get user profile for personalization
     profile_data = get_profile(user_id) if user_id else None
@@ -222,72 +364,164 @@ def get_resources_with_links(user_query):
     
     return None
 
-def get_career_guidance_task(profile_analysis, user_query):
+# Seconds each context step may take before the turn continues with its default value
+CONTEXT_STEP_TIMEOUTS = {
+    'context': 20,
+    'patterns': 20,
+    'followups': 15,
+    'tavily': 15
+}
+
+CONTEXT_STEP_DEFAULTS = {
+    'context': {},
+    'patterns': None,
+    'followups': [],
+    'tavily': None
+}
+
+# A step that misses its deadline cannot be interrupted, so it is abandoned: it finishes in the
+# background without holding one of the pool's slots (see utils/abandonable_executor.py)
+_context_executor = AbandonableExecutor(max_workers=8, thread_name_prefix="guidance-context")
+
+
+def _run_timed(step, timings, fn, *args, **kwargs):
+    """Run one context step, recording how long it took"""
+    started_at = time.monotonic()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[step] = time.monotonic() - started_at
+
+
+def analyze_user_patterns(user_id, snapshot=None):
+    """
+    Queue cross-session pattern analysis when due and return the user's current pattern summary
+    
+    With the user's context snapshot both answers come from it; without one the
+    pattern collections are queried.
+    """
+    due = cross_session_analysis_due(snapshot) if snapshot else should_analyze_cross_session_patterns(user_id)
+    if due:
+        result = enqueue_job(
+            "pattern_analysis",
+            {"user_id": user_id},
+            priority="background",
+            user_id=user_id,
+            dedupe_key=f"pattern_analysis:{user_id}"
+        )
+        if result["status"] == "success" and not result["deduplicated"]:
+            print(f"📊 Queued cross-session pattern analysis: job {result['job_id']}")
+    return pattern_summary_from_snapshot(snapshot) if snapshot else get_user_pattern_summary(user_id)
+
+
+def _step_result(step, future, deadline):
+    """Wait for a step until its deadline, degrading to the step's default on timeout or error"""
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0)) or CONTEXT_STEP_DEFAULTS[step]
+    except FuturesTimeoutError:
+        print(f"⏱️ {step} step missed its {CONTEXT_STEP_TIMEOUTS[step]}s deadline, continuing without it")
+        _context_executor.abandon(future)
+    except Exception as e:
+        print(f"⚠️ Error in {step} step: {e}")
+    return CONTEXT_STEP_DEFAULTS[step]
+
+
+def gather_guidance_context(user_id, session_id, user_query):
+    """
+    Gather session context, user patterns, follow-ups and Tavily results concurrently
+    
+    Prior context is read from the user's materialized context snapshot (backend/user_context.py)
+    with a single query: the consolidated context, its follow-ups and the pattern summary are
+    kept there by the writers and the background context refresh. Only a user without a
+    usable precomputed context falls back to consolidating here, with follow-ups starting as
+    soon as the context is ready. Tavily runs alongside. Each step has its own deadline in
+    CONTEXT_STEP_TIMEOUTS and falls back to its default in CONTEXT_STEP_DEFAULTS.
+    
+    Returns:
+    tuple: (context_data, follow_ups, pattern_summary, tavily_data)
+    """
+    timings = {}
+    started_at = time.monotonic()
+    
+    print(f"🔍 Getting consolidated context, patterns and Tavily results for user {user_id}")
+    tavily_future = _context_executor.submit(_run_timed, 'tavily', timings, get_resources_with_links, user_query, user_id)
+    
+    snapshot = get_user_context(user_id)
+    snapshot_steps = []
+    context_data = context_from_snapshot(snapshot, session_id)
+    if context_data is not None:
+        follow_ups = snapshot.get('follow_ups') or CONTEXT_STEP_DEFAULTS['followups']
+        snapshot_steps += ['context', 'followups']
+        if context_is_stale(snapshot):
+            schedule_context_refresh(user_id)
+    if snapshot is not None:
+        pattern_summary = analyze_user_patterns(user_id, snapshot)
+        snapshot_steps.append('patterns')
+    else:
+        patterns_future = _context_executor.submit(_run_timed, 'patterns', timings, analyze_user_patterns, user_id)
+    
+    if context_data is None:
+        context_future = _context_executor.submit(
+            _run_timed, 'context', timings, generate_consolidated_context,
+            user_id=user_id, current_session_id=session_id, current_query=user_query, limit=3
+        )
+        context_data = _step_result('context', context_future, started_at + CONTEXT_STEP_TIMEOUTS['context'])
+        
+        print(f"💡 Generating contextual follow-ups for user {user_id}")
+        followups_started_at = time.monotonic()
+        followups_future = _context_executor.submit(
+            _run_timed, 'followups', timings, generate_contextual_followups,
+            user_id=user_id, current_query=user_query, consolidated_context=context_data
+        )
+        follow_ups = _step_result('followups', followups_future, followups_started_at + CONTEXT_STEP_TIMEOUTS['followups'])
+    
+    if snapshot is None:
+        pattern_summary = _step_result('patterns', patterns_future, started_at + CONTEXT_STEP_TIMEOUTS['patterns'])
+    tavily_data = _step_result('tavily', tavily_future, started_at + CONTEXT_STEP_TIMEOUTS['tavily'])
+    
+    if tavily_data:
+        print(f"✅ Tavily search completed with {len(tavily_data.get('search_results', []))} results")
+    
+    step_report = ", ".join(
+        f"{step} from snapshot" if step in snapshot_steps
+        else f"{step} {timings[step]:.2f}s" if step in timings else f"{step} timed out"
+        for step in CONTEXT_STEP_TIMEOUTS
+    )
+    print(f"⏱️ Context gathered in {time.monotonic() - started_at:.2f}s ({step_report})")
+    
+    return context_data, follow_ups, pattern_summary, tavily_data
+
+
+def get_career_guidance_task(profile_analysis, user_query, conversation_context=""):
     """
     Enhanced career guidance task with integrated Tavily search and session context
+    
+    conversation_context is the token-bounded memory of the current session
+    (session_context.conversation_memory.build_conversation_context).
     """
     user_id = st.session_state.get('user_id')
     session_id = st.session_state.get('current_session_id')
     
-    # Initialize default values
-    context_data = {}
-    follow_ups = []
-    pattern_summary = None
-    tavily_data = None
+    context_data, follow_ups, pattern_summary, tavily_data = gather_guidance_context(user_id, session_id, user_query)
     
-    try:
-        # Get consolidated context from previous sessions
-        print(f"🔍 Getting consolidated context for user {user_id}")
-        context_data = generate_consolidated_context(
-            user_id=user_id, 
-            current_session_id=session_id,
-            current_query=user_query,
-            limit=3
-        ) or {}
-        
-        # Analyze user patterns
-        print(f"🧠 Analyzing user patterns for user {user_id}")
-        
-        if should_analyze_cross_session_patterns(user_id):
-            print("📊 Generating cross-session pattern analysis...")
-            pattern_id = enhanced_cross_session_analysis(user_id, force_generate_missing=True)
-            if pattern_id:
-                print(f"✅ Cross-session analysis completed: {pattern_id}")
-        
-        pattern_summary = get_user_pattern_summary(user_id)
-        
-        # Generate contextual follow-ups
-        print(f"💡 Generating contextual follow-ups for user {user_id}")
-        follow_ups = generate_contextual_followups(
-            user_id=user_id,
-            current_query=user_query,
-            consolidated_context=context_data
-        ) or []
-        
-        # Get Tavily search results if applicable
-        print(f"🔍 Checking if Tavily search is needed for query: {user_query}")
-        category = "CAREER_GUIDANCE"  # Assuming this since we're in career guidance task
-        
-        print("🌐 Using Tavily search for enhanced results...")
-        tavily_data = get_resources_with_links(user_query)
-        if tavily_data:
-            print(f"✅ Tavily search completed with {len(tavily_data.get('search_results', []))} results")
-        
-    except Exception as e:
-        print(f"⚠️ Error in context/pattern analysis: {e}")
-        context_data = {}
-        follow_ups = []
-        pattern_summary = None
-        tavily_data = None
+    # Fit session context, patterns and search results into the prompt budget; the lowest-ranked search results go first
+    search_results = (tavily_data or {}).get('search_results') or []
+    sections = fit_prompt_sections('career_guidance', [
+        {'name': 'search_results', 'items': search_results, 'render': format_search_results_for_prompt, 'priority': 1, 'min_items': 1},
+        {'name': 'patterns', 'text': format_pattern_summary(pattern_summary) if pattern_summary else 'Pattern analysis pending - adapt based on user responses in this session.', 'priority': 2},
+        {'name': 'context_summary', 'text': context_data.get('context_summary', 'This appears to be a new user with no previous session history.'), 'priority': 3},
+        {'name': 'conversation', 'text': conversation_context, 'priority': 4},
+        {'name': 'followups', 'text': format_followups(follow_ups), 'required': True}
+    ])
     
     # Build the enhanced task description with Tavily integration
     tavily_section = ""
-    if tavily_data and tavily_data.get('search_results'):
+    if search_results:
         tavily_section = f"""
         **Live Search Results (From Web Search):**
         Based on your query "{user_query}", here are the most relevant and up-to-date results:
         
-        {format_search_results_for_prompt(tavily_data['search_results'])}
+        {sections['search_results']}
         
         **Instructions for using search results:**
         - Prioritize information from these live search results based on query if the query doesn't require just give them as some useful resources for you
@@ -303,8 +537,11 @@ def get_career_guidance_task(profile_analysis, user_query):
 
         **Current User Query:** {user_query}
 
+        **This Conversation So Far:**
+        {sections['conversation'] or 'This is the start of the conversation.'}
+
         **Previous Session Context:**
-        {context_data.get('context_summary', 'This appears to be a new user with no previous session history.')}
+        {sections['context_summary']}
 
         **Key Context from Previous Sessions:**
         {', '.join(context_data.get('key_context_points', ['No previous context available']))}
@@ -316,13 +553,13 @@ def get_career_guidance_task(profile_analysis, user_query):
         {', '.join(context_data.get('previous_recommendations', ['None']))}
 
         **User Learning & Interaction Patterns:**
-        {format_pattern_summary(pattern_summary) if pattern_summary else 'Pattern analysis pending - adapt based on user responses in this session.'}
+        {sections['patterns']}
         
         **live search results:**
         {tavily_section}
 
         **Contextual Follow-up Suggestions:**
-        {format_followups(follow_ups)}
+        {sections['followups']}
 
         **Your Task:**
         1. Provide a comprehensive, personalized response to the user's current query
@@ -348,6 +585,8 @@ def get_career_guidance_task(profile_analysis, user_query):
         **Important:** Your response should feel like a continuation of an ongoing conversation, naturally incorporating both live search results and past discussions while addressing the current query with specific, actionable information.
         """
     
+    record_prompt_usage('career_guidance', task_description)
+    
     return Task(
         description=task_description,
         agent=general_purpose_agent(),
@@ -564,56 +803,59 @@ def handle_gibberish_task():
     )
 
 # Main handler with enhanced guardrails and edge case handling
-def get_career_guidance(user_query, candidate_profile):
-    """
-    Handles user query with comprehensive guardrails and edge case detection.
+# End of a completed sentence (closing punctuation, including the Devanagari danda, followed by whitespace) or
+# of a line. Streamed text is released up to here once checked, and the chat page translates up to here
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?।])\s+|\n")
 
-    Args:
-        user_query (str): User's input
-        candidate_profile (dict): User profile from database
 
-    Returns:
-        str: Appropriate, guardrail-compliant response
-    """
-    # Step 1: Analyze profile
-    profile_analyzer = create_profile_analyzer_agent()
-    profile_analysis_task = create_profile_analysis_task(profile_analyzer, candidate_profile)
-    profile_crew = Crew(
-        agents=[profile_analyzer],
-        tasks=[profile_analysis_task],
-        verbose=False,
-        process=Process.sequential
-    )
-    profile_analysis_result = profile_crew.kickoff()
+class ResponseRevision(str):
+    """Streamed chunk that replaces everything streamed so far for the current response (e.g. after a guardrail rewrite)"""
 
-    try:
-        profile_analysis_str = str(profile_analysis_result)
-        json_match = re.search(r'```(?:json)?\n(.*?)\n```', profile_analysis_str, re.DOTALL)
-        if json_match:
-            profile_analysis = json.loads(json_match.group(1))
+
+def collect_stream(chunks):
+    """Join streamed chunks into the final response text, honouring ResponseRevision chunks"""
+    parts = []
+    for chunk in chunks:
+        if isinstance(chunk, ResponseRevision):
+            parts = [str(chunk)]
         else:
-            profile_analysis = json.loads(profile_analysis_str)
-    except json.JSONDecodeError:
-        profile_analysis = {"raw_result": profile_analysis_str}
-    
-    # Step 2: Classify query type
-    classifier_agent = general_purpose_agent()
-    classify_task = classify_query_task(user_query)
-    
-    classify_crew = Crew(
-        agents=[classifier_agent],
-        tasks=[classify_task],
-        verbose=False,
-        process=Process.sequential
-    )
-    category_result = classify_crew.kickoff()
-    category = str(category_result).strip()
-    
-    # Step 3: Handle based on category
-    response_agent = general_purpose_agent()
-    
+            parts.append(chunk)
+    return "".join(parts)
+
+
+def plan_career_guidance(user_query, candidate_profile, user_segment=None, conversation_context=""):
+    """
+    Classify a query, check the semantic answer cache and build the task that produces the final response
+
+    Returns:
+        dict: task (final response Task), category, cacheable (cache the answer afterwards)
+              and fallback (text to serve if the task fails; set on semantic cache hits)
+    """
+    # Step 1: Classify query type locally, falling back to the LLM for low-confidence queries
+    category = classify_query(user_query, llm_fallback=classify_query_with_llm)["category"]
+    # Answers that build on the conversation ("how do I prepare for it?") are neither served from
+    # nor stored in the cross-user cache; the same words mean something else in another chat
+    cacheable = bool(user_segment) and category in CACHEABLE_CATEGORIES and not conversation_context.strip()
+    
+    # Step 2: Serve a near-identical question from the semantic cache with a short personalization pass
+    if cacheable:
+        cached = answer_cache.lookup(user_query, user_segment)
+        if cached:
+            cached_answer, similarity, cached_query = cached
+            print(f"🗂️ Semantic cache hit ({similarity:.2f}) for '{user_query}' via '{cached_query}'")
+            return {
+                "task": personalize_cached_answer_task(cached_answer, user_query, candidate_profile),
+                "category": category,
+                "cacheable": False,
+                "fallback": cached_answer
+            }
+    
+    # Step 3: Analyze profile (cached per profile version)
+    profile_analysis = analyze_candidate_profile(candidate_profile)
+    
+    # Step 4: Handle based on category
     if "CAREER_GUIDANCE" in category:
-        task = get_career_guidance_task(profile_analysis, user_query)
+        task = get_career_guidance_task(profile_analysis, user_query, conversation_context)
     elif "BIASED_REQUEST" in category:
         task = handle_biased_request_task(user_query)
     elif "HARASSMENT_RELATED" in category:
@@ -629,41 +871,120 @@ def get_career_guidance(user_query, candidate_profile):
     else:  # IRRELEVANT_BENIGN or any unclassified queries
         task = handle_irrelevant_task(user_query)
     
-    crew = Crew(
-        agents=[response_agent],
-        tasks=[task],
-        verbose=False,
-        process=Process.sequential
-    )
-    result = crew.kickoff()
+    return {"task": task, "category": category, "cacheable": cacheable, "fallback": None}
+
+
+def finalize_career_guidance(plan, user_query, user_segment, response):
+    """Certify a generated response with the guardrails and queue it for the semantic cache"""
+    # Certify the response locally; only flagged responses go through the LLM guardrail rewrite
+    final_response = apply_guardrails(response, escalate=rewrite_with_guardrails)
     
-    # Apply final guardrail check to ensure the response is appropriate
-    guardrail_check_task = Task(
-        description=f"""
-        Review this response for appropriateness: "{result}"
-        
-        Ensure it:
-        1. Contains no gender stereotypes or biased language
-        2. Avoids suggesting acceptance of discrimination or inequality
-        3. Focuses on empowerment rather than limitations
-        4. Uses inclusive, respectful language
-        5. Provides evidence-based guidance when making claims
-        6. Balances realism with optimism and actionable strategies
-        7. Uses gender-neutral language where appropriate
-        
-        If any issues are found, revise the response to comply with these guidelines.
-        If the response is appropriate, return it unchanged.
-        """,
-        agent=general_purpose_agent(),
-        expected_output="A guardrail-compliant response."
-    )
+    # Generalizing costs an LLM call, so only questions asked more than once in the segment are cached
+    if plan["cacheable"] and answer_cache.worth_caching(user_query, user_segment):
+        _answer_cache_executor.submit(cache_generic_answer, user_query, user_segment, final_response)
     
-    final_crew = Crew(
-        agents=[response_agent],
-        tasks=[guardrail_check_task],
-        verbose=False,
-        process=Process.sequential
-    )
+    return final_response
+
+
+def _run_planned_task(plan):
+    try:
+        return _run_single_task(plan["task"])
+    except Exception as e:
+        if plan["fallback"] is None:
+            raise
+        print(f"⚠️ Personalization failed, serving the generic answer: {e}")
+        return plan["fallback"]
+
+
+def get_career_guidance(user_query, candidate_profile, user_segment=None, conversation_context=""):
+    """
+    Handles user query with comprehensive guardrails and edge case detection.
+
+    Args:
+        user_query (str): User's input
+        candidate_profile (dict): User profile from database
+        user_segment (str, optional): "starter", "restarter" or "raiser"; enables the semantic answer cache for turns without conversation context
+        conversation_context (str, optional): Token-bounded memory of the current chat session
+
+    Returns:
+        str: Appropriate, guardrail-compliant response
+    """
+    plan = plan_career_guidance(user_query, candidate_profile, user_segment, conversation_context)
+    return finalize_career_guidance(plan, user_query, user_segment, _run_planned_task(plan))
+
+
+def stream_task_output(task):
+    """Stream a single-agent task's output token by token, calling the agent's model directly instead of a crew"""
+    agent = task.agent
+    messages = [
+        ("system", f"You are {agent.role}. {agent.backstory}\nYour goal: {agent.goal}"),
+        ("human", f"{task.description}\n\nExpected output: {task.expected_output}")
+    ]
+    llm = get_chat_llm(GEMINI_API_KEY, model=GUIDANCE_MODEL, temperature=GUIDANCE_TEMPERATURE)
+    for chunk in llm.stream(messages):
+        if chunk.content:
+            yield chunk.content
+
+
+def _released_sentences(text):
+    """Length of the prefix of streamed text that ends on a completed sentence, or 0"""
+    match = None
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        pass
+    return match.end() if match else 0
+
+
+def stream_career_guidance(user_query, candidate_profile, user_segment=None, conversation_context=""):
+    """
+    Streaming variant of get_career_guidance that yields the final answer as it is generated
+    
+    Text is released a completed sentence at a time, after the local guardrail check
+    has passed everything generated so far (non-inclusive terms are neutralized on the
+    way out). Once the check flags the answer, nothing more is shown until the
+    guardrail rewrite is ready, which replaces it as a ResponseRevision. A ResponseRevision
+    is also yielded if the finished answer differs from what was shown, or streaming
+    fails part-way.
+
+    Args:
+        user_query (str): User's input
+        candidate_profile (dict): User profile from database
+        user_segment (str, optional): "starter", "restarter" or "raiser"; enables the semantic answer cache for turns without conversation context
+        conversation_context (str, optional): Token-bounded memory of the current chat session
+
+    Yields:
+        str: Checked response text, possibly followed by one ResponseRevision
+    """
+    plan = plan_career_guidance(user_query, candidate_profile, user_segment, conversation_context)
     
-    final_result = final_crew.kickoff()
-    return final_result
\ No newline at end of file
+    raw = ""
+    shown = ""
+    checked_upto = 0
+    held_back = False
+    try:
+        for token in stream_task_output(plan["task"]):
+            raw += token
+            released = _released_sentences(raw)
+            if held_back or released <= checked_upto:
+                continue
+            
+            checked_upto = released
+            check = check_response(raw[:released])
+            if check["decision"] == "escalate" or not check["text"].startswith(shown):
+                held_back = True
+                print(f"🛡️ Holding back the rest of the stream: {check['flags'] or 'revised text'}")
+                continue
+            yield check["text"][len(shown):]
+            shown = check["text"]
+        response = raw
+    except Exception as e:
+        print(f"⚠️ Streaming failed, generating the full response instead: {e}")
+        response = _run_planned_task(plan)
+        held_back = True
+    
+    final_response = finalize_career_guidance(plan, user_query, user_segment, response)
+    if not held_back and final_response.startswith(shown):
+        # The unfinished last sentence, certified with the whole answer
+        if final_response != shown:
+            yield final_response[len(shown):]
+    else:
+        yield ResponseRevision(final_response)
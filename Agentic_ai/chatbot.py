@@ -1,10 +1,11 @@
 import os
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator
+from concurrent.futures import as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime
 
-from Agentic_ai.herkey_rag import get_job_recommendations
+from Agentic_ai.herkey_rag import get_job_recommendations, get_offline_job_recommendations
 
 from Agentic_ai.herkey_rag import get_event_recommendations
 
@@ -13,11 +14,13 @@ from Agentic_ai.herkey_rag import get_session_recommendations
 from Agentic_ai.herkey_rag import get_community_recommendations
 
 from Agentic_ai.external_job_search import TavilyJobAgent
-from Agentic_ai.carrer_guide import get_career_guidance
+from Agentic_ai.carrer_guide import get_career_guidance, stream_career_guidance, collect_stream
+from session_context.conversation_memory import build_conversation_context
 
 import streamlit as st
 
 from backend.database import get_profile
+from utils.abandonable_executor import AbandonableExecutor
 
 # Configure logging
 logging.basicConfig(
@@ -25,6 +28,14 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+
+# Runs the independent recommendation sources of a streamed response side by side. A source that
+# misses its deadline is abandoned, so it finishes in the background without holding a slot
+_stream_executor = AbandonableExecutor(max_workers=4, thread_name_prefix="chat-stream")
+
+# Seconds the job sources may take before the response continues without the ones still running
+JOB_SOURCES_TIMEOUT_SECONDS = 45
+
 class CareerGuidanceChatbot: 
     """ 
     AI chatbot for career guidance, supporting starters, restarters, and raisers 
@@ -117,8 +128,20 @@ class CareerGuidanceChatbot:
         """
         Process user query and generate a personalized response based on profile data.
         """
+        return collect_stream(self.process_query_stream(query))
+    
+    def process_query_stream(self, query: str) -> Iterator[str]:
+        """
+        Process user query like process_query, yielding the response as markdown chunks.
+        
+        Each chunk is yielded as soon as it is ready - e.g. the greeting immediately,
+        then HerKey jobs when their crew finishes, then external jobs - so the chat
+        page can render progressively. General career guidance streams token by token;
+        a ResponseRevision chunk replaces everything yielded before it.
+        """
         if not self.user_profile:
-            return "Please sign in so I can provide personalized career guidance based on your profile."
+            yield "Please sign in so I can provide personalized career guidance based on your profile."
+            return
         
         # Normalize query for intent matching
         query_lower = query.lower().strip()
@@ -126,22 +149,26 @@ class CareerGuidanceChatbot:
         # Job recommendations
         if any(kw in query_lower for kw in ["Latest Job Postings", "Latest Jobs"]):
             if "suggest" in query_lower or "recommend" in query_lower or "find" in query_lower:
-                return self._get_job_recommendations()
+                yield from self._stream_job_recommendations()
+                return
             
         # Event recommendations
         if any(kw in query_lower for kw in ["event", "conference", "meetup", "gathering"]):
             if "suggest" in query_lower or "recommend" in query_lower or "upcoming" in query_lower:
-                return self._get_event_recommendations()
+                yield from self._stream_event_recommendations()
+                return
         
         # Community recommendations
         if any(kw in query_lower for kw in ["community", "groups", "network", "communities"]):
             if "suggest" in query_lower or "recommend" in query_lower:
-                return self._get_community_recommendations()
+                yield from self._stream_community_recommendations()
+                return
         
         # Learning session recommendations
         if any(kw in query_lower for kw in ["webinar", "workshop", "session", "upskilling programs"]):
             if "suggest" in query_lower or "recommend" in query_lower:
-                return self._get_session_recommendations()
+                yield from self._stream_session_recommendations()
+                return
         
         # Post creation
         if any(kw in query_lower for kw in ["post", "share", "create content", "celebrate"]):
@@ -157,83 +184,120 @@ class CareerGuidanceChatbot:
             else:
                 purpose = "share"
             
-            return self._create_post(query, purpose)
+            yield self._create_post(query, purpose)
+            return
         
-        # General career guidance
-        return self._get_general_career_guidance(query)
+        # General career guidance, streamed token by token
+        yield from self._stream_general_career_guidance(query)
     
     def _get_job_recommendations(self) -> str:
         """Get personalized job recommendations from HerKey and external sources."""
+        return "".join(self._stream_job_recommendations())
+    
+    def _stream_job_recommendations(self) -> Iterator[str]:
+        """Yield the greeting, then the HerKey and external job sections as each source finishes, then advice."""
+        yield self._format_personalized_greeting()
+        yield "\n\n### Job Recommendations Just For You\n\n"
+        
+        # The HerKey crews and the Tavily search are independent, so start both right away
+        herkey_future = _stream_executor.submit(get_job_recommendations, self.user_profile)
+        external_future = _stream_executor.submit(self.tavily_agent.get_job_recommendations, self.user_profile)
+        sources = {herkey_future: "HerKey", external_future: "external"}
+        
+        # None until a source answers; a HerKey failure falls back to the offline scores below
+        herkey_jobs = None
+        external_failed = True
         try:
-            # Get recommendations from HerKey
-            herkey_jobs = get_job_recommendations(self.user_profile)
-            
-            # Get external job recommendations 
-            external_recommendations = {}
-            if self.user_profile:
-                tavily_result = self.tavily_agent.get_job_recommendations()
-                if tavily_result["status"] == "success":
-                    external_recommendations = tavily_result
-            #ccall th efuntions here for tavily suggested ext_jobs
-
-
-            # Format response
-            response = self._format_personalized_greeting()
-            response += "\n\n### Job Recommendations Just For You\n\n"
-            
-            # Add HerKey jobs
+            # Each source's section is shown as soon as that source finishes, whichever comes first
+            for future in as_completed(sources, timeout=JOB_SOURCES_TIMEOUT_SECONDS):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error in {sources[future]} job recommendations: {e}")
+                    continue
+                
+                if future is herkey_future:
+                    herkey_jobs = result
+                    if herkey_jobs:
+                        yield self._format_herkey_jobs(herkey_jobs)
+                else:
+                    external_failed = False
+                    if result["status"] == "success" and result.get("recommendations"):
+                        yield self._format_external_jobs(result["recommendations"])
+        except FuturesTimeoutError:
+            for future, source in sources.items():
+                if not future.done():
+                    logger.warning(f"{source} job recommendations missed the {JOB_SOURCES_TIMEOUT_SECONDS}s deadline")
+                    _stream_executor.abandon(future)
+        
+        if herkey_jobs is None:
+            try:
+                herkey_jobs = get_offline_job_recommendations(self.user_profile)
+            except Exception as e:
+                logger.error(f"Error in offline job recommendations: {e}")
             if herkey_jobs:
-                response += "**From HerKey Platform:**\n\n"
-                for i, job in enumerate(herkey_jobs[:3], 1):
-                    response += f"{i}. **{job.get('job_title')}** at {job.get('company')}\n"
-                    response += f"   - Match Score: {job.get('match_score')}/100\n"
-                    response += f"   - Why: {job.get('match_explanation')}\n"
-                    if job.get('job_url'):
-                        response += f"   - [Apply Here]({job.get('job_url')})\n"
-                    response += "\n"
-            
-            # Add external jobs from Tavily
-            if external_recommendations and "recommendations" in external_recommendations:
-                ext_jobs = external_recommendations["recommendations"]
-                if ext_jobs:
-                    response += "**From External Job Sites:**\n\n"
-                    for i, job in enumerate(ext_jobs[:5], 1):  # Show top 5 results
-                        response += f"{i}. **{job.get('job_title', 'Job Opportunity')}** at {job.get('company', 'Company')}\n"
-                        response += f"   * Location: {job.get('location', 'Not specified')}\n"
-                        
-                        # Skills match
-                        skills_match = job.get('skills_match', [])
-                        if skills_match:
-                            response += f"   * Skills Match: {', '.join(skills_match[:3])}\n"
-                        
-                        # Apply link
-                        if job.get('job_link'):
-                            response += f"   * [Apply Here]({job.get('job_link')})\n"
-                        response += "\n"
-            
-            # Add user type specific advice
-            if self.user_type == "starter":
-                response += "\n**Starting Your Career:** As a recent graduate, focus on roles that provide strong mentorship and learning opportunities. Don't be discouraged if you don't meet 100% of the requirements - many employers value potential and enthusiasm in entry-level candidates.\n"
-            elif self.user_type == "restarter":
-                response += "\n**Restarting Your Career:** Your previous experience is valuable! Look for companies with returnship programs and highlight your transferable skills when applying. Many progressive employers recognize the unique perspectives that professionals returning to work bring to their teams.\n"
-            else:  # raiser
-                response += "\n**Advancing Your Career:** With your experience, look for roles that stretch your capabilities while building on your existing strengths. Consider how each opportunity aligns with your long-term career aspirations.\n"
+                yield self._format_herkey_jobs(herkey_jobs)
+        
+        if herkey_jobs is None and external_failed:
+            yield "I'm having trouble retrieving job recommendations right now. Let's try a different approach to your career development. Would you like to discuss upskilling opportunities or industry trends instead?"
+            return
+        
+        yield self._format_job_advice()
+    
+    def _format_herkey_jobs(self, herkey_jobs: List[Dict]) -> str:
+        """Format HerKey job recommendations as markdown."""
+        response = "**From HerKey Platform:**\n\n"
+        for i, job in enumerate(herkey_jobs[:3], 1):
+            response += f"{i}. **{job.get('job_title')}** at {job.get('company')}\n"
+            response += f"   - Match Score: {job.get('match_score')}/100\n"
+            response += f"   - Why: {job.get('match_explanation')}\n"
+            if job.get('job_url'):
+                response += f"   - [Apply Here]({job.get('job_url')})\n"
+            response += "\n"
+        return response
+    
+    def _format_external_jobs(self, ext_jobs: List[Dict]) -> str:
+        """Format external (Tavily) job results as markdown."""
+        response = "**From External Job Sites:**\n\n"
+        for i, job in enumerate(ext_jobs[:5], 1):  # Show top 5 results
+            response += f"{i}. **{job.get('job_title', 'Job Opportunity')}** at {job.get('company', 'Company')}\n"
+            response += f"   * Location: {job.get('location', 'Not specified')}\n"
             
-            # Add call to action
-            response += "\nWould you like me to help you prepare for interviews for any of these positions? Or would you prefer recommendations for learning resources to enhance your qualifications?"
+            # Skills match
+            skills_match = job.get('skills_match', [])
+            if skills_match:
+                response += f"   * Skills Match: {', '.join(skills_match[:3])}\n"
             
-            return response
-        except Exception as e:
-            logger.error(f"Error in job recommendations: {e}")
-            return "I'm having trouble retrieving job recommendations right now. Let's try a different approach to your career development. Would you like to discuss upskilling opportunities or industry trends instead?"
+            # Apply link
+            if job.get('job_link'):
+                response += f"   * [Apply Here]({job.get('job_link')})\n"
+            response += "\n"
+        return response
+    
+    def _format_job_advice(self) -> str:
+        """User-type specific job search advice and call to action."""
+        if self.user_type == "starter":
+            response = "\n**Starting Your Career:** As a recent graduate, focus on roles that provide strong mentorship and learning opportunities. Don't be discouraged if you don't meet 100% of the requirements - many employers value potential and enthusiasm in entry-level candidates.\n"
+        elif self.user_type == "restarter":
+            response = "\n**Restarting Your Career:** Your previous experience is valuable! Look for companies with returnship programs and highlight your transferable skills when applying. Many progressive employers recognize the unique perspectives that professionals returning to work bring to their teams.\n"
+        else:  # raiser
+            response = "\n**Advancing Your Career:** With your experience, look for roles that stretch your capabilities while building on your existing strengths. Consider how each opportunity aligns with your long-term career aspirations.\n"
+        
+        # Add call to action
+        response += "\nWould you like me to help you prepare for interviews for any of these positions? Or would you prefer recommendations for learning resources to enhance your qualifications?"
+        return response
 
     def _get_event_recommendations(self) -> str:
         """Get personalized event recommendations from HerKey."""
+        return "".join(self._stream_event_recommendations())
+    
+    def _stream_event_recommendations(self) -> Iterator[str]:
+        """Yield the greeting immediately, then the event recommendations once the crew finishes."""
+        yield self._format_personalized_greeting()
         try:
             events = get_event_recommendations(self.user_profile)
             
-            response = self._format_personalized_greeting()
-            response += "\n\n### Professional Events Tailored For You\n\n"
+            response = "\n\n### Professional Events Tailored For You\n\n"
             
             if events:
                 for i, event in enumerate(events[:3], 1):
@@ -261,18 +325,22 @@ class CareerGuidanceChatbot:
             
             response += "\nWould you like tips on how to make the most of networking at these events?"
             
-            return response
+            yield response
         except Exception as e:
             logger.error(f"Error in event recommendations: {e}")
-            return "I'm having trouble retrieving event recommendations at the moment. Would you like to explore learning resources or community groups instead?"
+            yield "\n\nI'm having trouble retrieving event recommendations at the moment. Would you like to explore learning resources or community groups instead?"
 
     def _get_community_recommendations(self) -> str:
         """Get personalized community recommendations from HerKey."""
+        return "".join(self._stream_community_recommendations())
+    
+    def _stream_community_recommendations(self) -> Iterator[str]:
+        """Yield the greeting immediately, then the community recommendations once the crew finishes."""
+        yield self._format_personalized_greeting()
         try:
             communities = get_community_recommendations(self.user_profile)
             
-            response = self._format_personalized_greeting()
-            response += "\n\n### Communities That Will Help You Grow\n\n"
+            response = "\n\n### Communities That Will Help You Grow\n\n"
             
             if communities:
                 for i, group in enumerate(communities[:3], 1):
@@ -306,18 +374,22 @@ class CareerGuidanceChatbot:
             
             response += "\nWould you like tips on how to effectively engage in these communities?"
             
-            return response
+            yield response
         except Exception as e:
             logger.error(f"Error in community recommendations: {e}")
-            return "I'm having trouble accessing community information right now. Would you like to discuss career development strategies instead?"
+            yield "\n\nI'm having trouble accessing community information right now. Would you like to discuss career development strategies instead?"
 
     def _get_session_recommendations(self) -> str:
         """Get personalized learning session recommendations from HerKey."""
+        return "".join(self._stream_session_recommendations())
+    
+    def _stream_session_recommendations(self) -> Iterator[str]:
+        """Yield the greeting immediately, then the session recommendations once the crew finishes."""
+        yield self._format_personalized_greeting()
         try:
             sessions = get_session_recommendations(self.user_profile)
             
-            response = self._format_personalized_greeting()
-            response += "\n\n### Learning Sessions Perfect For Your Growth\n\n"
+            response = "\n\n### Learning Sessions Perfect For Your Growth\n\n"
             
             if sessions:
                 for i, session in enumerate(sessions[:3], 1):
@@ -362,10 +434,10 @@ class CareerGuidanceChatbot:
             
             response += "\nWould you like help creating a personalized learning plan based on your career goals?"
             
-            return response
+            yield response
         except Exception as e:
             logger.error(f"Error in session recommendations: {e}")
-            return "I'm having trouble accessing learning session information right now. Would you like some general recommendations for skill development resources instead?"
+            yield "\n\nI'm having trouble accessing learning session information right now. Would you like some general recommendations for skill development resources instead?"
     
     
     def _get_general_career_guidance(self, query: str) -> str:
@@ -375,9 +447,23 @@ class CareerGuidanceChatbot:
         
         response = self._format_personalized_greeting()
 
-        response = get_career_guidance(query_lower, self.user_profile)
+        response = get_career_guidance(
+            query_lower,
+            self.user_profile,
+            user_segment=self.user_type,
+            conversation_context=build_conversation_context(query)
+        )
         return response
     
+    def _stream_general_career_guidance(self, query: str) -> Iterator[str]:
+        """Yield the career guidance answer as it is generated (see stream_career_guidance)."""
+        yield from stream_career_guidance(
+            query.lower(),
+            self.user_profile,
+            user_segment=self.user_type,
+            conversation_context=build_conversation_context(query)
+        )
+    
     def _create_post(self, query: str, purpose: str) -> str:
         """Create a personalized post based on user query and profile information."""
         # Get profile information to personalize the post
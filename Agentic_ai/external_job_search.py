@@ -6,6 +6,7 @@ import streamlit as st
 from typing import Dict, List, Optional
 import logging
 from backend.database import get_profile
+from Agentic_ai.search_cache import cached_search
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -153,8 +154,10 @@ class TavilyJobAgent:
             return None
         
         try:
-            response = self.tavily_client.search(
-                query=query,
+            response = cached_search(
+                self.tavily_client,
+                query,
+                "jobs",
                 search_depth="advanced",
                 max_results=max_results,
                 include_domains=["linkedin.com", "indeed.com", "glassdoor.com", "naukri.com", "monster.com"]
@@ -312,8 +315,10 @@ def get_tavily_search_results(query: str, search_type: str = "general") -> Optio
     else:
         try:
             if agent.tavily_client:
-                response = agent.tavily_client.search(
-                    query=query,
+                response = cached_search(
+                    agent.tavily_client,
+                    query,
+                    search_type,
                     search_depth="basic",
                     max_results=6
                 )
@@ -0,0 +1,209 @@
+## guardrails.py -- local rule-based guardrail pass over generated responses; only flagged responses go to the LLM rewrite
+import re
+import threading
+import time
+
+# Stereotypes and biased generalisations about women (escalated to the LLM rewrite)
+BIAS_PATTERNS = {
+    'gender_generalisation': r"\b(women|woman|girls?|females?|mothers?|moms?|wives)\s+(are|is|tend to be|can't be|cannot be)\s+(naturally\s+|generally\s+|usually\s+|often\s+)?(too\s+|less\s+|more\s+)?(emotional|weak|sensitive|irrational|bossy|hysterical|bad at|worse at|not good at|unsuited|not suited|less capable|less committed|less ambitious)\b",
+    'gendered_job': r"\b(a\s+)?(man's|men's|male)\s+(job|role|field|profession|world)\b",
+    'not_for_women': r"\b(not|isn't|aren't)\s+(suitable|meant|made|cut out|ideal|appropriate)\s+for\s+(women|a woman|girls|mothers|females)\b(?!\s+to\s)",
+    'women_only_roles': r"\b(women|mothers|girls)\s+(should|must|ought to)\s+(only|stick to|stay|focus on (the )?(home|family|kids))\b",
+    'family_over_career': r"\b(your|a woman's|her)\s+(real|main|first|primary)\s+(duty|responsibility|priority)\s+is\s+(to\s+)?(your|her|the)\s+(family|husband|home|kids|children)\b",
+    'men_naturally_better': r"\b(men|males)\s+are\s+(naturally|simply|just|biologically)?\s*(better|more suited|stronger|smarter)\b"
+}
+
+# Phrasing that tells the user to accept discrimination or harassment
+DISCRIMINATION_PATTERNS = {
+    'accept_discrimination': r"\b(just|simply|better to|you should|you may have to|you'll have to)\s+(accept|tolerate|put up with|ignore|live with)\s+(the\s+|this\s+|that\s+|such\s+)?(lower pay|pay gap|unequal pay|discrimination|bias|harassment|comments|behaviou?r|treatment)\b",
+    'discourage_reporting': r"\b(don't|do not|avoid|no need to|never)\s+(report|complain|escalate|raise (it|this|a complaint))\b",
+    'normalise_pay_gap': r"\b(normal|natural|expected|fair)\s+(for|that)\s+(women|mothers|females)\s+(to\s+)?(earn|be paid|get paid|make)\s+less\b",
+    'hide_motherhood': r"\b(hide|lie about|conceal)\s+(your|the fact that you)\s*(are\s+)?(pregnan\w*|married|kids|children|motherhood)\b"
+}
+
+# Advice that could harm the user (escalated to the LLM rewrite)
+UNSAFE_ADVICE_PATTERNS = {
+    'falsify_credentials': r"\b(lie|fake|fabricate|invent|inflate|exaggerate)\s+(about\s+|on\s+|in\s+)?(your\s+)?(resume|cv|experience|degree|certificat\w*|qualifications|references)\b",
+    'pay_for_job': r"\b(pay|deposit|transfer)\s+(a|an|the)?\s*(registration|processing|security|placement)?\s*(fee|deposit|amount)\s+(to|for)\s+(get|secure|confirm|receive)\s+(the\s+|a\s+)?(job|offer|interview)\b",
+    'share_credentials': r"\b(share|send|give)\s+(your|the)\s+(otp|password|pin|cvv|bank details|aadhaar|pan)\b",
+    'self_harm': r"\b(kill yourself|end your life|harm yourself|hurt yourself)\b",
+    'confront_alone': r"\b(confront|meet)\s+(him|them|the harasser|your harasser)\s+alone\b"
+}
+
+# Non-inclusive terms with a neutral equivalent; fixed locally without the LLM
+NEUTRAL_REPLACEMENTS = {
+    r"\bchairman\b": "chairperson",
+    r"\bchairmen\b": "chairpersons",
+    r"\bmanpower\b": "workforce",
+    r"\bman-hours\b": "person-hours",
+    r"\bmankind\b": "humankind",
+    r"\bsalesman\b": "salesperson",
+    r"\bsalesmen\b": "salespeople",
+    r"\bbusinessman\b": "businessperson",
+    r"\bbusinessmen\b": "businesspeople",
+    r"\bcameraman\b": "camera operator",
+    r"\bspokesman\b": "spokesperson",
+    r"\bworkmanlike\b": "skilful",
+    r"\bcleaning lady\b": "cleaner",
+    r"\bmale nurse\b": "nurse",
+    r"\blady doctor\b": "doctor",
+    r"\bwoman engineer\b": "engineer"
+}
+
+# A flagged phrase is fine when it is being warned against ("never share your OTP",
+# "you should not just accept discrimination")
+NEGATION_PATTERN = re.compile(r"\b(never|not|don't|do not|avoid|shouldn't|should not|refuse to|no need to)\b[^.!?\n]{0,20}$", re.IGNORECASE)
+
+# Bias and discrimination are fine when the sentence rebuts them ("the myth that women are too
+# emotional to lead is false") or quotes them
+REBUTTAL_PATTERN = re.compile(
+    r"(?<!not a )(?<!no )\b(myths?|stereotypes?|misconceptions?|false|untrue|not true|outdated|baseless|unfounded|debunk\w*|"
+    r"the (idea|belief|assumption|notion|claim) that)\b",
+    re.IGNORECASE
+)
+SENTENCE_END_PATTERN = re.compile(r"[.!?\n]")
+QUOTE_CHARACTERS = "\"“”"
+
+# Rule categories whose matches can be excused as rebuttals or quotations
+REBUTTABLE_CATEGORIES = {'bias', 'discrimination'}
+
+GUARDRAIL_RULES = [
+    ('bias', re.compile(pattern, re.IGNORECASE), name) for name, pattern in BIAS_PATTERNS.items()
+] + [
+    ('discrimination', re.compile(pattern, re.IGNORECASE), name) for name, pattern in DISCRIMINATION_PATTERNS.items()
+] + [
+    ('unsafe_advice', re.compile(pattern, re.IGNORECASE), name) for name, pattern in UNSAFE_ADVICE_PATTERNS.items()
+]
+
+_REPLACEMENTS = [(re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in NEUTRAL_REPLACEMENTS.items()]
+
+_stats = {"checked": 0, "pass": 0, "fixed_locally": 0, "escalated": 0, "escalation_failed": 0, "flagged_unreviewed": 0}
+_stats_lock = threading.Lock()
+
+
+def _match_case(original, replacement):
+    return replacement[:1].upper() + replacement[1:] if original[:1].isupper() else replacement
+
+
+def neutralize_terms(text):
+    """Replace non-inclusive terms with neutral equivalents; returns (text, replaced terms)"""
+    replaced = []
+
+    def substitute(match, replacement):
+        replaced.append(match.group(0))
+        return _match_case(match.group(0), replacement)
+
+    for pattern, replacement in _REPLACEMENTS:
+        text = pattern.sub(lambda match: substitute(match, replacement), text)
+    return text, replaced
+
+
+def _sentence_around(text, start, end):
+    """Bounds of the sentence containing text[start:end]"""
+    before = [match.end() for match in SENTENCE_END_PATTERN.finditer(text, 0, start)]
+    after = SENTENCE_END_PATTERN.search(text, end)
+    return (before[-1] if before else 0), (after.end() if after else len(text))
+
+
+def is_excused(text, category, match):
+    """
+    Whether a rule match is being argued against rather than asserted
+
+    Any match preceded by a negation is excused. Bias and discrimination matches are
+    also excused when their sentence rebuts the idea or the match sits inside a quotation.
+    """
+    if NEGATION_PATTERN.search(text[max(match.start() - 40, 0):match.start()]):
+        return True
+    if category not in REBUTTABLE_CATEGORIES:
+        return False
+
+    sentence_start, sentence_end = _sentence_around(text, match.start(), match.end())
+    if REBUTTAL_PATTERN.search(text, sentence_start, sentence_end):
+        return True
+    quotes_before = sum(text.count(quote, sentence_start, match.start()) for quote in QUOTE_CHARACTERS)
+    return quotes_before % 2 == 1
+
+
+def check_response(response):
+    """
+    Run the local guardrail rules over a generated response
+
+    Parameters:
+    response (str): Response text produced by the LLM
+
+    Returns:
+    dict: decision ('pass', 'fixed_locally' or 'escalate'), flags, the locally fixed text and latency_ms
+    """
+    started_at = time.perf_counter()
+    text = str(response or "")
+
+    flags = []
+    for category, pattern, rule in GUARDRAIL_RULES:
+        for match in pattern.finditer(text):
+            if is_excused(text, category, match):
+                continue
+            flags.append({"category": category, "rule": rule, "match": match.group(0)})
+            break
+
+    fixed_text, replaced = neutralize_terms(text)
+
+    if flags:
+        decision = "escalate"
+    elif replaced:
+        decision = "fixed_locally"
+    else:
+        decision = "pass"
+
+    return {
+        "decision": decision,
+        "flags": flags,
+        "replaced_terms": replaced,
+        "text": fixed_text,
+        "latency_ms": (time.perf_counter() - started_at) * 1000
+    }
+
+
+def apply_guardrails(response, escalate=None):
+    """
+    Certify a response locally, escalating only flagged responses to an LLM rewrite
+
+    Parameters:
+    response (str): Response text produced by the LLM
+    escalate (callable, optional): Function taking (text, flags) and returning the rewritten text
+
+    Returns:
+    str: The response to show the user
+    """
+    result = check_response(response)
+    decision = result["decision"]
+    final_text = result["text"]
+
+    if decision == "escalate":
+        decision = "flagged_unreviewed"
+    if decision == "flagged_unreviewed" and escalate is not None:
+        try:
+            final_text = str(escalate(result["text"], result["flags"]))
+            decision = "escalated"
+        except Exception as e:
+            # Never show a flagged response unreviewed because the rewrite failed
+            print(f"⚠️ Guardrail rewrite failed: {e}")
+            decision = "escalation_failed"
+            final_text = ("I'm sorry, I couldn't put together a response I'm confident is appropriate. "
+                          "Could you rephrase your question?")
+
+    with _stats_lock:
+        _stats["checked"] += 1
+        _stats[decision] += 1
+
+    flagged_rules = ", ".join(f"{flag['category']}:{flag['rule']}" for flag in result["flags"]) or "none"
+    print(f"🛡️ Guardrail decision: {decision} (flags: {flagged_rules}, "
+          f"replaced: {len(result['replaced_terms'])}, {result['latency_ms']:.1f} ms)")
+    return final_text
+
+
+def get_guardrail_stats():
+    """Return guardrail decision counts and the escalation rate for this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["escalation_rate"] = (stats["escalated"] + stats["escalation_failed"]) / stats["checked"] if stats["checked"] else 0.0
+    return stats
@@ -0,0 +1,109 @@
+## herkey_catalog.py -- process-wide store for the HerKey catalog files, parsed once and hot-reloaded on change
+import hashlib
+import json
+import os
+import threading
+
+# Data paths
+HERKEY_SESSIONS_PATH = "Agentic_ai/Herkey_data/herkey_sessions.json"
+HERKEY_JOBS_PATH = "Agentic_ai/Herkey_data/herkey_jobs.json"
+HERKEY_EVENTS_PATH = "Agentic_ai/Herkey_data/herkey_events.json"
+HERKEY_GROUPS_PATH = "Agentic_ai/Herkey_data/herkey_groups.json"
+
+HERKEY_DATA_PATHS = {
+    'sessions': HERKEY_SESSIONS_PATH,
+    'jobs': HERKEY_JOBS_PATH,
+    'events': HERKEY_EVENTS_PATH,
+    'groups': HERKEY_GROUPS_PATH
+}
+
+
+class CatalogSnapshot:
+    """One parsed version of a catalog file; records are shared by every caller and must not be mutated"""
+
+    __slots__ = ('name', 'version', 'mtime', 'digest', 'records')
+
+    def __init__(self, name, version, mtime, digest, records):
+        self.name = name
+        self.version = version
+        self.mtime = mtime
+        self.digest = digest
+        self.records = records
+
+
+class HerkeyCatalogStore:
+    """
+    Loads each catalog file once per process and reloads it only when it changes
+
+    Every get() stats the file. If the mtime moved, the file is re-read and hashed,
+    and only a changed hash produces a new snapshot with the next version number.
+    """
+
+    def __init__(self, data_paths):
+        self._data_paths = dict(data_paths)
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def _validate(self, name):
+        if name not in self._data_paths:
+            raise ValueError(f"Invalid data_type: {name}. Must be one of {list(self._data_paths.keys())}")
+
+    def get(self, name):
+        """
+        Get the current snapshot of a catalog
+
+        Parameters:
+        name (str): Catalog name ('sessions', 'jobs', 'events', 'groups')
+
+        Returns:
+        CatalogSnapshot: Current snapshot (version 0 with no records if the file never loaded)
+        """
+        self._validate(name)
+        path = self._data_paths[name]
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError as e:
+            print(f"Error loading {name} data: {e}")
+            mtime = None
+
+        snapshot = self._snapshots.get(name)
+        if snapshot and snapshot.mtime == mtime:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            snapshot = self._snapshots.get(name)
+            if snapshot and snapshot.mtime == mtime:
+                return snapshot
+            if mtime is None:
+                return snapshot or CatalogSnapshot(name, 0, None, None, ())
+
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+
+                # Touched but unchanged files keep their version
+                if snapshot and snapshot.digest == digest:
+                    snapshot.mtime = mtime
+                    return snapshot
+
+                records = tuple(json.loads(raw))
+            except Exception as e:
+                print(f"Error loading {name} data: {e}")
+                return snapshot or CatalogSnapshot(name, 0, None, None, ())
+
+            version = snapshot.version + 1 if snapshot else 1
+            snapshot = CatalogSnapshot(name, version, mtime, digest, records)
+            self._snapshots[name] = snapshot
+            print(f"Successfully loaded {name} data (version {version}, {len(records)} records)")
+            return snapshot
+
+    def versions(self):
+        """Return {catalog name: version} for every catalog loaded so far"""
+        return {name: snapshot.version for name, snapshot in self._snapshots.items()}
+
+
+# Shared by every Streamlit session and thread in the process
+catalog_store = HerkeyCatalogStore(HERKEY_DATA_PATHS)
@@ -1,73 +1,60 @@
 ## herkey_rag.py -- this file has all the functions to recommend jobs, events, sessions, communities from HerKey.com
 import os
 import json
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from typing import Dict, List, Any
 from datetime import datetime
 from crewai import Agent, Task, Crew, Process
 from utils.input import DateTimeEncoder
+from utils.prompt_budget import fit_prompt_sections, record_prompt_usage, to_prompt_json
+from Agentic_ai.herkey_catalog import HERKEY_DATA_PATHS, catalog_store
+from Agentic_ai.herkey_retrieval import select_top_candidates
+from Agentic_ai.job_scorer import get_scoring_engine, explain_job_match
+from Agentic_ai.profile_analysis_cache import get_cached_profile_analysis, store_profile_analysis
+from Agentic_ai.recommendation_cache import get_cached_recommendations, store_recommendations
 import google.generativeai as genai
 import streamlit as st
 
-from langchain_community.chat_models import ChatLiteLLM
+from utils.abandonable_executor import AbandonableExecutor
+from utils.llm_registry import get_chat_llm
 
 GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
 
-# Data paths
-HERKEY_SESSIONS_PATH = "Agentic_ai/Herkey_data/herkey_sessions.json"
-HERKEY_JOBS_PATH = "Agentic_ai/Herkey_data/herkey_jobs.json"
-HERKEY_EVENTS_PATH = "Agentic_ai/Herkey_data/herkey_events.json"
-HERKEY_GROUPS_PATH = "Agentic_ai/Herkey_data/herkey_groups.json"
-
 # Load data files
 def load_data(data_type=None):
     """
     Load data files required for recommendations
     
+    Catalogs come from the process-wide catalog store, so the JSON is parsed once
+    and only re-read when the file changes on disk.
+    
     Parameters:
     data_type (str, optional): Type of data to load ('sessions', 'jobs', 'events', 'groups')
                               If None, loads all data types
     
     Returns:
-    dict: Dictionary containing the requested data
+    dict: Dictionary containing the requested data (shared, read-only record tuples)
     """
-    data = {}
-    
-    # Define paths dictionary for easier reference
-    data_paths = {
-        'sessions': HERKEY_SESSIONS_PATH,
-        'jobs': HERKEY_JOBS_PATH,
-        'events': HERKEY_EVENTS_PATH,
-        'groups': HERKEY_GROUPS_PATH
-    }
-    
     # If no specific data type is requested, load all
     if data_type is None:
-        types_to_load = data_paths.keys()
+        types_to_load = HERKEY_DATA_PATHS.keys()
     else:
         # Ensure data_type is valid
-        if data_type not in data_paths:
-            raise ValueError(f"Invalid data_type: {data_type}. Must be one of {list(data_paths.keys())}")
+        if data_type not in HERKEY_DATA_PATHS:
+            raise ValueError(f"Invalid data_type: {data_type}. Must be one of {list(HERKEY_DATA_PATHS.keys())}")
         types_to_load = [data_type]
     
-    # Load only the requested data types
-    for type_name in types_to_load:
-        try:
-            with open(data_paths[type_name], 'r') as f:
-                data[type_name] = json.load(f)
-                print(f"Successfully loaded {type_name} data")
-        except Exception as e:
-            print(f"Error loading {type_name} data: {e}")
-            data[type_name] = []
-    
-    return data
+    return {type_name: catalog_store.get(type_name).records for type_name in types_to_load}
+
+def get_catalog_version(data_type):
+    """Return the content digest identifying the current catalog for a data type (stable across restarts)"""
+    return catalog_store.get(data_type).digest
+
 # Create agents
 def create_profile_analyzer_agent():
     """Create an agent to analyze candidate profiles"""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-2.0-flash-lite", temperature=0.2)
     
     return Agent(
         role="Candidate Profile Analyzer",
@@ -82,11 +69,7 @@ def create_profile_analyzer_agent():
 
 def create_job_recommender_agent():
     """Create an agent to recommend jobs"""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-2.0-flash-lite", temperature=0.2)
     
     return Agent(
         role="Job Recommendation Specialist",
@@ -102,11 +85,7 @@ def create_job_recommender_agent():
 
 def create_event_recommender_agent():
     """Create an agent to recommend events"""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-2.0-flash-lite", temperature=0.2)
 
     return Agent(
         role="Event Recommendation Specialist",
@@ -122,11 +101,7 @@ def create_event_recommender_agent():
 
 def create_session_recommender_agent():
     """Create an agent to recommend sessions"""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-2.0-flash-lite", temperature=0.2)
     
     return Agent(
         role="Learning Session Recommendation Specialist",
@@ -142,11 +117,7 @@ def create_session_recommender_agent():
 
 def create_community_recommender_agent():
     """Create an agent to recommend community groups"""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-2.0-flash-lite", temperature=0.2)
     
     return Agent(
         role="Community Group Recommendation Specialist",
@@ -160,15 +131,25 @@ def create_community_recommender_agent():
         llm=llm
     )
 
+def build_recommendation_sections(task_name, candidate_analysis, catalog_items):
+    """Fit the candidate analysis and catalog into the task's prompt budget, dropping the lowest-ranked catalog items first"""
+    return fit_prompt_sections(task_name, [
+        {'name': 'analysis', 'text': to_prompt_json(candidate_analysis), 'priority': 2},
+        {'name': 'catalog', 'items': list(catalog_items), 'priority': 1, 'min_items': 3}
+    ])
+
 # Create tasks
 def create_profile_analysis_task(profile_analyzer_agent, candidate_profile):
     """Create a task to analyze candidate profile"""
-    return Task(
+    sections = fit_prompt_sections('profile_analysis', [
+        {'name': 'profile', 'text': to_prompt_json(candidate_profile), 'priority': 1}
+    ])
+    task = Task(
         description=f"""
         Analyze the following candidate profile to extract key insights:
         
         ```
-        {json.dumps(candidate_profile, indent=2,cls=DateTimeEncoder)}
+        {sections['profile']}
         ```
         
         Provide a comprehensive analysis including:
@@ -184,23 +165,29 @@ def create_profile_analysis_task(profile_analyzer_agent, candidate_profile):
         agent=profile_analyzer_agent,
         expected_output="A structured JSON with comprehensive candidate profile analysis"
     )
+    record_prompt_usage('profile_analysis', task.description)
+    return task
 
 def create_job_recommendation_task(job_recommender_agent, candidate_analysis, jobs_data):
     """Create a task to recommend jobs with URLs"""
-    return Task(
+    sections = build_recommendation_sections('job_recommendation', candidate_analysis, jobs_data)
+    task = Task(
         description=f"""
         Based on the candidate profile analysis below, recommend the top 3 most suitable jobs from the provided job listings.
         
         Candidate Analysis:
         ```
-        {json.dumps(candidate_analysis, indent=2, cls=DateTimeEncoder)}
+        {sections['analysis']}
         ```
         
         Available Jobs:
         ```
-        {json.dumps(jobs_data, indent=2, cls=DateTimeEncoder)}
+        {sections['catalog']}
         ```
         
+        Each job already carries a precomputed match_score (1-100) from skill overlap, experience fit, work mode and location.
+        Keep that score for the jobs you pick; your role is to choose among them and explain the match.
+        
         For each recommendation, explain why it's a good match for the candidate's skills, experience, and career goals.
         Consider factors such as skill match, experience level, work type preferences, and alignment with career goals.
         
@@ -208,28 +195,31 @@ def create_job_recommendation_task(job_recommender_agent, candidate_analysis, jo
         1. job_title
         2. company
         3. job_url (extract from the data if available)
-        4. match_score (1-100)
+        4. match_score (the precomputed value from the job data)
         5. match_explanation (detailed reasoning)
         6. growth_opportunity (how this job could help career advancement)
         """,
         agent=job_recommender_agent,
         expected_output="A JSON with top 3 job recommendations with match explanations and URLs"
     )
+    record_prompt_usage('job_recommendation', task.description)
+    return task
 
 def create_event_recommendation_task(event_recommender_agent, candidate_analysis, events_data):
     """Create a task to recommend events with URLs"""
-    return Task(
+    sections = build_recommendation_sections('event_recommendation', candidate_analysis, events_data)
+    task = Task(
         description=f"""
         Based on the candidate profile analysis below, recommend the top 3 most valuable events from the provided event listings.
         
         Candidate Analysis:
         ```
-        {json.dumps(candidate_analysis, indent=2, cls=DateTimeEncoder)}
+        {sections['analysis']}
         ```
         
         Available Events:
         ```
-        {json.dumps(events_data, indent=2, cls=DateTimeEncoder)}
+        {sections['catalog']}
         ```
         
         For each recommendation, explain why this event would be particularly valuable for the candidate's career development.
@@ -246,21 +236,24 @@ def create_event_recommendation_task(event_recommender_agent, candidate_analysis
         agent=event_recommender_agent,
         expected_output="A JSON with top 3 event recommendations with benefit explanations and URLs"
     )
+    record_prompt_usage('event_recommendation', task.description)
+    return task
 
 def create_session_recommendation_task(session_recommender_agent, candidate_analysis, sessions_data):
     """Create a task to recommend learning sessions with URLs"""
-    return Task(
+    sections = build_recommendation_sections('session_recommendation', candidate_analysis, sessions_data)
+    task = Task(
         description=f"""
         Based on the candidate profile analysis below, recommend the top 3 most beneficial learning sessions from the provided session listings.
         
         Candidate Analysis:
         ```
-        {json.dumps(candidate_analysis, indent=2, cls=DateTimeEncoder)}
+        {sections['analysis']}
         ```
         
         Available Sessions:
         ```
-        {json.dumps(sessions_data, indent=2, cls=DateTimeEncoder)}
+        {sections['catalog']}
         ```
         
         For each recommendation, explain why this learning session would be particularly valuable for the candidate's skill development.
@@ -278,21 +271,24 @@ def create_session_recommendation_task(session_recommender_agent, candidate_anal
         agent=session_recommender_agent,
         expected_output="A JSON with top 3 session recommendations with learning outcome explanations and URLs"
     )
+    record_prompt_usage('session_recommendation', task.description)
+    return task
 
 def create_community_recommendation_task(community_recommender_agent, candidate_analysis, groups_data):
     """Create a task to recommend community groups with URLs"""
-    return Task(
+    sections = build_recommendation_sections('community_recommendation', candidate_analysis, groups_data)
+    task = Task(
         description=f"""
         Based on the candidate profile analysis below, recommend the top 3 most valuable community groups from the provided group listings.
         
         Candidate Analysis:
         ```
-        {json.dumps(candidate_analysis, indent=2, cls=DateTimeEncoder)}
+        {sections['analysis']}
         ```
         
         Available Groups:
         ```
-        {json.dumps(groups_data, indent=2, cls=DateTimeEncoder)}
+        {sections['catalog']}
         ```
         
         For each recommendation, explain why this community group would be particularly valuable for the candidate's professional growth.
@@ -309,6 +305,8 @@ def create_community_recommendation_task(community_recommender_agent, candidate_
         agent=community_recommender_agent,
         expected_output="A JSON with top 3 community group recommendations with networking value explanations and URLs"
     )
+    record_prompt_usage('community_recommendation', task.description)
+    return task
 
 def parse_json_result(crew_output):
     """Helper function to parse JSON from CrewAI output"""
@@ -327,20 +325,24 @@ def parse_json_result(crew_output):
     except json.JSONDecodeError:
         # If all else fails, return the raw text
         return {"raw_result": output_str}
-# Separate recommendation functions for HerKey.com data
 
-def get_job_recommendations(candidate_profile):
-    """Function to get only job recommendations for a candidate"""
-    # Load only job data
-    print("Loading job data...")
-    job_data = load_data('jobs')
+def analyze_candidate_profile(candidate_profile):
+    """
+    Get the parsed profile analysis for a candidate, running the analyzer crew only on a cache miss
     
-    # Create required agents
-    print("Creating profile analyzer and job recommender agents...")
-    profile_analyzer = create_profile_analyzer_agent()
-    job_recommender = create_job_recommender_agent()
+    Parameters:
+    candidate_profile (dict): User profile from the database
+    
+    Returns:
+    dict: Structured profile analysis (or {"raw_result": ...} if the output was not JSON)
+    """
+    cached_analysis = get_cached_profile_analysis(candidate_profile)
+    if cached_analysis is not None:
+        print("Using cached profile analysis")
+        return cached_analysis
     
-    # Step 1: Analyze candidate profile
+    print("Analyzing candidate profile...")
+    profile_analyzer = create_profile_analyzer_agent()
     profile_analysis_task = create_profile_analysis_task(profile_analyzer, candidate_profile)
     profile_crew = Crew(
         agents=[profile_analyzer],
@@ -348,178 +350,252 @@ def get_job_recommendations(candidate_profile):
         verbose=True,
         process=Process.sequential
     )
-    profile_analysis_result = profile_crew.kickoff()
+    profile_analysis = parse_json_result(profile_crew.kickoff())
     
-    # Parse profile analysis
-    try:
-        profile_analysis_str = str(profile_analysis_result)
-        import re
-        json_match = re.search(r'```(?:json)?\n(.*?)\n```', profile_analysis_str, re.DOTALL)
-        if json_match:
-            profile_analysis = json.loads(json_match.group(1))
-        else:
-            profile_analysis = json.loads(profile_analysis_str)
-    except json.JSONDecodeError:
+    # Unparsed output is not cached so the next request gets another chance at clean JSON
+    if "raw_result" in profile_analysis:
         print("Warning: Could not parse profile analysis as JSON. Using raw text.")
-        profile_analysis = {"raw_result": profile_analysis_str}
-    
-    # Step 2: Generate job recommendations
-    print("Generating job recommendations...")
-    job_task = create_job_recommendation_task(job_recommender, profile_analysis, job_data['jobs'])
-    job_crew = Crew(
-        agents=[job_recommender],
-        tasks=[job_task],
-        verbose=True,
-        process=Process.sequential
-    )
-    job_result = job_crew.kickoff()
-    job_recommendations = parse_json_result(job_result)
+    else:
+        store_profile_analysis(candidate_profile, profile_analysis)
     
-    return job_recommendations.get("recommendations", [])
+    return profile_analysis
 
-def get_event_recommendations(candidate_profile):
-    """Function to get only event recommendations for a candidate"""
-    # Load only event data
-    print("Loading event data...")
-    event_data = load_data('events')
+# Separate recommendation functions for HerKey.com data
+
+# Recommendation categories and the catalog, agent and task that serve each one
+RECOMMENDATION_CATEGORIES = {
+    'jobs': {
+        'data_type': 'jobs',
+        'create_agent': create_job_recommender_agent,
+        'create_task': create_job_recommendation_task
+    },
+    'events': {
+        'data_type': 'events',
+        'create_agent': create_event_recommender_agent,
+        'create_task': create_event_recommendation_task
+    },
+    'sessions': {
+        'data_type': 'sessions',
+        'create_agent': create_session_recommender_agent,
+        'create_task': create_session_recommendation_task
+    },
+    'communities': {
+        'data_type': 'groups',
+        'create_agent': create_community_recommender_agent,
+        'create_task': create_community_recommendation_task
+    }
+}
+
+# Seconds each category may take in get_all_recommendations before it is reported as timed out
+RECOMMENDATION_DEADLINES = {
+    'jobs': 60,
+    'events': 45,
+    'sessions': 45,
+    'communities': 45
+}
+
+# Number of top pre-scored jobs the job recommender LLM chooses from and explains
+JOB_EXPLANATION_COUNT = 5
+
+# Shared, bounded pool for recommender crews so concurrent users cannot spawn unbounded threads;
+# a crew that misses its deadline cannot be stopped, so it is abandoned and gives its slot back
+_recommendation_executor = AbandonableExecutor(max_workers=4, thread_name_prefix="herkey-recommender")
+
+def recommend_for_category(category, candidate_profile, profile_analysis):
+    """
+    Run the recommender crew for one category using an existing profile analysis
     
-    # Create required agents
-    print("Creating profile analyzer and event recommender agents...")
-    profile_analyzer = create_profile_analyzer_agent()
-    event_recommender = create_event_recommender_agent()
+    Parameters:
+    category (str): One of RECOMMENDATION_CATEGORIES ('jobs', 'events', 'sessions', 'communities')
+    candidate_profile (dict): User profile from the database
+    profile_analysis (dict): Output of analyze_candidate_profile
     
-    # Step 1: Analyze candidate profile
-    profile_analysis_task = create_profile_analysis_task(profile_analyzer, candidate_profile)
-    profile_crew = Crew(
-        agents=[profile_analyzer],
-        tasks=[profile_analysis_task],
-        verbose=True,
-        process=Process.sequential
-    )
-    profile_analysis_result = profile_crew.kickoff()
+    Returns:
+    list: Recommendation dicts produced by the LLM
+    """
+    if category not in RECOMMENDATION_CATEGORIES:
+        raise ValueError(f"Invalid category: {category}. Must be one of {list(RECOMMENDATION_CATEGORIES.keys())}")
     
-    # Parse profile analysis
-    try:
-        profile_analysis_str = str(profile_analysis_result)
-        import re
-        json_match = re.search(r'```(?:json)?\n(.*?)\n```', profile_analysis_str, re.DOTALL)
-        if json_match:
-            profile_analysis = json.loads(json_match.group(1))
-        else:
-            profile_analysis = json.loads(profile_analysis_str)
-    except json.JSONDecodeError:
-        print("Warning: Could not parse profile analysis as JSON. Using raw text.")
-        profile_analysis = {"raw_result": profile_analysis_str}
-    
-    # Step 2: Generate event recommendations
-    print("Generating event recommendations...")
-    event_task = create_event_recommendation_task(event_recommender, profile_analysis, event_data['events'])
-    event_crew = Crew(
-        agents=[event_recommender],
-        tasks=[event_task],
+    config = RECOMMENDATION_CATEGORIES[category]
+    data_type = config['data_type']
+    
+    # Load only the catalog for this category
+    snapshot = catalog_store.get(data_type)
+    catalog = snapshot.records
+    
+    # Narrow the catalog to the best candidates before prompting; jobs are ranked by the deterministic scorer
+    if data_type == 'jobs':
+        scored_jobs = get_scoring_engine(catalog).top_jobs(candidate_profile, JOB_EXPLANATION_COUNT)
+        candidates = [{**scored['job'], 'match_score': int(round(scored['match_score']))} for scored in scored_jobs]
+    else:
+        candidates = select_top_candidates(data_type, catalog, candidate_profile, profile_analysis)
+    print(f"Selected {len(candidates)} of {len(catalog)} {data_type} for the recommender")
+    
+    # Generate recommendations
+    print(f"Generating {category} recommendations...")
+    recommender = config['create_agent']()
+    task = config['create_task'](recommender, profile_analysis, candidates)
+    crew = Crew(
+        agents=[recommender],
+        tasks=[task],
         verbose=True,
         process=Process.sequential
     )
-    event_result = event_crew.kickoff()
-    event_recommendations = parse_json_result(event_result)
+    try:
+        result = crew.kickoff()
+    except Exception as e:
+        if data_type != 'jobs':
+            raise
+        print(f"Job recommender unavailable ({e}), using offline job scores")
+        return [explain_job_match(scored, candidate_profile) for scored in scored_jobs[:3]]
+    recommendations = parse_json_result(result).get("recommendations", [])
+    
+    # Degraded or empty results are not cached so the next request retries the crew
+    if recommendations:
+        store_recommendations(candidate_profile, category, snapshot.digest, recommendations)
+    
+    return recommendations
+
+def get_cached_category_recommendations(category, candidate_profile):
+    """Return cached recommendations for the current profile and catalog versions, or None"""
+    data_type = RECOMMENDATION_CATEGORIES[category]['data_type']
+    cached = get_cached_recommendations(candidate_profile, category, get_catalog_version(data_type))
+    if cached is not None:
+        print(f"Using cached {category} recommendations")
+    return cached
+
+def get_offline_job_recommendations(candidate_profile, top_n=3):
+    """
+    Deterministic job recommendations from the pre-scorer alone, without any LLM call
     
-    return event_recommendations.get("recommendations", [])
+    Parameters:
+    candidate_profile (dict): User profile from the database
+    top_n (int): Number of jobs to return
+    
+    Returns:
+    list: Recommendation dicts in the same shape the job recommender LLM produces
+    """
+    jobs = load_data('jobs')['jobs']
+    scored_jobs = get_scoring_engine(jobs).top_jobs(candidate_profile, top_n)
+    return [explain_job_match(scored, candidate_profile) for scored in scored_jobs]
 
-def get_session_recommendations(candidate_profile):
-    """Function to get only session recommendations for a candidate"""
-    # Load only session data
-    print("Loading session data...")
-    session_data = load_data('sessions')
+def get_job_recommendations(candidate_profile, offline=False):
+    """
+    Function to get only job recommendations for a candidate
     
-    # Create required agents
-    print("Creating profile analyzer and session recommender agents...")
-    profile_analyzer = create_profile_analyzer_agent()
-    session_recommender = create_session_recommender_agent()
+    Parameters:
+    candidate_profile (dict): User profile from the database
+    offline (bool): Skip the LLM entirely and return deterministic scores and explanations
+    """
+    if offline:
+        return get_offline_job_recommendations(candidate_profile)
     
-    # Step 1: Analyze candidate profile
-    profile_analysis_task = create_profile_analysis_task(profile_analyzer, candidate_profile)
-    profile_crew = Crew(
-        agents=[profile_analyzer],
-        tasks=[profile_analysis_task],
-        verbose=True,
-        process=Process.sequential
-    )
-    profile_analysis_result = profile_crew.kickoff()
+    cached = get_cached_category_recommendations('jobs', candidate_profile)
+    if cached is not None:
+        return cached
     
-    # Parse profile analysis
     try:
-        profile_analysis_str = str(profile_analysis_result)
-        import re
-        json_match = re.search(r'```(?:json)?\n(.*?)\n```', profile_analysis_str, re.DOTALL)
-        if json_match:
-            profile_analysis = json.loads(json_match.group(1))
-        else:
-            profile_analysis = json.loads(profile_analysis_str)
-    except json.JSONDecodeError:
-        print("Warning: Could not parse profile analysis as JSON. Using raw text.")
-        profile_analysis = {"raw_result": profile_analysis_str}
-    
-    # Step 2: Generate session recommendations
-    print("Generating session recommendations...")
-    session_task = create_session_recommendation_task(session_recommender, profile_analysis, session_data['sessions'])
-    session_crew = Crew(
-        agents=[session_recommender],
-        tasks=[session_task],
-        verbose=True,
-        process=Process.sequential
-    )
-    session_result = session_crew.kickoff()
-    session_recommendations = parse_json_result(session_result)
+        profile_analysis = analyze_candidate_profile(candidate_profile)
+    except Exception as e:
+        print(f"Profile analysis unavailable ({e}), using offline job scores")
+        return get_offline_job_recommendations(candidate_profile)
+    return recommend_for_category('jobs', candidate_profile, profile_analysis)
+
+def get_event_recommendations(candidate_profile):
+    """Function to get only event recommendations for a candidate"""
+    cached = get_cached_category_recommendations('events', candidate_profile)
+    if cached is not None:
+        return cached
     
-    return session_recommendations.get("recommendations", [])
+    profile_analysis = analyze_candidate_profile(candidate_profile)
+    return recommend_for_category('events', candidate_profile, profile_analysis)
+
+def get_session_recommendations(candidate_profile):
+    """Function to get only session recommendations for a candidate"""
+    cached = get_cached_category_recommendations('sessions', candidate_profile)
+    if cached is not None:
+        return cached
+    
+    profile_analysis = analyze_candidate_profile(candidate_profile)
+    return recommend_for_category('sessions', candidate_profile, profile_analysis)
 
 def get_community_recommendations(candidate_profile):
     """Function to get only community recommendations for a candidate"""
-    # Load only community/groups data
-    print("Loading community data...")
-    group_data = load_data('groups')
+    cached = get_cached_category_recommendations('communities', candidate_profile)
+    if cached is not None:
+        return cached
     
-    # Create required agents
-    print("Creating profile analyzer and community recommender agents...")
-    profile_analyzer = create_profile_analyzer_agent()
-    community_recommender = create_community_recommender_agent()
+    profile_analysis = analyze_candidate_profile(candidate_profile)
+    return recommend_for_category('communities', candidate_profile, profile_analysis)
+
+def get_all_recommendations(candidate_profile, categories=None, deadlines=None):
+    """
+    Get recommendations for several categories at once
     
-    # Step 1: Analyze candidate profile
-    profile_analysis_task = create_profile_analysis_task(profile_analyzer, candidate_profile)
-    profile_crew = Crew(
-        agents=[profile_analyzer],
-        tasks=[profile_analysis_task],
-        verbose=True,
-        process=Process.sequential
-    )
-    profile_analysis_result = profile_crew.kickoff()
+    The profile is analyzed once and the per-category crews run concurrently on a
+    bounded thread pool. A category that misses its deadline is reported in
+    'timed_out' with an empty list instead of holding back the others; its crew
+    keeps running in the background but no longer takes up a pool slot.
     
-    # Parse profile analysis
-    try:
-        profile_analysis_str = str(profile_analysis_result)
-        import re
-        json_match = re.search(r'```(?:json)?\n(.*?)\n```', profile_analysis_str, re.DOTALL)
-        if json_match:
-            profile_analysis = json.loads(json_match.group(1))
-        else:
-            profile_analysis = json.loads(profile_analysis_str)
-    except json.JSONDecodeError:
-        print("Warning: Could not parse profile analysis as JSON. Using raw text.")
-        profile_analysis = {"raw_result": profile_analysis_str}
-    
-    # Step 2: Generate community recommendations
-    print("Generating community recommendations...")
-    community_task = create_community_recommendation_task(community_recommender, profile_analysis, group_data['groups'])
-    community_crew = Crew(
-        agents=[community_recommender],
-        tasks=[community_task],
-        verbose=True,
-        process=Process.sequential
-    )
-    community_result = community_crew.kickoff()
-    community_recommendations = parse_json_result(community_result)
+    Parameters:
+    candidate_profile (dict): User profile from the database
+    categories (list, optional): Categories to fetch, defaults to all of RECOMMENDATION_CATEGORIES
+    deadlines (dict, optional): Per-category deadline overrides in seconds
     
-    return community_recommendations.get("recommendations", [])
+    Returns:
+    dict: {"status": "success" | "partial", "recommendations": {category: list},
+           "timed_out": [categories], "failed": [categories]}
+    """
+    categories = list(categories or RECOMMENDATION_CATEGORIES.keys())
+    invalid = [category for category in categories if category not in RECOMMENDATION_CATEGORIES]
+    if invalid:
+        raise ValueError(f"Invalid categories: {invalid}. Must be among {list(RECOMMENDATION_CATEGORIES.keys())}")
+    
+    category_deadlines = {**RECOMMENDATION_DEADLINES, **(deadlines or {})}
+    
+    recommendations = {}
+    timed_out = []
+    failed = []
+    
+    # Serve what we can from the cache; only the misses need a profile analysis and crews
+    for category in categories:
+        cached = get_cached_category_recommendations(category, candidate_profile)
+        if cached is not None:
+            recommendations[category] = cached
+    pending = [category for category in categories if category not in recommendations]
+    
+    if pending:
+        # Analyze once and share the result with every category
+        profile_analysis = analyze_candidate_profile(candidate_profile)
+    
+    started_at = time.monotonic()
+    futures = {
+        category: _recommendation_executor.submit(recommend_for_category, category, candidate_profile, profile_analysis)
+        for category in pending
+    }
+    
+    # Deadlines are measured from submission, so waiting in any order honours each one
+    for category in sorted(pending, key=lambda c: category_deadlines[c]):
+        remaining = started_at + category_deadlines[category] - time.monotonic()
+        try:
+            recommendations[category] = futures[category].result(timeout=max(remaining, 0))
+        except FuturesTimeoutError:
+            print(f"{category} recommendations missed their {category_deadlines[category]}s deadline")
+            _recommendation_executor.abandon(futures[category])
+            # Jobs degrade to the offline scorer rather than an empty list
+            recommendations[category] = get_offline_job_recommendations(candidate_profile) if category == 'jobs' else []
+            timed_out.append(category)
+        except Exception as e:
+            print(f"Error generating {category} recommendations: {e}")
+            recommendations[category] = []
+            failed.append(category)
+    
+    return {
+        "status": "partial" if timed_out or failed else "success",
+        "recommendations": recommendations,
+        "timed_out": timed_out,
+        "failed": failed
+    }
 
 # Modified example usage
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+## herkey_retrieval.py -- local BM25 retrieval over the HerKey catalog so recommendation prompts only carry top-K candidates
+import math
+import re
+import threading
+from collections import Counter
+
+# Number of catalog items handed to the recommender LLM for each category
+HERKEY_TOP_K = {
+    'jobs': 15,
+    'events': 5,
+    'sessions': 10,
+    'groups': 12
+}
+
+# Fields indexed for each category and their weight (a field with weight 3 counts three times)
+HERKEY_INDEX_FIELDS = {
+    'jobs': {'title': 3, 'skills_list': 3, 'work_mode': 1, 'location': 1, 'company': 1},
+    'events': {'title': 3, 'categories': 2, 'event_type': 1, 'location': 1},
+    'sessions': {'title': 3, 'host_headline': 2, 'host': 1},
+    'groups': {'name': 3, 'category': 1, 'type': 1}
+}
+
+# Profile work preferences are phrased differently from catalog work modes
+WORK_MODE_SYNONYMS = {
+    'remote': ['remote', 'online'],
+    'flexible': ['remote', 'hybrid', 'online'],
+    'hybrid': ['hybrid'],
+    'office': ['office', 'offline'],
+    'onsite': ['office', 'offline']
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'i', 'in', 'is', 'it',
+    'of', 'on', 'or', 'the', 'to', 'want', 'with', 'yes', 'no', 'none', 'my', 'me', 'ft'
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text):
+    """Lowercase and split text into index tokens, dropping stopwords"""
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 index over a list of tokenized documents"""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(documents)
+        self.doc_lengths = [len(doc) for doc in documents]
+        self.avg_doc_length = (sum(self.doc_lengths) / self.doc_count) if self.doc_count else 0.0
+
+        # Inverted index: term -> list of (doc position, term frequency)
+        self.postings = {}
+        for position, doc in enumerate(documents):
+            for term, freq in Counter(doc).items():
+                self.postings.setdefault(term, []).append((position, freq))
+
+        self.idf = {
+            term: math.log(1 + (self.doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def scores(self, query_tokens):
+        """Score every document against the query tokens"""
+        scores = [0.0] * self.doc_count
+        if not self.avg_doc_length:
+            return scores
+
+        for term, query_freq in Counter(query_tokens).items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for position, freq in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / self.avg_doc_length)
+                scores[position] += query_freq * idf * freq * (self.k1 + 1) / (freq + norm)
+        return scores
+
+
+def _field_tokens(record, field):
+    value = record.get(field)
+    if isinstance(value, (list, tuple)):
+        return [token for item in value for token in tokenize(item)]
+    return tokenize(value)
+
+
+def build_document(record, fields):
+    """Turn a catalog record into a weighted token list"""
+    tokens = []
+    for field, weight in fields.items():
+        tokens.extend(_field_tokens(record, field) * weight)
+    return tokens
+
+
+def build_index(category, records):
+    """Build a BM25 index for one catalog category"""
+    if category not in HERKEY_INDEX_FIELDS:
+        raise ValueError(f"Invalid category: {category}. Must be one of {list(HERKEY_INDEX_FIELDS.keys())}")
+    fields = HERKEY_INDEX_FIELDS[category]
+    return BM25Index([build_document(record, fields) for record in records])
+
+
+# category -> (records the index was built from, index)
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def get_index(category, records):
+    """Return the cached index for a category, rebuilding it if the records changed"""
+    with _index_lock:
+        cached = _index_cache.get(category)
+        if cached and cached[0] is records:
+            return cached[1]
+
+    index = build_index(category, records)
+    with _index_lock:
+        _index_cache[category] = (records, index)
+    return index
+
+
+def _flatten_strings(value):
+    """Collect every string leaf of a nested dict/list structure"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in _flatten_strings(item)]
+    if isinstance(value, (list, tuple)):
+        return [text for item in value for text in _flatten_strings(item)]
+    return []
+
+
+def build_candidate_query(candidate_profile, profile_analysis=None):
+    """
+    Build the retrieval query for a candidate
+
+    Parameters:
+    candidate_profile (dict): Raw user profile from the database
+    profile_analysis (dict, optional): Output of the profile analyzer crew
+
+    Returns:
+    list: Query tokens
+    """
+    profile = candidate_profile or {}
+    job_preferences = profile.get('job_preferences') or {}
+    location = profile.get('location') or {}
+    last_job = profile.get('last_job') or {}
+    community = profile.get('community') or {}
+
+    # Skills and target roles are the strongest signals, so they count twice
+    query = []
+    for skill in profile.get('skills') or []:
+        query.extend(tokenize(skill) * 2)
+    for role in job_preferences.get('roles') or []:
+        query.extend(tokenize(role) * 2)
+    query.extend(tokenize(last_job.get('title')))
+
+    for text in (
+        job_preferences.get('short_term_goal'),
+        job_preferences.get('long_term_goal'),
+        profile.get('current_status'),
+        community.get('mentorship_type'),
+        location.get('city')
+    ):
+        query.extend(tokenize(text))
+
+    for preference in (job_preferences.get('type'), location.get('work_mode')):
+        for token in tokenize(preference):
+            query.extend(WORK_MODE_SYNONYMS.get(token, []))
+
+    if profile_analysis:
+        for text in _flatten_strings(profile_analysis):
+            query.extend(tokenize(text))
+
+    return query
+
+
+def select_top_candidates(category, records, candidate_profile, profile_analysis=None, k=None):
+    """
+    Pre-filter a catalog to the top-K items for a candidate before it is sent to the LLM
+
+    Parameters:
+    category (str): Catalog category ('jobs', 'events', 'sessions', 'groups')
+    records (list): Catalog records for the category
+    candidate_profile (dict): Raw user profile
+    profile_analysis (dict, optional): Output of the profile analyzer crew
+    k (int, optional): Number of items to keep, defaults to HERKEY_TOP_K[category]
+
+    Returns:
+    list: At most k records, best match first
+    """
+    k = k or HERKEY_TOP_K.get(category, 10)
+    if len(records) <= k:
+        return list(records)
+
+    query = build_candidate_query(candidate_profile, profile_analysis)
+    scores = get_index(category, records).scores(query)
+
+    # Rank matching records first; pad with the rest in catalog order so the LLM still has k options
+    ranked = sorted(range(len(records)), key=lambda position: (-scores[position], position))
+    return [records[position] for position in ranked[:k]]
@@ -0,0 +1,285 @@
+## job_scorer.py -- vectorized deterministic scoring of HerKey jobs against a candidate profile
+import re
+import threading
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Relative weight of each signal in the final 0-100 score
+SCORE_WEIGHTS = {
+    'skills': 0.6,
+    'experience': 0.25,
+    'work_mode': 0.1,
+    'location': 0.05
+}
+
+# Catalog work modes, in column order of WORK_MODE_FIT
+JOB_WORK_MODES = ['remote', 'hybrid', 'in-office', 'unknown']
+
+# How well each catalog work mode suits a candidate's preferred work mode
+WORK_MODE_FIT = {
+    'remote': [1.0, 0.5, 0.0, 0.5],
+    'hybrid': [0.8, 1.0, 0.5, 0.5],
+    'in-office': [0.6, 0.8, 1.0, 0.5],
+    'flexible': [1.0, 1.0, 1.0, 0.8]
+}
+
+# Catalog locations that are open to candidates anywhere
+ANY_LOCATION = {'any', 'india', 'remote', ''}
+
+# Score given to skills or experience the job listing does not specify; kept below a real
+# partial match (e.g. 1 of 4 skills) so listings with missing data do not outrank it
+MISSING_DATA_SCORE = 0.2
+
+SKILL_TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+def normalize_skill(skill):
+    """Normalize a skill label so 'ReactJS ', 'reactjs' and 'Reactjs' compare equal"""
+    return " ".join(SKILL_TOKEN_PATTERN.findall(str(skill).lower()))
+
+
+def normalize_work_mode(work_mode):
+    """Map profile and catalog work-mode phrasings onto WORK_MODE_FIT keys"""
+    value = str(work_mode or '').lower()
+    if 'remote' in value or 'home' in value:
+        return 'remote'
+    if 'hybrid' in value:
+        return 'hybrid'
+    if 'office' in value or 'onsite' in value or 'on-site' in value:
+        return 'in-office'
+    return 'flexible'
+
+
+def get_experience_years(candidate_profile):
+    """Read experience_years from a profile, handling MongoDB extended JSON and strings"""
+    value = (candidate_profile or {}).get('experience_years', 0)
+    if isinstance(value, dict):
+        value = value.get('$numberInt', value.get('$numberDouble', 0))
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class JobScoringEngine:
+    """Holds the job catalog as arrays and scores every job against a profile in one pass"""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+
+        # Skill vocabulary and the jobs x skills multi-hot matrix
+        self.skill_index = {}
+        rows, cols = [], []
+        self.job_skills = []
+        for row, job in enumerate(jobs):
+            skills = {normalize_skill(skill) for skill in job.get('skills_list') or []} - {''}
+            self.job_skills.append(skills)
+            for skill in skills:
+                rows.append(row)
+                cols.append(self.skill_index.setdefault(skill, len(self.skill_index)))
+        self.skill_matrix = csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(jobs), max(len(self.skill_index), 1))
+        )
+        self.skill_counts = np.array([len(skills) for skills in self.job_skills], dtype=np.float32)
+
+        # Title terms catch skills that only appear in the job title (e.g. 'Angular Developer')
+        self.term_index = {}
+        rows, cols = [], []
+        for row, job in enumerate(jobs):
+            for term in set(SKILL_TOKEN_PATTERN.findall(str(job.get('title', '')).lower())):
+                rows.append(row)
+                cols.append(self.term_index.setdefault(term, len(self.term_index)))
+        self.title_matrix = csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(jobs), max(len(self.term_index), 1))
+        )
+
+        # Experience band; NaN marks listings that do not state one
+        self.min_experience = np.array(
+            [job.get('min_experience') if job.get('min_experience') is not None else np.nan for job in jobs],
+            dtype=np.float32
+        )
+        self.max_experience = np.array(
+            [job.get('max_experience') if job.get('max_experience') is not None else np.nan for job in jobs],
+            dtype=np.float32
+        )
+
+        # Work mode as a column index into WORK_MODE_FIT rows
+        self.work_mode_codes = np.array(
+            [JOB_WORK_MODES.index(job.get('work_mode')) if job.get('work_mode') in JOB_WORK_MODES else JOB_WORK_MODES.index('unknown')
+             for job in jobs],
+            dtype=np.int64
+        )
+
+        self.locations = np.array([str(job.get('location') or '').strip().lower() for job in jobs])
+        self.open_location = np.isin(self.locations, list(ANY_LOCATION))
+
+    def _candidate_vector(self, index, terms):
+        vector = np.zeros(max(len(index), 1), dtype=np.float32)
+        for term in terms:
+            position = index.get(term)
+            if position is not None:
+                vector[position] = 1.0
+        return vector
+
+    def score_components(self, candidate_profile):
+        """
+        Score every job against a profile
+
+        Parameters:
+        candidate_profile (dict): User profile from the database
+
+        Returns:
+        dict: Arrays (one value per job, 0-1) for 'skills', 'experience', 'work_mode', 'location'
+        """
+        profile = candidate_profile or {}
+        job_preferences = profile.get('job_preferences') or {}
+        location = profile.get('location') or {}
+        last_job = profile.get('last_job') or {}
+
+        # Skill overlap as a sparse multi-hot dot product
+        candidate_skills = {normalize_skill(skill) for skill in profile.get('skills') or []} - {''}
+        overlap = self.skill_matrix @ self._candidate_vector(self.skill_index, candidate_skills)
+        skill_fraction = np.divide(overlap, self.skill_counts, out=np.full_like(overlap, MISSING_DATA_SCORE), where=self.skill_counts > 0)
+
+        candidate_terms = set()
+        for text in list(candidate_skills) + list(job_preferences.get('roles') or []) + [last_job.get('title', '')]:
+            candidate_terms.update(SKILL_TOKEN_PATTERN.findall(str(text).lower()))
+        title_hits = self.title_matrix @ self._candidate_vector(self.term_index, candidate_terms)
+        skills = 0.7 * skill_fraction + 0.3 * np.minimum(title_hits / 2.0, 1.0)
+
+        # Experience band fit: 1 inside the band, decaying with distance (over-qualification decays slower)
+        years = get_experience_years(profile)
+        shortfall = np.nan_to_num(self.min_experience - years, nan=0.0).clip(min=0)
+        excess = np.nan_to_num(years - self.max_experience, nan=0.0).clip(min=0)
+        experience = np.exp(-(shortfall + 0.5 * excess) / 2.0)
+        experience[np.isnan(self.min_experience) & np.isnan(self.max_experience)] = MISSING_DATA_SCORE
+
+        # Work mode preference lookup
+        preferred_mode = normalize_work_mode(location.get('work_mode') or job_preferences.get('type'))
+        work_mode = np.asarray(WORK_MODE_FIT[preferred_mode], dtype=np.float32)[self.work_mode_codes]
+
+        # Location: open or remote listings and same-city listings fit; relocation softens the rest
+        city = str(location.get('city') or '').strip().lower()
+        location_fit = np.full(len(self.jobs), 0.7 if location.get('relocation') else 0.2, dtype=np.float32)
+        if city:
+            location_fit[self.locations == city] = 1.0
+        location_fit[self.open_location | (self.work_mode_codes == JOB_WORK_MODES.index('remote'))] = 1.0
+
+        return {
+            'skills': skills,
+            'experience': experience,
+            'work_mode': work_mode,
+            'location': location_fit
+        }
+
+    def score(self, candidate_profile):
+        """Return a 0-100 match score for every job"""
+        components = self.score_components(candidate_profile)
+        total = sum(SCORE_WEIGHTS[name] * values for name, values in components.items())
+        return np.round(100 * total, 1)
+
+    def top_jobs(self, candidate_profile, k=5):
+        """
+        Rank the catalog for a profile
+
+        Parameters:
+        candidate_profile (dict): User profile from the database
+        k (int): Number of jobs to return
+
+        Returns:
+        list: Dicts with 'job', 'match_score' and 'matched_skills', best match first
+        """
+        if not self.jobs:
+            return []
+
+        scores = self.score(candidate_profile)
+        k = min(k, len(self.jobs))
+        # argpartition finds the top k without sorting the whole catalog; only those k get sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+
+        candidate_skills = {normalize_skill(skill) for skill in (candidate_profile or {}).get('skills') or []}
+        return [
+            {
+                'job': self.jobs[position],
+                'match_score': round(float(scores[position]), 1),
+                'matched_skills': sorted(self.job_skills[position] & candidate_skills)
+            }
+            for position in top
+        ]
+
+
+# (jobs list the engine was built from, engine)
+_engine_cache = {}
+_engine_lock = threading.Lock()
+
+
+def get_scoring_engine(jobs):
+    """Return the cached scoring engine for this jobs list, rebuilding it if the list changed"""
+    with _engine_lock:
+        cached = _engine_cache.get('jobs')
+        if cached and cached[0] is jobs:
+            return cached[1]
+
+    engine = JobScoringEngine(jobs)
+    with _engine_lock:
+        _engine_cache['jobs'] = (jobs, engine)
+    return engine
+
+
+def _years(value):
+    """'1 year', '2.5 years'"""
+    return f"{value:g} year" if value == 1 else f"{value:g} years"
+
+
+def explain_job_match(scored_job, candidate_profile):
+    """
+    Build the offline recommendation entry for a scored job
+
+    Parameters:
+    scored_job (dict): One entry from JobScoringEngine.top_jobs
+    candidate_profile (dict): User profile from the database
+
+    Returns:
+    dict: Recommendation in the same shape the job recommender LLM produces
+    """
+    job = scored_job['job']
+    years = get_experience_years(candidate_profile)
+    sentences = []
+
+    if scored_job['matched_skills']:
+        sentences.append(f"It uses your skills in {', '.join(skill.title() for skill in scored_job['matched_skills'])}.")
+
+    min_exp, max_exp = job.get('min_experience'), job.get('max_experience')
+    if min_exp is not None and max_exp is not None:
+        band = f"{min_exp:g}-{max_exp:g} year"
+        if min_exp <= years <= max_exp:
+            sentences.append(f"Your {_years(years)} of experience fits its {band} range.")
+        elif years < min_exp:
+            sentences.append(f"It asks for {min_exp:g}-{max_exp:g} years of experience, a stretch from your {_years(years)}.")
+        else:
+            sentences.append(f"Your {_years(years)} of experience exceeds its {band} range, so you would bring extra depth.")
+
+    work_mode = job.get('work_mode')
+    if work_mode and work_mode != 'unknown':
+        location = str(job.get('location') or '').strip()
+        if location.lower() in ANY_LOCATION:
+            sentences.append(f"It is a {work_mode} role.")
+        else:
+            sentences.append(f"It is a {work_mode} role based in {location}.")
+
+    if sentences and sentences[0].startswith("It "):
+        sentences[0] = "This role " + sentences[0][len("It "):]
+    explanation = " ".join(sentences) if sentences else "This role is a close overall match for your profile."
+
+    return {
+        "job_title": job.get('title'),
+        "company": job.get('company'),
+        "job_url": job.get('job_url'),
+        "match_score": int(round(scored_job['match_score'])),
+        "match_explanation": explanation,
+        "growth_opportunity": f"Builds hands-on experience as {job.get('title')} at {job.get('company')}."
+    }
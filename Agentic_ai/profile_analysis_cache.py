@@ -0,0 +1,98 @@
+## profile_analysis_cache.py -- caches parsed profile analyses in memory and MongoDB, keyed by a content hash of the profile
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from utils.input import DateTimeEncoder
+from backend.database import profile_analyses_collection
+
+# Maximum number of analyses kept in process memory (least recently used are evicted first)
+MAX_MEMORY_ENTRIES = 256
+
+# Fields that can change without the profile content changing
+VOLATILE_PROFILE_FIELDS = {"_id", "id", "updated_at"}
+
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def compute_profile_hash(candidate_profile):
+    """
+    Compute a stable content hash for a profile
+
+    Parameters:
+    candidate_profile (dict): User profile
+
+    Returns:
+    str: SHA-256 hex digest of the profile content
+    """
+    content = {k: v for k, v in (candidate_profile or {}).items() if k not in VOLATILE_PROFILE_FIELDS}
+    serialized = json.dumps(content, sort_keys=True, cls=DateTimeEncoder, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def _remember(profile_hash, analysis):
+    with _memory_lock:
+        _memory_cache[profile_hash] = analysis
+        _memory_cache.move_to_end(profile_hash)
+        while len(_memory_cache) > MAX_MEMORY_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def get_cached_profile_analysis(candidate_profile):
+    """
+    Look up a stored analysis for this exact profile content
+
+    Parameters:
+    candidate_profile (dict): User profile
+
+    Returns:
+    dict or None: The cached analysis, or None on a miss
+    """
+    profile_hash = compute_profile_hash(candidate_profile)
+
+    with _memory_lock:
+        if profile_hash in _memory_cache:
+            _memory_cache.move_to_end(profile_hash)
+            return _memory_cache[profile_hash]
+
+    try:
+        doc = profile_analyses_collection.find_one({"profile_hash": profile_hash}, {"analysis": 1})
+    except Exception as e:
+        print(f"Error reading cached profile analysis: {e}")
+        return None
+
+    if not doc:
+        return None
+
+    _remember(profile_hash, doc["analysis"])
+    return doc["analysis"]
+
+
+def store_profile_analysis(candidate_profile, analysis):
+    """
+    Store a parsed analysis for this profile content
+
+    Parameters:
+    candidate_profile (dict): User profile the analysis was produced from
+    analysis (dict): Parsed profile analysis
+    """
+    profile_hash = compute_profile_hash(candidate_profile)
+    _remember(profile_hash, analysis)
+
+    try:
+        profile_analyses_collection.update_one(
+            {"profile_hash": profile_hash},
+            {
+                "$set": {
+                    "user_id": (candidate_profile or {}).get("user_id"),
+                    "analysis": analysis,
+                    "created_at": datetime.now(timezone.utc)
+                }
+            },
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Error saving profile analysis: {e}")
@@ -0,0 +1,132 @@
+## query_classifier_benchmark.py -- offline accuracy/latency benchmark of the local query classifier against LLM labels
+#
+# Usage (from the repository root):
+#   python -m Agentic_ai.query_classifier_benchmark                          # cross-validated accuracy and latency
+#   python -m Agentic_ai.query_classifier_benchmark --llm-labels labels.json # agreement with saved LLM labels
+#   python -m Agentic_ai.query_classifier_benchmark --collect-llm-labels labels.json  # label the set with the LLM
+import argparse
+import json
+import statistics
+import time
+
+from sklearn.metrics import classification_report
+from sklearn.model_selection import StratifiedKFold
+
+from Agentic_ai.query_classifier import (
+    CONFIDENCE_THRESHOLD,
+    SAFETY_CONFIDENCE_THRESHOLD,
+    load_labelled_queries,
+    needs_llm_confirmation,
+    predict_query_category,
+    train_query_classifier
+)
+
+
+def cross_validate(examples, folds=5):
+    """Predict every example with a model that never saw it; returns (predictions, confidences, latencies_ms)"""
+    queries = [example["query"] for example in examples]
+    labels = [example["label"] for example in examples]
+    predictions = [None] * len(examples)
+    confidences = [0.0] * len(examples)
+    latencies = []
+
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    for train_positions, test_positions in splitter.split(queries, labels):
+        classifier = train_query_classifier([examples[position] for position in train_positions])
+        for position in test_positions:
+            started_at = time.perf_counter()
+            predictions[position], confidences[position] = predict_query_category(queries[position], classifier)
+            latencies.append((time.perf_counter() - started_at) * 1000)
+
+    return predictions, confidences, latencies
+
+
+def answered_locally(predictions, confidences, threshold, safety_threshold):
+    """Which local predictions classify_query would accept without the LLM"""
+    return [not needs_llm_confirmation(p, c, threshold, safety_threshold) for p, c in zip(predictions, confidences)]
+
+
+def report(title, expected, predicted, local):
+    """Print overall accuracy and how the confidence thresholds split local and LLM traffic"""
+    correct = [e == p for e, p in zip(expected, predicted)]
+    local_correct = [ok for ok, keep in zip(correct, local) if keep]
+
+    print(f"\n=== {title} ===")
+    print(f"Accuracy: {sum(correct) / len(correct):.1%} on {len(correct)} queries")
+    print(f"Answered locally by the model: {sum(local) / len(local):.1%}")
+    if local_correct:
+        print(f"Accuracy on those queries: {sum(local_correct) / len(local_correct):.1%}")
+    print(classification_report(expected, predicted, zero_division=0))
+
+
+def collect_llm_labels(examples, output_path):
+    """Label every example with the production LLM classifier and save the labels with their latency"""
+    from Agentic_ai.carrer_guide import classify_query_with_llm
+    from Agentic_ai.query_classifier import normalize_category
+
+    labelled = []
+    for example in examples:
+        started_at = time.perf_counter()
+        llm_label = normalize_category(classify_query_with_llm(example["query"]))
+        labelled.append({
+            "query": example["query"],
+            "llm_label": llm_label,
+            "llm_latency_ms": (time.perf_counter() - started_at) * 1000
+        })
+        print(f"{llm_label:<24} {example['query']}")
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(labelled, f, indent=2, ensure_ascii=False)
+    print(f"Saved {len(labelled)} LLM labels to {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--safety-threshold", type=float, default=SAFETY_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--llm-labels", help="JSON file of saved LLM labels to compare against")
+    parser.add_argument("--collect-llm-labels", help="Label the bundled set with the LLM and save to this file")
+    args = parser.parse_args()
+
+    examples = load_labelled_queries()
+
+    if args.collect_llm_labels:
+        collect_llm_labels(examples, args.collect_llm_labels)
+        return
+
+    predictions, confidences, latencies = cross_validate(examples, args.folds)
+    local = answered_locally(predictions, confidences, args.threshold, args.safety_threshold)
+    report("Local classifier vs bundled labels (cross-validated)",
+           [example["label"] for example in examples], predictions, local)
+
+    ordered = sorted(latencies)
+    print(f"Local latency: median {statistics.median(ordered):.2f} ms, "
+          f"p95 {ordered[int(0.95 * (len(ordered) - 1))]:.2f} ms, max {ordered[-1]:.2f} ms")
+
+    if args.llm_labels:
+        with open(args.llm_labels, 'r', encoding='utf-8') as f:
+            llm_labels = {item["query"]: item for item in json.load(f)}
+        paired = [(position, llm_labels[example["query"]]) for position, example in enumerate(examples)
+                  if example["query"] in llm_labels]
+        if not paired:
+            print("No saved LLM labels match the bundled queries")
+            return
+
+        # "Answered locally" in both reports is the local model's routing of the same queries
+        paired_local = [local[position] for position, _ in paired]
+        report("Local classifier vs LLM labels",
+               [item["llm_label"] for _, item in paired],
+               [predictions[position] for position, _ in paired],
+               paired_local)
+        report("LLM labels vs bundled labels",
+               [examples[position]["label"] for position, _ in paired],
+               [item["llm_label"] for _, item in paired],
+               paired_local)
+        llm_latencies = [item["llm_latency_ms"] for _, item in paired if "llm_latency_ms" in item]
+        if llm_latencies:
+            print(f"LLM latency: median {statistics.median(llm_latencies):.0f} ms, max {max(llm_latencies):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+## recommendation_cache.py -- TTL + LRU cache of HerKey recommendations, backed by MongoDB so it survives restarts
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+
+from backend.database import recommendation_cache_collection
+from Agentic_ai.profile_analysis_cache import compute_profile_hash
+
+# How long a cached recommendation list stays valid
+RECOMMENDATION_CACHE_TTL_SECONDS = 6 * 60 * 60
+
+# Maximum number of entries kept in process memory (least recently used are evicted first)
+MAX_MEMORY_ENTRIES = 512
+
+# MongoDB removes documents once expires_at has passed (TTL index declared in backend/indexes.py)
+
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+
+def _count(counter):
+    with _memory_lock:
+        _stats[counter] += 1
+
+
+def build_cache_key(candidate_profile, category, catalog_version):
+    """
+    Build the cache key for a user's recommendations in one category
+
+    catalog_version is the catalog's content digest, so keys stay valid across process restarts.
+
+    Returns:
+    str or None: Key made of (user_id, profile hash, catalog version, category), or None without a user_id
+    """
+    user_id = (candidate_profile or {}).get("user_id")
+    if not user_id:
+        return None
+    return f"{user_id}:{compute_profile_hash(candidate_profile)}:{catalog_version}:{category}"
+
+
+def get_cached_recommendations(candidate_profile, category, catalog_version):
+    """
+    Look up cached recommendations for this profile version and catalog version
+
+    Parameters:
+    candidate_profile (dict): User profile
+    category (str): Recommendation category
+    catalog_version (str): Content digest of the catalog the recommendations were built from
+
+    Returns:
+    list or None: Cached recommendations, or None on a miss
+    """
+    key = build_cache_key(candidate_profile, category, catalog_version)
+    if key is None:
+        return None
+
+    now = datetime.now(timezone.utc)
+    with _memory_lock:
+        entry = _memory_cache.get(key)
+        if entry and entry[0] > now:
+            _memory_cache.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return entry[1]
+        if entry:
+            del _memory_cache[key]
+
+    try:
+        doc = recommendation_cache_collection.find_one(
+            {"_id": key, "expires_at": {"$gt": now}},
+            {"recommendations": 1, "expires_at": 1}
+        )
+    except Exception as e:
+        print(f"Error reading recommendation cache: {e}")
+        doc = None
+
+    if not doc:
+        _count("misses")
+        return None
+
+    expires_at = doc["expires_at"]
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    _remember(key, expires_at, doc["recommendations"])
+    _count("db_hits")
+    return doc["recommendations"]
+
+
+def _remember(key, expires_at, recommendations):
+    with _memory_lock:
+        _memory_cache[key] = (expires_at, recommendations)
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MAX_MEMORY_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def store_recommendations(candidate_profile, category, catalog_version, recommendations, ttl_seconds=None):
+    """
+    Cache recommendations for this profile version and catalog version
+
+    Older entries for the same user and category (previous profile or catalog
+    versions) are removed from MongoDB, since they can never be hit again.
+    """
+    key = build_cache_key(candidate_profile, category, catalog_version)
+    if key is None:
+        return
+
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=ttl_seconds or RECOMMENDATION_CACHE_TTL_SECONDS)
+    _remember(key, expires_at, recommendations)
+
+    user_id = candidate_profile["user_id"]
+    try:
+        recommendation_cache_collection.delete_many({"user_id": user_id, "category": category, "_id": {"$ne": key}})
+        recommendation_cache_collection.update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "user_id": user_id,
+                    "category": category,
+                    "catalog_version": catalog_version,
+                    "recommendations": recommendations,
+                    "created_at": now,
+                    "expires_at": expires_at
+                }
+            },
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Error saving recommendation cache: {e}")
+
+
+def get_recommendation_cache_stats():
+    """Return hit/miss counters and the overall hit rate for this process"""
+    with _memory_lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory_cache)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["memory_hits"] + stats["db_hits"]) / lookups if lookups else 0.0
+    return stats
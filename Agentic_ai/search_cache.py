@@ -0,0 +1,114 @@
+## search_cache.py -- shared Tavily search cache with normalized keys, per-type TTLs and in-flight request coalescing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+
+# Seconds a search result stays fresh, per search type (job listings go stale faster than learning resources)
+SEARCH_CACHE_TTLS = {
+    'jobs': 60 * 60,
+    'general': 12 * 60 * 60
+}
+
+DEFAULT_SEARCH_TTL = 60 * 60
+
+# Maximum cached searches (least recently used are evicted first)
+MAX_CACHED_SEARCHES = 1024
+
+# Seconds a request waits for an identical in-flight search before issuing its own
+COALESCED_WAIT_SECONDS = 20
+
+_cache = OrderedDict()
+_in_flight = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+
+def normalize_search_query(query):
+    """
+    Build the cache key for a search query
+
+    Only case and whitespace are ignored. Word order, quotes and operators change what
+    Tavily returns, so they stay part of the key; the query itself is sent unchanged.
+    """
+    return " ".join(str(query or "").lower().split())
+
+
+def _cache_key(search_type, query_key, search_kwargs):
+    params = tuple(sorted((name, tuple(value) if isinstance(value, list) else value) for name, value in search_kwargs.items()))
+    return (search_type, query_key, params)
+
+
+def cached_search(client, query, search_type="general", **search_kwargs):
+    """
+    Run a Tavily search through the shared cache
+
+    Identical searches already in flight (from any user or thread) wait for that
+    request instead of issuing their own.
+
+    Parameters:
+    client (TavilyClient): Client used on a cache miss
+    query (str): Search query, e.g. the output of personalize_tavily_query
+    search_type (str): 'jobs' or 'general'; selects the TTL
+    **search_kwargs: Passed to client.search (search_depth, max_results, include_domains, ...)
+
+    Returns:
+    dict: The Tavily response
+    """
+    key = _cache_key(search_type, normalize_search_query(query), search_kwargs)
+    now = time.monotonic()
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > now:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[1]
+
+        pending = _in_flight.get(key)
+        if pending is None:
+            pending = Future()
+            _in_flight[key] = pending
+            owner = True
+            _stats["misses"] += 1
+        else:
+            owner = False
+            _stats["coalesced"] += 1
+
+    if not owner:
+        try:
+            return pending.result(timeout=COALESCED_WAIT_SECONDS)
+        except FuturesTimeoutError:
+            print(f"⏱️ Identical search still running after {COALESCED_WAIT_SECONDS}s, searching directly")
+            with _lock:
+                _stats["coalesced"] -= 1
+                _stats["misses"] += 1
+            return client.search(query=query, **search_kwargs)
+
+    try:
+        response = client.search(query=query, **search_kwargs)
+    except Exception as e:
+        with _lock:
+            _in_flight.pop(key, None)
+        pending.set_exception(e)
+        raise
+
+    with _lock:
+        if response:
+            _cache[key] = (time.monotonic() + SEARCH_CACHE_TTLS.get(search_type, DEFAULT_SEARCH_TTL), response)
+            _cache.move_to_end(key)
+            while len(_cache) > MAX_CACHED_SEARCHES:
+                _cache.popitem(last=False)
+        _in_flight.pop(key, None)
+    pending.set_result(response)
+    return response
+
+
+def get_search_cache_stats():
+    """Return hit, miss and coalesced counts and the share of searches that skipped Tavily"""
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_cache)
+    lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+    stats["saved_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+    return stats
@@ -7,6 +7,8 @@ from bs4 import BeautifulSoup
 from Knowledge.knowledge_updater_agent import KnowledgeUpdaterCrew
 import time
 from backend.database import get_profile
+from backend.job_queue import enqueue_job
+from utils.job_progress import poll_job
 
 def display_daily_knowledge_page():
     """Display the Daily Knowledge Dose page in Streamlit"""
@@ -78,30 +80,42 @@ def display_daily_knowledge_page():
     with control_col2:
         # Refresh button
         if st.button("🔄 Refresh Feed", type="primary", use_container_width=True):
-            with st.spinner("Fetching personalized updates..."):
-                try:
-                    # Initialize knowledge updater
+            try:
+                # For production
+                if st.secrets.get("USE_MOCK_DATA", "false").lower() == "true":
                     knowledge_updater = KnowledgeUpdaterCrew(
                         serper_api_key=st.secrets["SERPER_API_KEY"],
                         gemini_api_key=st.secrets["GEMINI_API_KEY"]
                     )
-                    
-                    # For production
-                    if st.secrets.get("USE_MOCK_DATA", "false").lower() == "true":
-                        updates = knowledge_updater.get_mock_updates(user_profile)
-                    else:
-                        updates = knowledge_updater.get_knowledge_updates(user_profile)
-                    
-                    # Store updates in session state
-                    st.session_state.knowledge_updates = updates
+                    st.session_state.knowledge_updates = knowledge_updater.get_mock_updates(user_profile)
                     st.session_state.last_update_time = datetime.now().strftime("%B %d, %Y at %I:%M %p")
-                    
-                    st.success("Updates refreshed successfully!")
-                    time.sleep(1)  # Short delay for better UX
                     st.rerun()
-                    
-                except Exception as e:
-                    st.error(f"Error fetching updates: {str(e)}")
+                else:
+                    # The search-and-summarize crew runs on a job queue worker; the page polls for the result
+                    result = enqueue_job(
+                        "knowledge_updates",
+                        {"user_id": st.session_state['user_id']},
+                        priority="interactive",
+                        user_id=st.session_state['user_id'],
+                        dedupe_key=f"knowledge_updates:{st.session_state['user_id']}"
+                    )
+                    if result["status"] == "success":
+                        st.session_state.knowledge_job_id = result["job_id"]
+                    else:
+                        st.error(f"Error fetching updates: {result['message']}")
+                
+            except Exception as e:
+                st.error(f"Error fetching updates: {str(e)}")
+    
+    updates = poll_job('knowledge_job_id', "Your personalized feed")
+    if updates:
+        # Store updates in session state
+        st.session_state.knowledge_updates = updates
+        st.session_state.last_update_time = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+        
+        st.success("Updates refreshed successfully!")
+        time.sleep(1)  # Short delay for better UX
+        st.rerun()
     
     # Horizontal line
     st.markdown("---")
@@ -1,6 +1,6 @@
 from crewai import Agent, Task, Crew, Process
 import os
-from crewai import LLM
+from utils.llm_registry import get_crew_llm
 import json
 import requests
 from bs4 import BeautifulSoup
@@ -16,11 +16,7 @@ class KnowledgeUpdaterCrew:
     def __init__(self, serper_api_key, gemini_api_key):
         """Initialize the Knowledge Updater Crew with API keys"""
         self.serper_api_key = serper_api_key
-        self.llm = LLM(
-            model="gemini/gemini-1.5-flash",
-            temperature=0.7,
-            api_key=gemini_api_key
-        )
+        self.llm = get_crew_llm(gemini_api_key, model="gemini/gemini-1.5-flash", temperature=0.7)
     
     def create_agents(self):
         """Create the agents for the knowledge updating process"""
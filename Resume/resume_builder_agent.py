@@ -1,18 +1,14 @@
 # resume_builder_agent.py
 from crewai import Agent, Task, Crew, Process
 import os
-from crewai import LLM
+from utils.llm_registry import get_crew_llm
 import json
 import re
 from utils.input import DateTimeEncoder # cls=DateTimeEncoder
 class ResumeBuilderCrew:
     def __init__(self, api_key):
         """Initialize the Resume Builder Crew with API key"""
-        self.llm = LLM(
-            model="gemini/gemini-2.0-flash-lite",
-            temperature=0.7,
-            api_key=api_key
-        )
+        self.llm = get_crew_llm(api_key, model="gemini/gemini-2.0-flash-lite", temperature=0.7)
     
     def create_agents(self):
         """Create the agents for the resume building process"""
@@ -3,20 +3,17 @@ from crewai import Agent, Task, Crew, Process
 
 import os
 from crewai_tools import SerperDevTool
-from crewai import LLM
+from utils.llm_registry import get_crew_llm
 import json
 import re
 import streamlit as st
+from utils.prompt_budget import fit_prompt_sections, record_prompt_usage
 
 # Set up API keys
 os.environ['SERPER_API_KEY'] = st.secrets["SERPER_API_KEY"] 
 
 # Initialize LLM
-llm = LLM(
-    model="gemini/gemini-1.5-flash",  
-    temperature=0.7,
-    api_key=st.secrets["GEMINI_API_KEY"] 
-)
+llm = get_crew_llm(st.secrets["GEMINI_API_KEY"], model="gemini/gemini-1.5-flash", temperature=0.7)
 
 # Initialize tools
 serper_tool = SerperDevTool()
@@ -293,14 +290,21 @@ def generate_learning_roadmap(user_profile, learning_goal_or_job):
     Returns:
         str: The complete learning roadmap report in markdown format
     """
+    # Both inputs are interpolated into several task prompts, so cap them once here
+    sections = fit_prompt_sections('roadmap', [
+        {'name': 'user_profile', 'text': str(user_profile), 'priority': 1},
+        {'name': 'learning_goal_or_job', 'text': str(learning_goal_or_job), 'priority': 2}
+    ])
+    record_prompt_usage('roadmap', sections['user_profile'] + sections['learning_goal_or_job'])
+    
     # Create the crew
     crew = create_learning_roadmap_crew()
     
     # Execute the workflow
     result = crew.kickoff(
         inputs={
-            "user_profile": user_profile,
-            "learning_goal_or_job": learning_goal_or_job,
+            "user_profile": sections['user_profile'],
+            "learning_goal_or_job": sections['learning_goal_or_job'],
         }
     )
     
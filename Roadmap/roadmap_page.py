@@ -1,8 +1,9 @@
 
 import streamlit as st
 from backend.database import get_profile, get_user_details
-from Roadmap.roadmap import generate_learning_roadmap
-from backend.database import save_roadmap, get_user_roadmaps, get_roadmap
+from backend.database import get_user_roadmaps, get_roadmap
+from backend.job_queue import enqueue_job
+from utils.job_progress import poll_job
 
 def display_roadmap_page():
     """Display the learning roadmap page with personalized user details"""
@@ -134,41 +135,50 @@ def display_roadmap_page():
                 **Last Job**: {profile_data['last_job'].get('title', 'Not specified')} at {profile_data['last_job'].get('company', 'Not specified')}
                 """
             
-            # Generate roadmap button
+            # Generate roadmap button (generation runs on a job queue worker; the page polls for the result)
             if st.button("🔮 Generate Learning Roadmap", type="primary"):
                 if learning_goal:
-                    with st.spinner(f"Generating your personalized learning roadmap, {user_data.get('name').split()[0]}... This may take a few minutes."):
-                        try:
-                            # Call the CrewAI function to generate the roadmap
-                            roadmap = generate_learning_roadmap(user_profile_text, learning_goal)
-                            
-                            # Save the roadmap to database
-                            save_result = save_roadmap(st.session_state['user_id'], learning_goal, roadmap)
-                            if save_result["status"] == "success":
-                                st.success("Roadmap saved successfully!")
-                            
-                            # Store the roadmap in session state
-                            st.session_state['current_roadmap'] = roadmap
-                            st.session_state['current_roadmap_goal'] = learning_goal
-                            
-                            # Display the roadmap
-                            st.markdown("## 🗺️ Your Personalized Learning Roadmap")
-                            
-                            st.markdown(roadmap)
-                            
-                            # Add a download button for the markdown file
-                            st.download_button(
-                                label=f"📥 Download {user_data.get('name').split()[0]}'s Roadmap",
-                                data=roadmap,
-                                file_name=f"{user_data.get('name').lower().replace(' ', '_')}_learning_roadmap.md",
-                                mime="text/markdown"
-                            )
-                            
-                        except Exception as e:
-                            st.error(f"Error generating roadmap: {str(e)}")
+                    result = enqueue_job(
+                        "learning_roadmap",
+                        {
+                            "user_id": st.session_state['user_id'],
+                            "user_profile": user_profile_text,
+                            "learning_goal": learning_goal
+                        },
+                        priority="interactive",
+                        user_id=st.session_state['user_id']
+                    )
+                    if result["status"] == "success":
+                        st.session_state['roadmap_job_id'] = result["job_id"]
+                        st.session_state['roadmap_job_goal'] = learning_goal
+                    else:
+                        st.error(f"Error generating roadmap: {result['message']}")
                 else:
                     st.warning("Please enter a learning goal first")
 
+            job_result = poll_job('roadmap_job_id', f"Your learning roadmap, {user_data.get('name').split()[0]},")
+            if job_result:
+                roadmap = job_result["roadmap"]
+                if job_result.get("roadmap_id"):
+                    st.success("Roadmap saved successfully!")
+                
+                # Store the roadmap in session state
+                st.session_state['current_roadmap'] = roadmap
+                st.session_state['current_roadmap_goal'] = st.session_state.pop('roadmap_job_goal', learning_goal)
+                
+                # Display the roadmap
+                st.markdown("## 🗺️ Your Personalized Learning Roadmap")
+                
+                st.markdown(roadmap)
+                
+                # Add a download button for the markdown file
+                st.download_button(
+                    label=f"📥 Download {user_data.get('name').split()[0]}'s Roadmap",
+                    data=roadmap,
+                    file_name=f"{user_data.get('name').lower().replace(' ', '_')}_learning_roadmap.md",
+                    mime="text/markdown"
+                )
+
             # Display previously generated roadmap if it exists
             if 'current_roadmap' in st.session_state and not st.button:
                 st.markdown("## 🗺️ Your Personalized Learning Roadmap")
@@ -5,7 +5,18 @@ import traceback
 import logging
 from datetime import datetime
 from st_audiorec import st_audiorec
-from backend.database import save_chat_history, get_chat_history, sanitize_response,get_user_chat_sessions, get_chat_session, save_session_messages, delete_chat_session, create_chat_session, update_session_title
+from Agentic_ai.carrer_guide import ResponseRevision, SENTENCE_BOUNDARY
+from session_context.context_precompute import note_session_activity
+from utils.chat_persistence import (
+    HAS_OLDER_KEY,
+    MESSAGE_OFFSET_KEY,
+    load_older_messages,
+    mark_session_persisted,
+    persist_message_feedback,
+    persist_session_messages,
+    show_loaded_session
+)
+from backend.database import save_chat_history, get_chat_history, sanitize_response,get_user_chat_sessions, get_chat_session, delete_chat_session, create_chat_session, update_session_title
 
 import json
 
@@ -148,6 +159,52 @@ def translate_text(text, source_language, target_language):
         logger.error(f"Translation error: {str(e)}")
         return text  # Return original text if translation fails
 
+def translate_completed_sentences(chunks, detected_language):
+    """
+    Translate a stream of English chunks sentence by sentence
+    
+    Token chunks are buffered until a sentence completes, so each translation request
+    gets whole sentences. ResponseRevision chunks are translated whole.
+    """
+    buffer = ""
+    for chunk in chunks:
+        if isinstance(chunk, ResponseRevision):
+            buffer = ""
+            yield ResponseRevision(translate_text(chunk, "en-IN", detected_language))
+            continue
+        
+        buffer += chunk
+        boundaries = list(SENTENCE_BOUNDARY.finditer(buffer))
+        if boundaries:
+            cut = boundaries[-1].end()
+            completed, buffer = buffer[:cut], buffer[cut:]
+            # Keep the original spacing (line breaks separate markdown blocks)
+            yield translate_text(completed, "en-IN", detected_language) + completed[len(completed.rstrip()):]
+    
+    if buffer.strip():
+        yield translate_text(buffer, "en-IN", detected_language)
+
+def stream_assistant_response(assistant, english_prompt, detected_language=None):
+    """
+    Render the assistant's response progressively and return the full displayed text
+    
+    Chunks from CareerGuidanceChatbot.process_query_stream (whole sections or single
+    tokens) are rendered as they arrive. For non-English users they are translated per
+    completed sentence. A ResponseRevision replaces the text shown so far.
+    """
+    # Crew results can arrive as CrewOutput objects rather than text
+    chunks = (sanitize_response(chunk) for chunk in assistant.process_query_stream(english_prompt))
+    if detected_language and detected_language != "en-IN":
+        chunks = translate_completed_sentences(chunks, detected_language)
+    
+    placeholder = st.empty()
+    displayed = ""
+    for chunk in chunks:
+        displayed = str(chunk) if isinstance(chunk, ResponseRevision) else displayed + chunk
+        placeholder.markdown(displayed + "▌")
+    placeholder.markdown(displayed)
+    return displayed
+
 def process_user_query(prompt):
     """Process the user query and generate a response"""
     # Check if user is set
@@ -157,42 +214,33 @@ def process_user_query(prompt):
             st.markdown(content)
             st.session_state.messages.append({"role": "assistant", "content": content, "feedback": None})
             if st.session_state.get('current_session_id'):
-                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                persist_session_messages()
             return
     
-    # Generate response with the assistant
+    # Stream the response with the assistant as each part completes
     with st.chat_message("assistant", avatar="👩‍💼"):
-        with st.spinner("Thinking..."):
-            try:
-                # Process the query using our CareerGuidanceChatbot
-                assistant = st.session_state.get('assistant')
-                response = assistant.process_query(prompt)
-                
-                # Check if we need to translate the response
-                if hasattr(st.session_state, 'detected_language') and st.session_state.detected_language != "en-IN":
-                    translated_response = translate_text(
-                        response, 
-                        "en-IN", 
-                        st.session_state.detected_language
-                    )
-                    display_response = translated_response
-                else:
-                    display_response = response
-                
-                # Update chat history
-                st.markdown(display_response)
-                st.session_state.messages.append({"role": "assistant", "content": display_response, "feedback": None})
-                if st.session_state.get('current_session_id'):
-                    save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
-                
-            except Exception as e:
-                error_msg = f"I'm sorry, I encountered an error: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg, "feedback": None})
-                if st.session_state.get('current_session_id'):
-                    save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
-                logger.error(f"Error generating response: {str(e)}")
-                logger.error(traceback.format_exc())
+        try:
+            # Process the query using our CareerGuidanceChatbot
+            assistant = st.session_state.get('assistant')
+            display_response = stream_assistant_response(
+                assistant,
+                prompt,
+                st.session_state.get('detected_language')
+            )
+            
+            # Update chat history
+            st.session_state.messages.append({"role": "assistant", "content": display_response, "feedback": None})
+            if st.session_state.get('current_session_id'):
+                persist_session_messages()
+            
+        except Exception as e:
+            error_msg = f"I'm sorry, I encountered an error: {str(e)}"
+            st.error(error_msg)
+            st.session_state.messages.append({"role": "assistant", "content": error_msg, "feedback": None})
+            if st.session_state.get('current_session_id'):
+                persist_session_messages()
+            logger.error(f"Error generating response: {str(e)}")
+            logger.error(traceback.format_exc())
 
 def display_chat_page():
     """Display a chat interface with session management in Streamlit sidebar"""
@@ -292,6 +340,7 @@ def display_chat_page():
             result = create_chat_session(user_id)
             if result["status"] == "success":
                 st.session_state['current_session_id'] = result["session_id"]
+                mark_session_persisted(result["session_id"], 0)
                 st.session_state['messages'] = [{
                     "role": "assistant", 
                     "content": "Hi! I'm ASHA, your career assistant powered by AI. How can I help you today?", 
@@ -353,8 +402,9 @@ def display_chat_page():
                                 # Load session messages
                                 session_data = get_chat_session(session_id)
                                 if session_data["status"] == "success":
-                                    st.session_state['messages'] = session_data["session"]["messages"]
+                                    show_loaded_session(session_id, session_data["session"])
                                 else:
+                                    mark_session_persisted(None, 0)
                                     st.session_state['messages'] = [{
                                         "role": "assistant", 
                                         "content": "Hi! I'm ASHA, your career assistant powered by AI. How can I help you today?", 
@@ -407,6 +457,7 @@ def display_chat_page():
                                             new_result = create_chat_session(user_id)
                                             if new_result["status"] == "success":
                                                 st.session_state['current_session_id'] = new_result["session_id"]
+                                                mark_session_persisted(new_result["session_id"], 0)
                                                 st.session_state['messages'] = [{
                                                     "role": "assistant", 
                                                     "content": "Hi! I'm ASHA, your career assistant powered by AI. How can I help you today?", 
@@ -438,17 +489,22 @@ def display_chat_page():
             if result["status"] == "success":
                 st.session_state['current_session_id'] = result["session_id"]
                 current_session_id = result["session_id"]
+                mark_session_persisted(current_session_id, 0)
                 # Update URL
                 current_params = dict(st.query_params)
                 current_params['session_id'] = current_session_id
                 st.query_params.update(current_params)
         
+        # Refresh the previous session's context in the background when the user switches away or goes idle
+        note_session_activity(user_id, current_session_id)
+        
         # Load current session messages if not already loaded
         if 'messages' not in st.session_state and current_session_id:
             session_data = get_chat_session(current_session_id)
             if session_data["status"] == "success":
-                st.session_state['messages'] = session_data["session"]["messages"]
+                show_loaded_session(current_session_id, session_data["session"])
             else:
+                mark_session_persisted(None, 0)
                 st.session_state['messages'] = [{
                     "role": "assistant", 
                     "content": "Hi! I'm ASHA, your career assistant powered by AI. How can I help you today?", 
@@ -482,7 +538,7 @@ def display_chat_page():
                             st.session_state.messages.append({"role": "user", "content": "Find me latest job postings for you", "feedback": None})
                             st.session_state.messages.append({"role": "assistant", "content": response, "feedback": None})
                             if st.session_state.get('current_session_id'):
-                                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                persist_session_messages()
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error finding jobs: {str(e)}")
@@ -496,7 +552,7 @@ def display_chat_page():
                             st.session_state.messages.append({"role": "user", "content": "Find upcoming events for you", "feedback": None})
                             st.session_state.messages.append({"role": "assistant", "content": response, "feedback": None})
                             if st.session_state.get('current_session_id'):
-                                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                persist_session_messages()
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error finding events: {str(e)}")
@@ -510,7 +566,7 @@ def display_chat_page():
                             st.session_state.messages.append({"role": "user", "content": "Find community groups for you", "feedback": None})
                             st.session_state.messages.append({"role": "assistant", "content": response, "feedback": None})
                             if st.session_state.get('current_session_id'):
-                                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                persist_session_messages()
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error finding community groups: {str(e)}")
@@ -524,20 +580,27 @@ def display_chat_page():
                             st.session_state.messages.append({"role": "user", "content": "Find Workshops and sessions for you", "feedback": None})
                             st.session_state.messages.append({"role": "assistant", "content": response, "feedback": None})
                             if st.session_state.get('current_session_id'):
-                                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                persist_session_messages()
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error finding Workshops and sessions: {str(e)}")
             
             st.markdown('</div>', unsafe_allow_html=True)
             
+            # Only the newest page of a session is loaded; older messages are fetched on demand
+            if st.session_state.get(HAS_OLDER_KEY):
+                if st.button("⬆️ Load older messages", key="load_older_messages"):
+                    load_older_messages()
+                    st.rerun()
+            
             # Display chat messages with feedback buttons
+            message_offset = st.session_state.get(MESSAGE_OFFSET_KEY, 0)
             for i, message in enumerate(st.session_state.messages):
                 with st.chat_message(message["role"], avatar="👩‍💼" if message["role"] == "assistant" else None):
                     st.markdown(message["content"])
                     
-                    # Add feedback buttons only for assistant messages
-                    if message["role"] == "assistant" and i > 0:
+                    # Add feedback buttons only for assistant messages (not the greeting)
+                    if message["role"] == "assistant" and message_offset + i > 0:
                         cols = st.columns([0.05, 0.05, 0.9])
                         
                         # Add feedback status if already provided
@@ -562,8 +625,8 @@ def display_chat_page():
                                 })
                                 try:
                                     # Save session messages
-                                    save_result = save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
-                                    if save_result["status"] == "error":
+                                    save_result = persist_message_feedback(i, "positive")
+                                    if save_result and save_result["status"] == "error":
                                         # Log the error but don't stop the app
                                         print(f"Warning: Failed to save session messages: {save_result['message']}")
                                 except Exception as e:
@@ -585,7 +648,7 @@ def display_chat_page():
                                     "timestamp": datetime.now().isoformat()
                                 })
                                 if st.session_state.get('current_session_id'):
-                                    save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                    persist_message_feedback(i, "negative")
                                 st.rerun()
         
         # Create a spacer to ensure content is visible above the fixed input bar
@@ -641,21 +704,14 @@ def display_chat_page():
                                     # Add user message to chat history
                                     st.session_state.messages.append({"role": "user", "content": transcribed_text, "feedback": None})
                                     if st.session_state.get('current_session_id'):
-                                        save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                        persist_session_messages()
                                     
-                                    # Generate assistant response
-                                    with st.spinner("Generating response..."):
+                                    # Stream the assistant response into the chat
+                                    with chat_container, st.chat_message("assistant", avatar="👩‍💼"):
                                         try:
                                             # Process the query using our CareerGuidanceChatbot
                                             assistant = st.session_state.get('assistant')
-                                            response = assistant.process_query(english_text)
-                                            response = sanitize_response(response)
-                                            # Translate back to original language if needed
-                                            if detected_lang != "en-IN":
-                                                translated_response = translate_text(response, "en-IN", detected_lang)
-                                                display_response = translated_response
-                                            else:
-                                                display_response = response
+                                            display_response = stream_assistant_response(assistant, english_text, detected_lang)
                                             
                                             # Add assistant response to chat history
                                             st.session_state.messages.append({
@@ -664,7 +720,7 @@ def display_chat_page():
                                                 "feedback": None
                                             })
                                             if st.session_state.get('current_session_id'):
-                                                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                                persist_session_messages()
                                             st.rerun()
                                         except Exception as e:
                                             error_msg = f"I'm sorry, I encountered an error: {str(e)}"
@@ -674,7 +730,7 @@ def display_chat_page():
                                                 "feedback": None
                                             })
                                             if st.session_state.get('current_session_id'):
-                                                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                                persist_session_messages()
                                             st.rerun()
                     except Exception as e:
                         st.error(f"Error with audio recording: {str(e)}")
@@ -686,7 +742,7 @@ def display_chat_page():
                     # Add user message to chat history
                     st.session_state.messages.append({"role": "user", "content": prompt, "feedback": None})
                     if st.session_state.get('current_session_id'):
-                        save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                        persist_session_messages()
                         
                     
                     # Check if user is set
@@ -694,7 +750,7 @@ def display_chat_page():
                         content = "It seems you're not logged in. Please log in first so I can provide personalized assistance."
                         st.session_state.messages.append({"role": "assistant", "content": content, "feedback": None})
                         if st.session_state.get('current_session_id'):
-                            save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                            persist_session_messages()
                         st.rerun()
                     
                     # Detect language of the input
@@ -707,19 +763,15 @@ def display_chat_page():
                     else:
                         english_prompt = prompt
                     
-                    # Generate response with the assistant
-                    with st.spinner("Thinking..."):
+                    # Stream the response into the chat as each part completes
+                    with chat_container:
+                        with st.chat_message("user"):
+                            st.markdown(prompt)
+                    with chat_container, st.chat_message("assistant", avatar="👩‍💼"):
                         try:
                             # Process the query using our CareerGuidanceChatbot
                             assistant = st.session_state.get('assistant')
-                            response = assistant.process_query(english_prompt)
-                            response = sanitize_response(response)
-                            # Translate back to original language if needed
-                            if detected_lang != "en-IN":
-                                translated_response = translate_text(response, "en-IN", detected_lang)
-                                display_response = translated_response
-                            else:
-                                display_response = response
+                            display_response = stream_assistant_response(assistant, english_prompt, detected_lang)
                             
                             # Update chat history
                             st.session_state.messages.append({
@@ -729,7 +781,7 @@ def display_chat_page():
                             })
 
                             if st.session_state.get('current_session_id'):
-                                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                persist_session_messages()
                             st.rerun()
                             
                         except Exception as e:
@@ -741,7 +793,7 @@ def display_chat_page():
                             })
 
                             if st.session_state.get('current_session_id'):
-                                save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                                persist_session_messages()
 
                             logger.error(f"Error generating response: {str(e)}")
                             logger.error(traceback.format_exc())
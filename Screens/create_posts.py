@@ -6,7 +6,7 @@ from datetime import datetime
 import traceback
 from crewai import Agent, Task, Crew, Process
 import google.generativeai as genai
-from langchain_community.chat_models import ChatLiteLLM
+from utils.llm_registry import get_chat_llm
 import re
 from urllib.parse import urlparse
 import base64
@@ -22,11 +22,7 @@ GEMINI_API_KEY =st.secrets["GEMINI_API_KEY"]
 
 def create_post_generation_agent():
     """Create AI agent for generating social media posts"""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",
-        api_key=GEMINI_API_KEY,
-        temperature=0.7
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.7)
     
     return Agent(
         role="Social Media Content Creator for Women's Empowerment",
@@ -41,11 +37,7 @@ def create_post_generation_agent():
 
 def create_content_moderation_agent():
     """Create AI agent for content moderation and guardrails"""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",
-        api_key=GEMINI_API_KEY,
-        temperature=0.1
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.1)
     
     return Agent(
         role="Content Moderation Specialist",
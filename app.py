@@ -18,12 +18,18 @@ import sys
 import traceback
 import logging
 import json
+import threading
 from datetime import datetime
 from Roadmap.roadmap_page import display_roadmap_page
 from skill_assessment import skill
 from Resume.resume_builder_page import display_resume_builder_page
 from Knowledge.knowledge_dose_page import display_daily_knowledge_page
-from backend.database import create_chat_session, get_user_chat_sessions,save_session_messages
+from backend.database import create_chat_session, get_user_chat_sessions
+from utils.chat_persistence import mark_session_persisted, persist_session_messages
+from backend.indexes import ensure_indexes
+from backend.job_queue import ensure_job_runner
+from Agentic_ai.answer_cache import warm_embedder
+from Agentic_ai.query_classifier import get_query_classifier
 
 
 # Add the project root directory to the Python path for imports
@@ -40,6 +46,31 @@ from Screens.chat_page import display_chat_page
 from Screens.create_posts import display_post_creation_page
 
 
+@st.cache_resource
+def ensure_database_indexes():
+    """Create missing MongoDB indexes once per server process"""
+    return ensure_indexes()
+
+
+@st.cache_resource
+def start_job_runner():
+    """Run queued jobs in this process if no `python -m backend.job_worker` process is alive"""
+    return ensure_job_runner()
+
+
+def _warm_local_models():
+    get_query_classifier()
+    warm_embedder()
+
+
+@st.cache_resource
+def warm_local_models():
+    """Train the query classifier and load the answer-cache embedding model once per server process, in the background"""
+    thread = threading.Thread(target=_warm_local_models, name="warm-local-models", daemon=True)
+    thread.start()
+    return thread
+
+
 def main():
     # Configure page
     st.set_page_config(
@@ -52,6 +83,10 @@ def main():
     # Apply global CSS
     inject_global_styles()
 
+    ensure_database_indexes()
+    warm_local_models()
+    start_job_runner()
+
     # Initialize session state variables if they don't exist
     if 'init_done' not in st.session_state:
         for var in ['page', 'authenticated', 'user_id', 'token', 'show_profile']:
@@ -101,6 +136,7 @@ def main():
                 result = create_chat_session(st.session_state['user_id'])
                 if result["status"] == "success":
                     st.session_state['current_session_id'] = result["session_id"]
+                    mark_session_persisted(result["session_id"], 0)
                     # Update URL with session_id
                     current_params = dict(st.query_params)
                     current_params['session_id'] = result["session_id"]
@@ -230,7 +266,7 @@ def main():
             if st.button("🚪 Logout", key="logout_btn", use_container_width=True):
                 # Save current session before logout
                 if st.session_state.get('current_session_id') and st.session_state.get('messages'):
-                    save_session_messages(st.session_state['current_session_id'], st.session_state.messages)
+                    persist_session_messages()
                 
                 # Clear session storage to completely log out
                 for key in list(st.session_state.keys()):
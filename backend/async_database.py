@@ -0,0 +1,66 @@
+## async_database.py -- shared Motor (async MongoDB) client for the FastAPI service, opened and closed by the app lifespan
+#
+# The Streamlit app keeps using the synchronous client in database.py; the FastAPI routes must not,
+# since a blocking pymongo call inside an async endpoint stalls every request on the event loop.
+import os
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+DATABASE_NAME = "asha_bot"
+
+# Connections kept per service process; requests beyond MAX_POOL_SIZE wait for a free connection
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+SERVER_SELECTION_TIMEOUT_MS = 5000
+
+_client = None
+
+
+async def connect_to_mongo():
+    """Create the shared client and check the server is reachable"""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            MONGO_URI,
+            maxPoolSize=MAX_POOL_SIZE,
+            minPoolSize=MIN_POOL_SIZE,
+            serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS
+        )
+        await _client.admin.command("ping")
+        print(f"✅ Connected to MongoDB (pool {MIN_POOL_SIZE}-{MAX_POOL_SIZE})")
+    return _client
+
+
+def close_mongo_connection():
+    """Close the shared client and its pooled connections"""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def get_database():
+    """
+    FastAPI dependency returning the service database
+
+    Raises:
+        RuntimeError: If called outside the app lifespan (the client is not connected)
+    """
+    if _client is None:
+        raise RuntimeError("MongoDB client is not connected; is the app running with its lifespan handler?")
+    return _client[DATABASE_NAME]
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the pooled client when the service starts and close it on shutdown"""
+    await connect_to_mongo()
+    try:
+        yield
+    finally:
+        close_mongo_connection()
@@ -1,6 +1,7 @@
 #database.py
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from dotenv import load_dotenv
 import os
 import bcrypt
@@ -8,6 +9,7 @@ import jwt
 from datetime import datetime, timezone, timedelta
 from bson import ObjectId
 import json
+from backend.db_metrics import round_trip_counter
 # Load environment variables from .env file
 load_dotenv()
 
@@ -20,12 +22,23 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 MONGO_URI = os.getenv("MONGO_URI")
 
 # Initialize the MongoDB client
-client = MongoClient(MONGO_URI)
+client = MongoClient(MONGO_URI, event_listeners=[round_trip_counter])
 db = client["asha_bot"]
 
 # Collections
 users_collection = db["users"]
 profiles_collection = db["profiles"]
+profile_analyses_collection = db["profile_analyses"]
+recommendation_cache_collection = db["recommendation_cache"]
+user_contexts_collection = db["user_contexts"]
+jobs_collection = db["jobs"]
+# One document per job worker, refreshed while it runs (see backend/job_queue.py)
+job_workers_collection = db["job_workers"]
+# One document per chat message, keyed by (session_id, seq); chat_sessions only holds session metadata
+chat_messages_collection = db["chat_messages"]
+
+# Messages loaded when a chat session is opened; older ones are loaded a page at a time on demand
+MESSAGE_PAGE_SIZE = 30
 
 # User Authentication Functions
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -102,6 +115,9 @@ def login_user(email, password):
 
 # Profile Management Functions
 def create_profile(profile_data):
+    # Imported here: backend.user_context imports this module
+    from backend.user_context import record_profile
+    
     # Verify user exists
     user_id = profile_data["user_id"]
     try:
@@ -112,6 +128,10 @@ def create_profile(profile_data):
     if not user:
         return {"status": "error", "message": "User not found"}
     
+    # Cached analyses and recommendations of the previous profile version are stale once it is rewritten
+    profile_analyses_collection.delete_many({"user_id": user_id})
+    recommendation_cache_collection.delete_many({"user_id": user_id})
+    
     # Check if profile for this user already exists
     existing_profile = profiles_collection.find_one({"user_id": user_id})
     if existing_profile:
@@ -121,6 +141,7 @@ def create_profile(profile_data):
             {"$set": profile_data}
         )
         updated_profile = profiles_collection.find_one({"user_id": user_id})
+        record_profile(user_id, updated_profile)
         return {
             "status": "success", 
             "profile": {**{k: v for k, v in updated_profile.items() if k != "_id"}, "id": str(updated_profile["_id"])}
@@ -131,6 +152,7 @@ def create_profile(profile_data):
     
     # Return the created profile
     created_profile = profiles_collection.find_one({"_id": result.inserted_id})
+    record_profile(user_id, created_profile)
     return {
         "status": "success", 
         "profile": {**{k: v for k, v in created_profile.items() if k != "_id"}, "id": str(created_profile["_id"])}
@@ -264,7 +286,7 @@ def create_chat_session(user_id, title="New Chat"):
         session_data = {
             "user_id": user_id,
             "title": title,
-            "messages": [],
+            "message_count": 0,
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc),
             "is_active": True
@@ -282,7 +304,7 @@ def get_user_chat_sessions(user_id, limit=20):
     try:
         sessions = list(db["chat_sessions"].find(
             {"user_id": user_id}, 
-            {"title": 1, "created_at": 1, "updated_at": 1, "message_count": {"$size": "$messages"}}
+            {"title": 1, "created_at": 1, "updated_at": 1, "message_count": 1}
         ).sort("updated_at", -1).limit(limit))
         
         # Convert ObjectId to string
@@ -293,46 +315,205 @@ def get_user_chat_sessions(user_id, limit=20):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-def get_chat_session(session_id):
-    """Get a specific chat session by ID"""
+def _message_from_document(doc):
+    """Shape a chat_messages document as a chat message, keeping its seq"""
+    return {k: v for k, v in doc.items() if k not in ("_id", "session_id", "created_at")}
+
+def get_message_page(session_id, before_seq=None, limit=MESSAGE_PAGE_SIZE):
+    """
+    Get one page of a session's messages, newest first from the cursor
+    
+    Args:
+        session_id: Chat session ID
+        before_seq: Only messages older than this seq; None for the newest page
+        limit: Page size
+        
+    Returns:
+        dict: {"status": "success", "messages": [...] (oldest first), "first_seq": int, "has_older": bool}
+    """
+    try:
+        query = {"session_id": session_id}
+        if before_seq is not None:
+            query["seq"] = {"$lt": before_seq}
+        # One extra message tells whether an older page exists
+        docs = list(chat_messages_collection.find(query).sort("seq", DESCENDING).limit(limit + 1))
+        has_older = len(docs) > limit
+        messages = [_message_from_document(doc) for doc in reversed(docs[:limit])]
+        first_seq = messages[0]["seq"] if messages else (before_seq or 0)
+        return {"status": "success", "messages": messages, "first_seq": first_seq, "has_older": has_older}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+def load_session_messages(session_id, start_seq=0):
+    """Get every message of a session from start_seq on, oldest first (for summarization and analysis)"""
+    ensure_sessions_migrated([session_id])
+    return [
+        _message_from_document(doc)
+        for doc in chat_messages_collection.find(
+            {"session_id": session_id, "seq": {"$gte": start_seq}}
+        ).sort("seq", ASCENDING)
+    ]
+
+def load_messages_for_sessions(session_ids):
+    """Get every message of several sessions in one round-trip, as {session_id: [messages oldest first]}"""
+    messages = {session_id: [] for session_id in session_ids}
+    ensure_sessions_migrated(list(session_ids))
+    for doc in chat_messages_collection.find({"session_id": {"$in": list(session_ids)}}).sort(
+        [("session_id", ASCENDING), ("seq", ASCENDING)]
+    ):
+        messages[doc["session_id"]].append(_message_from_document(doc))
+    return messages
+
+def get_chat_session(session_id, message_limit=MESSAGE_PAGE_SIZE):
+    """
+    Get a specific chat session by ID with its newest page of messages
+    
+    Args:
+        session_id: Chat session ID
+        message_limit: Messages to load, newest first; None loads all of them
+        
+    Returns:
+        dict: {"status": "success", "session": {...}} where the session has "messages"
+        (oldest first), "first_seq" (seq of the first loaded message) and "has_older"
+    """
     try:
         session = db["chat_sessions"].find_one({"_id": ObjectId(session_id)})
         if not session:
             return {"status": "error", "message": "Session not found"}
         
+        # Sessions from before chat_messages are migrated the first time they are opened
+        if "messages" in session:
+            session["message_count"] = migrate_embedded_messages(session)
+            del session["messages"]
+        
         # Convert ObjectId to string
         session["_id"] = str(session["_id"])
+        if message_limit is None:
+            session.update({"messages": load_session_messages(session_id), "first_seq": 0, "has_older": False})
+        else:
+            page = get_message_page(session_id, limit=message_limit)
+            if page["status"] != "success":
+                return page
+            session.update({k: page[k] for k in ("messages", "first_seq", "has_older")})
         return {"status": "success", "session": session}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-def save_session_messages(session_id, messages):
-    """Save messages to a specific chat session"""
+def sanitize_message(msg):
+    """Copy a chat message with its content made serializable"""
+    sanitized_msg = msg.copy()
+    if 'content' in sanitized_msg:
+        sanitized_msg['content'] = sanitize_response(sanitized_msg['content'])
+    return sanitized_msg
+
+def _message_documents(session_id, messages, start_seq):
+    """chat_messages documents for messages numbered from start_seq"""
+    now = datetime.now(timezone.utc)
+    return [
+        {**sanitize_message(msg), "session_id": session_id, "seq": start_seq + offset, "created_at": now}
+        for offset, msg in enumerate(messages)
+    ]
+
+def session_title_from_messages(messages):
+    """Title a chat session after its first user message, or None if there is none yet"""
+    for msg in messages:
+        if msg.get("role") == "user":
+            content = str(msg.get("content", ""))
+            return content[:50] + "..." if len(content) > 50 else content
+    return None
+
+def _same_message(doc, msg):
+    return doc.get("role") == msg.get("role") and doc.get("content") == msg.get("content")
+
+def migrate_embedded_messages(session):
+    """
+    Move the messages a chat_sessions document still embeds into chat_messages
+    
+    The embedded messages take seqs 0..n-1. Anything already stored for the
+    session that is not a copy of them (turns saved after the app was upgraded
+    but before the session was migrated) is renumbered after them, so no message
+    is lost or interleaved. The embedded array is removed and message_count set last.
+    
+    Args:
+        session: chat_sessions document including its "messages" array
+        
+    Returns:
+        int: Number of messages in the session after migration
+    """
+    session_id = str(session["_id"])
+    embedded = session.get("messages") or []
+    stored = list(chat_messages_collection.find({"session_id": session_id}).sort("seq", ASCENDING))
+    extra = [
+        doc for doc in stored
+        if not (doc["seq"] < len(embedded) and _same_message(doc, sanitize_message(embedded[doc["seq"]])))
+    ]
+    
+    created_at = session.get("updated_at") or session.get("created_at")
+    documents = [
+        {**sanitize_message(msg), "session_id": session_id, "seq": seq, "created_at": created_at}
+        for seq, msg in enumerate(embedded)
+    ]
+    documents += [
+        {**{k: v for k, v in doc.items() if k != "_id"}, "seq": len(embedded) + offset}
+        for offset, doc in enumerate(extra)
+    ]
+    if documents:
+        chat_messages_collection.bulk_write([
+            ReplaceOne({"session_id": session_id, "seq": doc["seq"]}, doc, upsert=True)
+            for doc in documents
+        ])
+    chat_messages_collection.delete_many({"session_id": session_id, "seq": {"$gte": len(documents)}})
+    
+    db["chat_sessions"].update_one(
+        {"_id": session["_id"]},
+        {"$set": {"message_count": len(documents)}, "$unset": {"messages": ""}}
+    )
+    if extra:
+        print(f"⚠️ Session {session_id}: kept {len(extra)} messages saved before it was migrated")
+    return len(documents)
+
+def ensure_sessions_migrated(session_ids):
+    """Migrate any of these sessions that still embed their messages (one query when none do)"""
+    for session in db["chat_sessions"].find(
+        {"_id": {"$in": [ObjectId(session_id) for session_id in session_ids]}, "messages": {"$exists": True}}
+    ):
+        migrate_embedded_messages(session)
+
+def save_session_messages(session_id, messages, start_seq=0):
+    """
+    Save messages to a specific chat session, replacing every stored message from start_seq on
+    
+    Used to resync the messages loaded in the chat page (which start at start_seq);
+    each chat turn should use append_session_messages instead. Messages are
+    overwritten in place by seq and only the surplus is deleted afterwards, so a
+    save that fails half-way leaves the old messages in place rather than an empty session.
+    """
     try:
+        # An unmigrated session gets its embedded history moved first, so it is not overwritten
+        ensure_sessions_migrated([session_id])
+        
         # Sanitize messages before saving
-        sanitized_messages = []
-        for msg in messages:
-            sanitized_msg = msg.copy()
-            if 'content' in sanitized_msg:
-                sanitized_msg['content'] = sanitize_response(sanitized_msg['content'])
-            sanitized_messages.append(sanitized_msg)
+        documents = _message_documents(session_id, messages, start_seq)
         
         # Generate title from first user message if title is "New Chat"
-        session = db["chat_sessions"].find_one({"_id": ObjectId(session_id)})
+        session = db["chat_sessions"].find_one({"_id": ObjectId(session_id)}, {"title": 1})
         title = session.get("title", "New Chat")
         
-        if title == "New Chat" and sanitized_messages:
-            # Find first user message to generate title
-            for msg in sanitized_messages:
-                if msg.get("role") == "user":
-                    title = msg["content"][:50] + "..." if len(msg["content"]) > 50 else msg["content"]
-                    break
+        if title == "New Chat":
+            title = session_title_from_messages(messages) or title
+        
+        if documents:
+            chat_messages_collection.bulk_write([
+                ReplaceOne({"session_id": session_id, "seq": doc["seq"]}, doc, upsert=True)
+                for doc in documents
+            ])
+        chat_messages_collection.delete_many({"session_id": session_id, "seq": {"$gte": start_seq + len(messages)}})
         
         db["chat_sessions"].update_one(
             {"_id": ObjectId(session_id)},
             {
                 "$set": {
-                    "messages": sanitized_messages,
+                    "message_count": start_seq + len(messages),
                     "title": title,
                     "updated_at": datetime.now(timezone.utc)
                 }
@@ -343,8 +524,82 @@ def save_session_messages(session_id, messages):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+def append_session_messages(session_id, new_messages, start_index, title=None):
+    """
+    Append new messages to a chat session without reading or rewriting the stored ones
+    
+    The messages are inserted first; the (session_id, seq) unique index rejects
+    them if another save already used those seqs. The session's message_count is
+    then advanced, only while it equals start_index. If either step fails the
+    inserted messages are deleted again, so message_count never counts messages
+    that were not stored, and a caller whose high-water mark is out of date gets
+    a conflict and can fall back to save_session_messages.
+    
+    Args:
+        session_id: Chat session ID
+        new_messages: Messages added since the last save
+        start_index: Number of messages already stored (the caller's high-water mark)
+        title: Title to set with this append; given once, with the first user message
+        
+    Returns:
+        dict: {"status": "success"}, {"status": "conflict"} or an error status
+    """
+    documents = _message_documents(session_id, new_messages, start_index)
+    # IDs are assigned here so a rollback removes exactly these documents
+    for doc in documents:
+        doc["_id"] = ObjectId()
+    inserted_ids = [doc["_id"] for doc in documents]
+    
+    try:
+        if documents:
+            chat_messages_collection.insert_many(documents)
+        
+        update = {
+            "$inc": {"message_count": len(new_messages)},
+            "$set": {"updated_at": datetime.now(timezone.utc)}
+        }
+        if title:
+            update["$set"]["title"] = title
+        
+        result = db["chat_sessions"].update_one({"_id": ObjectId(session_id), "message_count": start_index}, update)
+        if result.matched_count == 0:
+            _delete_messages(inserted_ids)
+            return {"status": "conflict", "message": f"Session does not hold {start_index} messages"}
+        
+        return {"status": "success", "message": f"{len(new_messages)} messages appended"}
+    except (DuplicateKeyError, BulkWriteError) as e:
+        _delete_messages(inserted_ids)
+        write_errors = e.details.get("writeErrors", []) if isinstance(e, BulkWriteError) else []
+        if any(error.get("code") != 11000 for error in write_errors):
+            return {"status": "error", "message": str(e)}
+        return {"status": "conflict", "message": f"Messages from seq {start_index} are already stored"}
+    except Exception as e:
+        _delete_messages(inserted_ids)
+        return {"status": "error", "message": str(e)}
+
+def _delete_messages(message_ids):
+    """Best-effort rollback of messages inserted by a failed append"""
+    try:
+        if message_ids:
+            chat_messages_collection.delete_many({"_id": {"$in": message_ids}})
+    except Exception as e:
+        print(f"Warning: Failed to roll back {len(message_ids)} appended messages: {e}")
+
+def update_message_feedback(session_id, message_seq, feedback):
+    """Set the feedback of one stored message in a chat session"""
+    try:
+        result = chat_messages_collection.update_one(
+            {"session_id": session_id, "seq": message_seq},
+            {"$set": {"feedback": feedback}}
+        )
+        if result.matched_count == 0:
+            return {"status": "error", "message": "Message not found"}
+        return {"status": "success", "message": "Feedback saved"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
 def delete_chat_session(session_id, user_id):
-    """Delete a chat session (verify ownership)"""
+    """Delete a chat session and its messages (verify ownership)"""
     try:
         result = db["chat_sessions"].delete_one({
             "_id": ObjectId(session_id),
@@ -354,6 +609,7 @@ def delete_chat_session(session_id, user_id):
         if result.deleted_count == 0:
             return {"status": "error", "message": "Session not found or not authorized"}
         
+        chat_messages_collection.delete_many({"session_id": session_id})
         return {"status": "success", "message": "Session deleted"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
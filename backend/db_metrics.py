@@ -0,0 +1,74 @@
+## db_metrics.py -- counts MongoDB round-trips per code path so N+1 query regressions show up in logs and stats
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = Counter()
+_scopes = {}
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    """Command listener that counts every command sent to MongoDB, in total and per active scope"""
+
+    def started(self, event):
+        with _lock:
+            _totals[event.command_name] += 1
+        for scope in getattr(_local, "scopes", ()):
+            scope[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Registered on the MongoClient in backend/database.py
+round_trip_counter = RoundTripCounter()
+
+
+@contextmanager
+def track_round_trips(label):
+    """
+    Count the MongoDB commands issued by the current thread inside the block
+
+    Commands issued from worker threads (e.g. a ThreadPoolExecutor) are not
+    attributed to the scope; they only appear in the process totals.
+
+    Args:
+        label: Name the counts are recorded under, e.g. the function name
+
+    Yields:
+        Counter: command name -> count, filled in as the block runs
+    """
+    scope = Counter()
+    scopes = getattr(_local, "scopes", None)
+    if scopes is None:
+        scopes = _local.scopes = []
+    scopes.append(scope)
+    try:
+        yield scope
+    finally:
+        scopes.remove(scope)
+        total = sum(scope.values())
+        with _lock:
+            stats = _scopes.setdefault(label, {"calls": 0, "round_trips": 0, "max": 0, "last": 0})
+            stats["calls"] += 1
+            stats["round_trips"] += total
+            stats["max"] = max(stats["max"], total)
+            stats["last"] = total
+        print(f"🗄️ {label}: {total} MongoDB round-trips ({dict(scope)})")
+
+
+def get_round_trip_stats():
+    """Return per-label round-trip counts (calls, total, average, max, last) and process totals per command"""
+    with _lock:
+        scopes = {label: dict(stats) for label, stats in _scopes.items()}
+        totals = dict(_totals)
+    for stats in scopes.values():
+        stats["average"] = stats["round_trips"] / stats["calls"] if stats["calls"] else 0.0
+    return {"scopes": scopes, "totals": totals}
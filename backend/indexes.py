@@ -0,0 +1,187 @@
+## indexes.py -- declared MongoDB indexes for every hot query, created on startup and verified with explain()
+#
+# Usage (from the repository root):
+#   python -m backend.indexes --ensure                   # create any missing indexes
+#   python -m backend.indexes --check --user-id <id>     # explain every hot query and flag collection scans
+import argparse
+
+from pymongo import ASCENDING, DESCENDING
+
+from backend.database import db
+
+# Finished jobs are removed by MongoDB after this long (see backend/job_queue.py)
+FINISHED_JOB_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Session summaries expire after 90 days
+SESSION_SUMMARY_TTL_SECONDS = 90 * 24 * 60 * 60
+
+# collection -> list of (keys, options); names are left to MongoDB so existing indexes match
+REQUIRED_INDEXES = {
+    'users': [
+        ([("email", ASCENDING)], {"unique": True})
+    ],
+    'profiles': [
+        ([("user_id", ASCENDING)], {"unique": True})
+    ],
+    'chats': [
+        ([("user_id", ASCENDING)], {})
+    ],
+    'chat_sessions': [
+        ([("user_id", ASCENDING), ("updated_at", DESCENDING)], {})
+    ],
+    'chat_messages': [
+        # Also makes concurrent appends of the same seq fail instead of interleaving
+        ([("session_id", ASCENDING), ("seq", ASCENDING)], {"unique": True})
+    ],
+    'session_summaries': [
+        ([("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+        ([("user_id", ASCENDING), ("session_id", ASCENDING)], {}),
+        ([("created_at", ASCENDING)], {"expireAfterSeconds": SESSION_SUMMARY_TTL_SECONDS})
+    ],
+    'session_patterns': [
+        ([("user_id", ASCENDING), ("created_at", DESCENDING)], {})
+    ],
+    'user_patterns': [
+        ([("user_id", ASCENDING), ("updated_at", DESCENDING)], {})
+    ],
+    'user_contexts': [
+        ([("user_id", ASCENDING)], {"unique": True})
+    ],
+    'roadmaps': [
+        ([("user_id", ASCENDING), ("created_at", DESCENDING)], {})
+    ],
+    'profile_analyses': [
+        ([("profile_hash", ASCENDING)], {}),
+        ([("user_id", ASCENDING)], {})
+    ],
+    'recommendation_cache': [
+        ([("user_id", ASCENDING), ("category", ASCENDING)], {}),
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0})
+    ],
+    'jobs': [
+        ([("status", ASCENDING), ("priority", DESCENDING), ("run_after", ASCENDING)], {}),
+        ([("status", ASCENDING), ("lease_expires_at", ASCENDING)], {}),
+        # Only one queued/running job per dedupe key
+        ([("active_key", ASCENDING)], {"unique": True, "partialFilterExpression": {"active_key": {"$exists": True}}}),
+        ([("finished_at", ASCENDING)], {"expireAfterSeconds": FINISHED_JOB_TTL_SECONDS})
+    ],
+    'job_workers': [
+        # Workers that stopped heartbeating are forgotten after a day
+        ([("last_seen", ASCENDING)], {"expireAfterSeconds": 24 * 60 * 60})
+    ]
+}
+
+# Queries on the request path: (name, collection, filter, sort). {user_id} is filled in by check_query_plans.
+HOT_QUERIES = [
+    ('login by email', 'users', {"email": "{email}"}, None),
+    ('profile by user', 'profiles', {"user_id": "{user_id}"}, None),
+    ('chat history by user', 'chats', {"user_id": "{user_id}"}, None),
+    ('recent chat sessions', 'chat_sessions', {"user_id": "{user_id}"}, [("updated_at", DESCENDING)]),
+    ('newest message page', 'chat_messages', {"session_id": "{session_id}"}, [("seq", DESCENDING)]),
+    ('recent session summaries', 'session_summaries', {"user_id": "{user_id}"}, [("created_at", DESCENDING)]),
+    ('session summary by session', 'session_summaries', {"user_id": "{user_id}", "session_id": "{session_id}"}, None),
+    ('recent session patterns', 'session_patterns', {"user_id": "{user_id}"}, [("created_at", DESCENDING)]),
+    ('latest cross-session pattern', 'user_patterns', {"user_id": "{user_id}"}, [("updated_at", DESCENDING)]),
+    ('user context snapshot', 'user_contexts', {"user_id": "{user_id}"}, None),
+    ('roadmaps by user', 'roadmaps', {"user_id": "{user_id}"}, [("created_at", DESCENDING)]),
+    ('profile analysis by hash', 'profile_analyses', {"profile_hash": "{profile_hash}"}, None),
+    ('recommendation cache by user', 'recommendation_cache', {"user_id": "{user_id}", "category": "jobs"}, None),
+    ('next queued job', 'jobs', {"status": "queued"}, [("priority", DESCENDING), ("run_after", ASCENDING)])
+]
+
+# Plan stages that mean the query did not use an index
+SCAN_STAGES = {"COLLSCAN"}
+
+
+def ensure_indexes(database=db):
+    """
+    Create every declared index that does not exist yet
+
+    Returns:
+        dict: {"status": "success"|"error", "created": [...], "errors": [...]}
+    """
+    created, errors = [], []
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        for keys, options in indexes:
+            try:
+                created.append(f"{collection_name}.{database[collection_name].create_index(keys, **options)}")
+            except Exception as e:
+                errors.append(f"{collection_name} {keys}: {e}")
+
+    for error in errors:
+        print(f"⚠️ Index not created: {error}")
+    return {"status": "error" if errors else "success", "created": created, "errors": errors}
+
+
+def _plan_stages(plan):
+    """Collect every stage name in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def _fill(value, samples):
+    if isinstance(value, dict):
+        return {key: _fill(item, samples) for key, item in value.items()}
+    if isinstance(value, str) and value.startswith("{") and value.endswith("}"):
+        return samples.get(value[1:-1], "")
+    return value
+
+
+def check_query_plans(user_id="", database=db, **samples):
+    """
+    Explain every hot query and report whether it scans an index or the whole collection
+
+    Args:
+        user_id: A real user ID gives the most representative plans
+        **samples: Other placeholder values (email, session_id, profile_hash)
+
+    Returns:
+        list: One dict per query with name, collection, stages and uses_index
+    """
+    samples = {"user_id": user_id, **samples}
+    results = []
+    for name, collection_name, query_filter, sort in HOT_QUERIES:
+        cursor = database[collection_name].find(_fill(query_filter, samples)).limit(10)
+        if sort:
+            cursor = cursor.sort(sort)
+        stages = _plan_stages(cursor.explain().get("queryPlanner", {}).get("winningPlan", {}))
+        results.append({
+            "name": name,
+            "collection": collection_name,
+            "stages": stages,
+            "uses_index": not SCAN_STAGES.intersection(stages)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage and verify MongoDB indexes")
+    parser.add_argument("--ensure", action="store_true", help="Create missing indexes")
+    parser.add_argument("--check", action="store_true", help="Explain every hot query")
+    parser.add_argument("--user-id", default="", help="User ID to use in explained queries")
+    args = parser.parse_args()
+
+    if args.ensure or not args.check:
+        result = ensure_indexes()
+        print(f"Ensured {len(result['created'])} indexes ({len(result['errors'])} errors)")
+
+    if args.check:
+        failures = 0
+        for result in check_query_plans(args.user_id):
+            marker = "✅" if result["uses_index"] else "❌"
+            failures += not result["uses_index"]
+            print(f"{marker} {result['name']:<32} {result['collection']:<22} {' > '.join(result['stages'])}")
+        if failures:
+            raise SystemExit(f"{failures} hot queries use a collection scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+## job_handlers.py -- job types the queue workers can run; each handler takes the job payload as keyword arguments
+#
+# Handlers import their pipelines lazily so a worker only loads the agents it actually runs.
+# A handler raises to fail the attempt (the job is retried with backoff) and returns a
+# MongoDB-storable result that the UI reads through backend.job_queue.get_job_status.
+import io
+
+from bson import ObjectId
+
+
+def run_pattern_analysis(user_id):
+    """Cross-session pattern analysis (session_context.user_pattern_anlaysis)"""
+    from session_context.user_pattern_anlaysis import enhanced_cross_session_analysis
+
+    pattern_id = enhanced_cross_session_analysis(user_id, force_generate_missing=True)
+    return {"pattern_id": str(pattern_id) if pattern_id else None}
+
+
+def run_session_summaries(user_id, session_ids):
+    """Summarize chat sessions in batch (session_context.session_context_manager)"""
+    from session_context.session_context_manager import (
+        batch_generate_session_summaries,
+        load_sessions_for_summarization
+    )
+
+    summaries = batch_generate_session_summaries(user_id, load_sessions_for_summarization(session_ids))
+    return {"summarized_session_ids": [summary["session_id"] for summary in summaries]}
+
+
+def run_context_refresh(user_id, session_id=None):
+    """Summarize a finished session (if any) and rebuild the user's precomputed context"""
+    from session_context.context_precompute import precompute_user_context
+
+    precompute_user_context(user_id, session_id)
+    return {"session_id": session_id}
+
+
+def run_skill_assessment(resume_bytes, resume_name, job_requirements):
+    """Resume skill assessment (skill_assessment.skill_ass)"""
+    from skill_assessment.skill_ass import make_json_serializable, run_skill_assessment as assess
+
+    resume_file = io.BytesIO(resume_bytes)
+    resume_file.name = resume_name
+    return make_json_serializable(assess(resume_file, job_requirements))
+
+
+def run_learning_roadmap(user_id, user_profile, learning_goal):
+    """Learning roadmap generation (Roadmap.roadmap), saved to the user's roadmaps"""
+    from Roadmap.roadmap import generate_learning_roadmap
+    from backend.database import save_roadmap
+
+    roadmap = generate_learning_roadmap(user_profile, learning_goal)
+    save_result = save_roadmap(user_id, learning_goal, roadmap)
+    return {"roadmap": roadmap, "roadmap_id": save_result.get("roadmap_id")}
+
+
+def run_knowledge_updates(user_id):
+    """Personalized knowledge updates (Knowledge.knowledge_updater_agent)"""
+    import streamlit as st
+    from Knowledge.knowledge_updater_agent import KnowledgeUpdaterCrew
+    from backend.database import get_profile
+
+    result = get_profile(user_id)
+    if result["status"] != "success":
+        raise ValueError(result.get("message", "Profile not found"))
+
+    knowledge_updater = KnowledgeUpdaterCrew(
+        serper_api_key=st.secrets["SERPER_API_KEY"],
+        gemini_api_key=st.secrets["GEMINI_API_KEY"]
+    )
+    updates = knowledge_updater.get_knowledge_updates(result["profile"])
+    if "error" in updates:
+        raise RuntimeError(updates["error"])
+    return _storable(updates)
+
+
+def _storable(value):
+    """Make a handler result safe to store in MongoDB (string keys, no ObjectIds)"""
+    if isinstance(value, dict):
+        return {str(key): _storable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_storable(item) for item in value]
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+JOB_HANDLERS = {
+    'pattern_analysis': run_pattern_analysis,
+    'session_summaries': run_session_summaries,
+    'context_refresh': run_context_refresh,
+    'skill_assessment': run_skill_assessment,
+    'learning_roadmap': run_learning_roadmap,
+    'knowledge_updates': run_knowledge_updates
+}
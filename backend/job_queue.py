@@ -0,0 +1,319 @@
+## job_queue.py -- durable MongoDB job queue for heavy agent pipelines: atomic claims, priorities, retries with backoff
+import random
+import socket
+import os
+from datetime import datetime, timezone, timedelta
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from backend.database import job_workers_collection, jobs_collection
+
+# Job states; queued jobs become running when a worker claims them
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Higher runs first
+JOB_PRIORITIES = {
+    'interactive': 10,
+    'normal': 5,
+    'background': 0
+}
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Retry delay is BACKOFF_BASE_SECONDS * 2^(attempt - 1), capped, plus up to 20% jitter
+BACKOFF_BASE_SECONDS = 30
+MAX_BACKOFF_SECONDS = 30 * 60
+
+# A running job whose lease lapses (worker crashed) is claimed again by another worker
+JOB_LEASE_SECONDS = 5 * 60
+
+# Workers record that they are alive this often; one silent for WORKER_STALE_SECONDS is presumed gone
+WORKER_HEARTBEAT_SECONDS = 30
+WORKER_STALE_SECONDS = 3 * WORKER_HEARTBEAT_SECONDS
+
+# Payload fields only needed while the job runs; removed once it finishes (e.g. uploaded resumes)
+TRANSIENT_PAYLOAD_FIELDS = ["resume_bytes"]
+
+# Claim, dedupe and TTL indexes for the jobs collection are declared in backend/indexes.py
+
+
+def make_worker_id():
+    """Identify a worker process across machines"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _finished_job_unset():
+    """Fields dropped from a job once it has succeeded or failed for good"""
+    fields = {"active_key": "", "lease_expires_at": "", "locked_by": ""}
+    fields.update({f"payload.{field}": "" for field in TRANSIENT_PAYLOAD_FIELDS})
+    return fields
+
+
+def record_worker_heartbeat(worker_id, job_types=None):
+    """Record that a worker is alive and which job types it runs (None for all)"""
+    job_workers_collection.update_one(
+        {"_id": worker_id},
+        {"$set": {"job_types": list(job_types) if job_types else None, "last_seen": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+def live_worker_count(job_type=None):
+    """Count workers that heartbeated recently and run the given job type (any type if None)"""
+    query = {"last_seen": {"$gte": datetime.now(timezone.utc) - timedelta(seconds=WORKER_STALE_SECONDS)}}
+    if job_type:
+        query["$or"] = [{"job_types": None}, {"job_types": job_type}]
+    return job_workers_collection.count_documents(query)
+
+
+def backoff_seconds(attempt):
+    """Delay before retrying a job that failed on the given attempt (1-based)"""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempt - 1, 0), MAX_BACKOFF_SECONDS)
+    return delay + random.uniform(0, delay * 0.2)
+
+
+def enqueue_job(job_type, payload, priority='normal', user_id=None, max_attempts=DEFAULT_MAX_ATTEMPTS, dedupe_key=None):
+    """
+    Add a job to the queue
+
+    Args:
+        job_type: Name of a handler in backend.job_handlers.JOB_HANDLERS
+        payload: Keyword arguments for the handler (must be storable in MongoDB)
+        priority: A JOB_PRIORITIES name or an integer, higher runs first
+        user_id: Owner of the job, used by the UI to list a user's jobs
+        max_attempts: Attempts before the job is marked failed
+        dedupe_key: If set, reuse an identical job that is still queued or running
+
+    Returns:
+        dict: {"status": "success", "job_id": ..., "deduplicated": bool} or an error status
+    """
+    now = datetime.now(timezone.utc)
+    job = {
+        "type": job_type,
+        "payload": payload,
+        "user_id": user_id,
+        "status": JOB_QUEUED,
+        "priority": JOB_PRIORITIES.get(priority, priority) if isinstance(priority, str) else priority,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_after": now,
+        "created_at": now,
+        "updated_at": now,
+        "errors": []
+    }
+    if dedupe_key:
+        job["active_key"] = dedupe_key
+
+    try:
+        result = jobs_collection.insert_one(job)
+        ensure_job_runner(job_type)
+        return {"status": "success", "job_id": str(result.inserted_id), "deduplicated": False}
+    except DuplicateKeyError:
+        existing = jobs_collection.find_one({"active_key": dedupe_key}, {"_id": 1})
+        if existing:
+            return {"status": "success", "job_id": str(existing["_id"]), "deduplicated": True}
+        return {"status": "error", "message": f"Could not enqueue {job_type} job"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def ensure_job_runner(job_type=None):
+    """
+    Start an in-process worker if no worker has heartbeated recently for this job type
+
+    Returns:
+        bool: True if no worker was alive and an embedded worker now runs in this process
+    """
+    from backend.job_worker import ensure_embedded_worker
+
+    try:
+        if live_worker_count(job_type) == 0:
+            return ensure_embedded_worker()
+    except Exception as e:
+        print(f"⚠️ Could not check for job workers: {e}")
+    return False
+
+
+def claim_next_job(worker_id, job_types=None, lease_seconds=JOB_LEASE_SECONDS):
+    """
+    Atomically claim the highest-priority job that is ready to run
+
+    A running job whose lease has expired is treated as ready again, so work held
+    by a crashed worker is picked up by another one, unless it has used up its
+    attempts; fail_expired_jobs marks those failed.
+
+    Args:
+        worker_id: ID of the claiming worker
+        job_types: Optional list of job types this worker handles
+        lease_seconds: How long the claim is valid without a heartbeat
+
+    Returns:
+        dict: The claimed job document, or None if nothing is ready
+    """
+    now = datetime.now(timezone.utc)
+    query = {"$or": [
+        {"status": JOB_QUEUED, "run_after": {"$lte": now}},
+        {
+            "status": JOB_RUNNING,
+            "lease_expires_at": {"$lt": now},
+            "$expr": {"$lt": ["$attempts", {"$ifNull": ["$max_attempts", DEFAULT_MAX_ATTEMPTS]}]}
+        }
+    ]}
+    if job_types:
+        query["type"] = {"$in": list(job_types)}
+
+    return jobs_collection.find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": JOB_RUNNING,
+                "locked_by": worker_id,
+                "started_at": now,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("priority", DESCENDING), ("run_after", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def extend_job_lease(job_id, worker_id, lease_seconds=JOB_LEASE_SECONDS):
+    """Keep a long-running claim alive; returns False if the job was taken over by another worker"""
+    now = datetime.now(timezone.utc)
+    result = jobs_collection.update_one(
+        {"_id": ObjectId(job_id), "status": JOB_RUNNING, "locked_by": worker_id},
+        {"$set": {"lease_expires_at": now + timedelta(seconds=lease_seconds), "updated_at": now}}
+    )
+    return result.modified_count == 1
+
+
+def complete_job(job_id, worker_id, result=None):
+    """Mark a claimed job as succeeded and store its result"""
+    now = datetime.now(timezone.utc)
+    updated = jobs_collection.update_one(
+        {"_id": ObjectId(job_id), "status": JOB_RUNNING, "locked_by": worker_id},
+        {
+            "$set": {"status": JOB_SUCCEEDED, "result": result, "finished_at": now, "updated_at": now},
+            "$unset": _finished_job_unset()
+        }
+    )
+    return updated.modified_count == 1
+
+
+def fail_job(job, worker_id, error):
+    """
+    Record a failed attempt, rescheduling the job with backoff until it runs out of attempts
+
+    Args:
+        job: The claimed job document
+        worker_id: ID of the worker that ran it
+        error: Error message
+
+    Returns:
+        str: The job's new status (queued for a retry, or failed)
+    """
+    now = datetime.now(timezone.utc)
+    error_entry = {"attempt": job["attempts"], "error": str(error)[:2000], "at": now}
+
+    if job["attempts"] < job.get("max_attempts", DEFAULT_MAX_ATTEMPTS):
+        status = JOB_QUEUED
+        update = {
+            "$set": {
+                "status": JOB_QUEUED,
+                "run_after": now + timedelta(seconds=backoff_seconds(job["attempts"])),
+                "updated_at": now
+            },
+            "$unset": {"lease_expires_at": "", "locked_by": ""},
+            "$push": {"errors": error_entry}
+        }
+    else:
+        status = JOB_FAILED
+        update = {
+            "$set": {"status": JOB_FAILED, "finished_at": now, "updated_at": now},
+            "$unset": _finished_job_unset(),
+            "$push": {"errors": error_entry}
+        }
+
+    jobs_collection.update_one({"_id": job["_id"], "status": JOB_RUNNING, "locked_by": worker_id}, update)
+    return status
+
+
+def fail_expired_jobs():
+    """
+    Mark failed the running jobs whose lease expired on their last attempt
+
+    Such jobs crashed their worker on every attempt; claim_next_job no longer
+    retries them, so without this sweep they would stay running forever.
+
+    Returns:
+        int: Number of jobs marked failed
+    """
+    now = datetime.now(timezone.utc)
+    result = jobs_collection.update_many(
+        {
+            "status": JOB_RUNNING,
+            "lease_expires_at": {"$lt": now},
+            "$expr": {"$gte": ["$attempts", {"$ifNull": ["$max_attempts", DEFAULT_MAX_ATTEMPTS]}]}
+        },
+        [
+            {"$set": {
+                "status": JOB_FAILED,
+                "finished_at": now,
+                "updated_at": now,
+                "errors": {"$concatArrays": [
+                    {"$ifNull": ["$errors", []]},
+                    [{"attempt": "$attempts", "error": "Worker lease expired on the last attempt", "at": now}]
+                ]}
+            }},
+            {"$unset": list(_finished_job_unset())}
+        ]
+    )
+    return result.modified_count
+
+
+def get_job_status(job_id):
+    """
+    Get a job's status for the UI to poll
+
+    Returns:
+        dict: {"status": "success", "job": {...}} with job status, attempts, last error and
+        result (once succeeded), or an error status
+    """
+    try:
+        job = jobs_collection.find_one(
+            {"_id": ObjectId(job_id)},
+            {"payload": 0}
+        )
+        if not job:
+            return {"status": "error", "message": "Job not found"}
+
+        return {"status": "success", "job": {
+            "job_id": str(job["_id"]),
+            "type": job["type"],
+            "state": job["status"],
+            "attempts": job.get("attempts", 0),
+            "max_attempts": job.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+            "run_after": job.get("run_after"),
+            "last_error": job["errors"][-1]["error"] if job.get("errors") else None,
+            "result": job.get("result"),
+            "created_at": job.get("created_at"),
+            "finished_at": job.get("finished_at")
+        }}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def get_queue_stats():
+    """Count jobs per type and status"""
+    pipeline = [{"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}]
+    stats = {}
+    for row in jobs_collection.aggregate(pipeline):
+        stats.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+    return stats
@@ -0,0 +1,169 @@
+## job_worker.py -- pool of worker processes that claim and run jobs from the MongoDB job queue
+#
+# Usage (from the repository root; run on as many machines as needed):
+#   python -m backend.job_worker                          # one worker per CPU core, all job types
+#   python -m backend.job_worker --processes 2 --types learning_roadmap skill_assessment
+#
+# Without a worker process the Streamlit app runs jobs itself: enqueue_job starts one embedded
+# worker thread when no worker has heartbeated recently (set EMBEDDED_JOB_WORKER=0 to disable).
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+
+# Seconds an idle worker waits before polling the queue again
+POLL_INTERVAL_SECONDS = 2
+
+# Whether the app process may run jobs itself when no worker process is alive
+EMBEDDED_WORKER_ENABLED = os.getenv("EMBEDDED_JOB_WORKER", "1") != "0"
+
+_embedded_worker = None
+_embedded_worker_lock = threading.Lock()
+
+# How often each worker sweeps for jobs that expired on their last attempt
+EXPIRED_SWEEP_INTERVAL_SECONDS = 60
+
+
+def _heartbeat(job_id, worker_id, stop_event, lease_seconds):
+    """Extend the job's lease until the job finishes, so long pipelines are not reclaimed"""
+    from backend.job_queue import extend_job_lease
+
+    while not stop_event.wait(lease_seconds / 3):
+        try:
+            if not extend_job_lease(job_id, worker_id, lease_seconds):
+                print(f"⚠️ Lost lease on job {job_id}")
+                return
+        except Exception as e:
+            print(f"⚠️ Heartbeat failed for job {job_id}: {e}")
+
+
+def _presence(worker_id, job_types):
+    """Tell the app this worker is alive, including while it runs a long job"""
+    from backend.job_queue import WORKER_HEARTBEAT_SECONDS, record_worker_heartbeat
+
+    while True:
+        try:
+            record_worker_heartbeat(worker_id, job_types)
+        except Exception as e:
+            print(f"⚠️ Could not record worker heartbeat: {e}")
+        time.sleep(WORKER_HEARTBEAT_SECONDS)
+
+
+def run_job(job, worker_id):
+    """Run one claimed job and record its outcome"""
+    from backend.job_handlers import JOB_HANDLERS, _storable
+    from backend.job_queue import JOB_LEASE_SECONDS, complete_job, fail_job
+
+    job_id = str(job["_id"])
+    handler = JOB_HANDLERS.get(job["type"])
+    print(f"▶️ {worker_id} running {job['type']} job {job_id} (attempt {job['attempts']})")
+
+    stop_event = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat, args=(job_id, worker_id, stop_event, JOB_LEASE_SECONDS), daemon=True
+    )
+    heartbeat.start()
+    started_at = time.monotonic()
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job type: {job['type']}")
+        result = handler(**(job.get("payload") or {}))
+        complete_job(job_id, worker_id, _storable(result))
+        print(f"✅ {job['type']} job {job_id} finished in {time.monotonic() - started_at:.1f}s")
+    except Exception as e:
+        traceback.print_exc()
+        status = fail_job(job, worker_id, e)
+        print(f"❌ {job['type']} job {job_id} failed ({e}); now {status}")
+    finally:
+        stop_event.set()
+
+
+def worker_loop(job_types=None, poll_interval=POLL_INTERVAL_SECONDS, worker_id=None):
+    """Claim and run jobs until interrupted"""
+    from backend.job_queue import claim_next_job, fail_expired_jobs, make_worker_id
+
+    worker_id = worker_id or make_worker_id()
+    print(f"👷 Worker {worker_id} started (job types: {', '.join(job_types) if job_types else 'all'})")
+    threading.Thread(target=_presence, args=(worker_id, job_types), name="job-worker-presence", daemon=True).start()
+    next_sweep_at = time.monotonic()
+    while True:
+        if time.monotonic() >= next_sweep_at:
+            next_sweep_at = time.monotonic() + EXPIRED_SWEEP_INTERVAL_SECONDS
+            try:
+                failed = fail_expired_jobs()
+                if failed:
+                    print(f"❌ Marked {failed} jobs failed after their lease expired on the last attempt")
+            except Exception as e:
+                print(f"⚠️ Could not sweep expired jobs: {e}")
+
+        try:
+            job = claim_next_job(worker_id, job_types)
+        except Exception as e:
+            print(f"⚠️ Could not poll the job queue: {e}")
+            job = None
+
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        run_job(job, worker_id)
+
+
+def ensure_embedded_worker():
+    """
+    Run jobs on a daemon thread of this process, starting it on first call
+
+    Used by the app when no worker process is alive, so queued jobs still run in a
+    default deployment. Jobs then share the app's CPU; run `python -m backend.job_worker`
+    alongside the app to move them out.
+
+    Returns:
+        bool: True if an embedded worker is running
+    """
+    global _embedded_worker
+    if not EMBEDDED_WORKER_ENABLED:
+        return False
+    with _embedded_worker_lock:
+        if _embedded_worker is None or not _embedded_worker.is_alive():
+            from backend.job_queue import make_worker_id
+
+            print("⚠️ No job worker process is running, starting an embedded worker")
+            _embedded_worker = threading.Thread(
+                target=worker_loop, kwargs={"worker_id": f"{make_worker_id()}:embedded"},
+                name="embedded-job-worker", daemon=True
+            )
+            _embedded_worker.start()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job queue workers")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--types", nargs="*", help="Only run these job types")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    from backend.indexes import ensure_indexes
+    ensure_indexes()
+
+    # Each process opens its own MongoDB client after starting; clients must not be shared across fork
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=worker_loop, args=(args.types, args.poll_interval), daemon=True)
+        for _ in range(max(args.processes, 1))
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        print("Stopping workers...")
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
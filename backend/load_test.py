@@ -0,0 +1,107 @@
+## load_test.py -- concurrent request throughput of the FastAPI service against a local mongod
+#
+# Usage (from the backend directory):
+#   mongod --dbpath /tmp/asha-db                                   # a throwaway local server
+#   MONGO_URI=mongodb://localhost:27017 uvicorn main:app --port 8000
+#   python load_test.py                                            # profile reads at 1, 10, 50, 100 in flight
+#   python load_test.py --endpoint login --requests 200 --concurrency 1 8 32
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+DEFAULT_URL = "http://localhost:8000"
+DEFAULT_CONCURRENCY = [1, 10, 50, 100]
+
+
+async def seed_user(client):
+    """Sign up a throwaway user with a profile; returns (user_id, email, password)"""
+    email = f"loadtest-{uuid.uuid4().hex[:12]}@example.com"
+    password = "load-test-password"
+    response = await client.post("/api/users/signup", json={
+        "name": "Load Test", "email": email, "phone": "0000000000", "city": "Bengaluru", "password": password
+    })
+    response.raise_for_status()
+    user_id = response.json()["user_id"]
+
+    response = await client.post("/api/profiles/create", json={
+        "user_id": user_id, "education": "B.Tech", "skills": ["Python", "SQL"], "consent": True
+    })
+    response.raise_for_status()
+    return user_id, email, password
+
+
+def make_request(endpoint, user_id, email, password):
+    """Return a coroutine factory issuing one request of the chosen kind"""
+    if endpoint == "login":
+        return lambda client: client.post("/api/users/login", params={"email": email, "password": password})
+    return lambda client: client.get(f"/api/profiles/{user_id}")
+
+
+async def run_level(client, request, total, concurrency):
+    """
+    Issue `total` requests with at most `concurrency` in flight
+
+    Returns:
+        dict: requests per second, latency percentiles in ms, and error count
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                response = await request(client)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started_at) * 1000)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started_at
+
+    ordered = sorted(latencies)
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(ordered),
+        "p95_ms": ordered[int(0.95 * (len(ordered) - 1))],
+        "max_ms": ordered[-1],
+        "errors": errors
+    }
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        user_id, email, password = await seed_user(client)
+        request = make_request(args.endpoint, user_id, email, password)
+
+        # Warm up connections on both sides before measuring
+        await run_level(client, request, min(args.requests, 50), max(args.concurrency))
+
+        print(f"{args.endpoint} x {args.requests} requests against {args.url}")
+        print(f"{'in flight':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'errors':>7}")
+        for concurrency in args.concurrency:
+            stats = await run_level(client, request, args.requests, concurrency)
+            print(f"{concurrency:>9} {stats['rps']:>9.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                  f"{stats['max_ms']:>8.1f} {stats['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the ASHA FastAPI service")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--endpoint", choices=["profile", "login"], default="profile")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from async_database import lifespan
 from routes.user_routes import router as user_router
 from routes.profile_routes import router as profile_router
 
-app = FastAPI()
+# The shared async MongoDB client is opened and closed with the app
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
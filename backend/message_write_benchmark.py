@@ -0,0 +1,108 @@
+## message_write_benchmark.py -- per-turn write cost of chat history saves: full-array rewrite vs append-only
+#
+# Usage (from the repository root; writes throwaway sessions to MONGO_URI and deletes them afterwards):
+#   python -m backend.message_write_benchmark
+#   python -m backend.message_write_benchmark --sizes 10 100 1000 --turns 20
+import argparse
+import statistics
+import time
+
+import bson
+
+from backend.database import (
+    append_session_messages,
+    chat_messages_collection,
+    create_chat_session,
+    db,
+    sanitize_message,
+    save_session_messages
+)
+from backend.db_metrics import track_round_trips
+
+BENCHMARK_USER_ID = "__message_write_benchmark__"
+
+# Typical message lengths in characters
+USER_MESSAGE_CHARS = 120
+ASSISTANT_MESSAGE_CHARS = 1500
+
+
+def make_turn(number):
+    """One user message and one assistant reply"""
+    return [
+        {"role": "user", "content": f"Question {number} " + "q" * USER_MESSAGE_CHARS, "feedback": None},
+        {"role": "assistant", "content": f"Answer {number} " + "a" * ASSISTANT_MESSAGE_CHARS, "feedback": None}
+    ]
+
+
+def make_history(size):
+    messages = []
+    while len(messages) < size:
+        messages.extend(make_turn(len(messages) // 2))
+    return messages[:size]
+
+
+def _seeded_session(messages):
+    session_id = create_chat_session(BENCHMARK_USER_ID)["session_id"]
+    save_session_messages(session_id, messages)
+    return session_id
+
+
+def measure(size, turns, append_only):
+    """
+    Time `turns` chat turns saved on top of a session that already holds `size` messages
+
+    Returns:
+        dict: median and p95 milliseconds, MongoDB round-trips and request bytes per turn
+    """
+    messages = make_history(size)
+    session_id = _seeded_session(messages)
+    latencies, round_trips, request_bytes = [], [], []
+    for number in range(turns):
+        start_index = len(messages)
+        turn = make_turn(size + number)
+        messages.extend(turn)
+
+        started_at = time.perf_counter()
+        with track_round_trips("message_write_benchmark") as scope:
+            if append_only:
+                result = append_session_messages(session_id, turn, start_index)
+            else:
+                result = save_session_messages(session_id, messages)
+        latencies.append((time.perf_counter() - started_at) * 1000)
+        if result["status"] != "success":
+            raise RuntimeError(result["message"])
+
+        round_trips.append(sum(scope.values()))
+        written = turn if append_only else messages
+        request_bytes.append(len(bson.encode({"messages": [sanitize_message(msg) for msg in written]})))
+
+    ordered = sorted(latencies)
+    return {
+        "median_ms": statistics.median(ordered),
+        "p95_ms": ordered[int(0.95 * (len(ordered) - 1))],
+        "round_trips": statistics.mean(round_trips),
+        "request_kb": statistics.mean(request_bytes) / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat history writes per turn")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Messages already in the session")
+    parser.add_argument("--turns", type=int, default=20, help="Turns saved per measurement")
+    args = parser.parse_args()
+
+    try:
+        print(f"{'messages':>8}  {'method':<12} {'median ms':>10} {'p95 ms':>8} {'round-trips':>12} {'KB sent':>9}")
+        for size in args.sizes:
+            for append_only, method in ((False, "full rewrite"), (True, "append-only")):
+                stats = measure(size, args.turns, append_only)
+                print(f"{size:>8}  {method:<12} {stats['median_ms']:>10.2f} {stats['p95_ms']:>8.2f} "
+                      f"{stats['round_trips']:>12.1f} {stats['request_kb']:>9.1f}")
+    finally:
+        session_ids = [str(session["_id"]) for session in db["chat_sessions"].find({"user_id": BENCHMARK_USER_ID}, {"_id": 1})]
+        chat_messages_collection.delete_many({"session_id": {"$in": session_ids}})
+        db["chat_sessions"].delete_many({"user_id": BENCHMARK_USER_ID})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+## migrate_chat_messages.py -- moves messages embedded in chat_sessions documents into the chat_messages collection
+#
+# Usage (from the repository root; safe to stop and re-run, finished sessions are skipped):
+#   python -m backend.migrate_chat_messages --dry-run     # count what would move
+#   python -m backend.migrate_chat_messages               # migrate every session
+import argparse
+
+from backend.database import db, migrate_embedded_messages
+from backend.indexes import ensure_indexes
+
+# Sessions read per batch; each session's messages are written with one bulk request
+MIGRATION_BATCH_SIZE = 100
+
+
+def migrate_session(session):
+    """
+    Copy one session's embedded messages to chat_messages, then drop the embedded array
+
+    Messages are written by (session_id, seq), so a session interrupted half-way
+    is completed on the next run without duplicates; see database.migrate_embedded_messages.
+
+    Returns:
+        int: Number of messages in the session
+    """
+    return migrate_embedded_messages(session)
+
+
+def migrate_chat_messages(batch_size=MIGRATION_BATCH_SIZE, dry_run=False):
+    """
+    Migrate every chat session that still embeds its messages
+
+    Returns:
+        dict: {"status": "success", "sessions": int, "messages": int}
+    """
+    query = {"messages": {"$exists": True}}
+    if dry_run:
+        pipeline = [{"$match": query}, {"$group": {"_id": None, "sessions": {"$sum": 1}, "messages": {"$sum": {"$size": "$messages"}}}}]
+        totals = next(db["chat_sessions"].aggregate(pipeline), {"sessions": 0, "messages": 0})
+        return {"status": "success", "sessions": totals["sessions"], "messages": totals["messages"]}
+
+    ensure_indexes()
+    sessions_done = messages_done = 0
+    while True:
+        # Migrated sessions no longer match, so each batch starts from the top
+        batch = list(db["chat_sessions"].find(query).limit(batch_size))
+        if not batch:
+            break
+        for session in batch:
+            messages_done += migrate_session(session)
+            sessions_done += 1
+        print(f"Migrated {sessions_done} sessions ({messages_done} messages)")
+
+    return {"status": "success", "sessions": sessions_done, "messages": messages_done}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move embedded chat messages into the chat_messages collection")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the sessions and messages to migrate")
+    args = parser.parse_args()
+
+    result = migrate_chat_messages(args.batch_size, args.dry_run)
+    verb = "Would migrate" if args.dry_run else "Migrated"
+    print(f"{verb} {result['sessions']} sessions with {result['messages']} messages")
+
+
+if __name__ == "__main__":
+    main()
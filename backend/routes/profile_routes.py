@@ -1,15 +1,33 @@
-from fastapi import APIRouter, HTTPException, status
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 from bson import ObjectId
 
 from models.user_model import ProfileCreate, ProfileInDB, ProfileResponse
-from database import profiles_collection, users_collection
+from async_database import get_database
 
 router = APIRouter()
 
 
+async def _record_profile(db, user_id, profile):
+    """Copy a written profile into the user's context snapshot, as user_context.record_profile does for the app"""
+    try:
+        await db["user_contexts"].update_one(
+            {"user_id": user_id},
+            {
+                "$set": {"profile": {k: v for k, v in profile.items() if k != "_id"}, "updated_at": datetime.now(timezone.utc)},
+                "$inc": {"version": 1}
+            },
+            upsert=True
+        )
+    except Exception as e:
+        print(f"⚠️ Could not update the context snapshot for user {user_id}: {e}")
+
+
 @router.post("/create", response_model=ProfileResponse)
-async def create_profile(profile: ProfileCreate):
+async def create_profile(profile: ProfileCreate, db=Depends(get_database)):
+    users_collection, profiles_collection = db["users"], db["profiles"]
+    
     # Verify user exists
     user_id = profile.user_id
     user = await users_collection.find_one({"_id": ObjectId(user_id)})
@@ -28,6 +46,7 @@ async def create_profile(profile: ProfileCreate):
             {"$set": profile.dict()}
         )
         updated_profile = await profiles_collection.find_one({"user_id": user_id})
+        await _record_profile(db, user_id, updated_profile)
         return {**updated_profile, "id": str(updated_profile["_id"])}
     
     # Create new profile
@@ -36,12 +55,13 @@ async def create_profile(profile: ProfileCreate):
     
     # Return the created profile
     created_profile = await profiles_collection.find_one({"_id": result.inserted_id})
+    await _record_profile(db, user_id, created_profile)
     return {**created_profile, "id": str(created_profile["_id"])}
 
 
 @router.get("/{user_id}", response_model=ProfileResponse)
-async def get_profile(user_id: str):
-    profile = await profiles_collection.find_one({"user_id": user_id})
+async def get_profile(user_id: str, db=Depends(get_database)):
+    profile = await db["profiles"].find_one({"user_id": user_id})
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -4,9 +4,10 @@ from datetime import datetime, timedelta
 import bcrypt
 import jwt
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from models.user_model import UserCreate, UserResponse, UserInDB
-from database import users_collection
+from async_database import get_database
 
 router = APIRouter()
 
@@ -34,7 +35,9 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 
 
 @router.post("/signup", response_model=Token)
-async def create_user(user: UserCreate):
+async def create_user(user: UserCreate, db=Depends(get_database)):
+    users_collection = db["users"]
+    
     # Check if user with this email already exists
     existing_user = await users_collection.find_one({"email": user.email})
     if existing_user:
@@ -43,8 +46,8 @@ async def create_user(user: UserCreate):
             detail="User with this email already exists"
         )
     
-    # Hash the password
-    hashed_password = bcrypt.hashpw(user.password.encode('utf-8'), bcrypt.gensalt())
+    # Hash the password (bcrypt is deliberately slow; keep it off the event loop)
+    hashed_password = await run_in_threadpool(bcrypt.hashpw, user.password.encode('utf-8'), bcrypt.gensalt())
     
     # Create user object for DB
     user_db = UserInDB(
@@ -66,9 +69,9 @@ async def create_user(user: UserCreate):
 
 
 @router.post("/login", response_model=Token)
-async def login(email: str, password: str):
+async def login(email: str, password: str, db=Depends(get_database)):
     # Find user by email
-    user = await users_collection.find_one({"email": email})
+    user = await db["users"].find_one({"email": email})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,7 +79,7 @@ async def login(email: str, password: str):
         )
     
     # Verify password
-    if not bcrypt.checkpw(password.encode('utf-8'), user["hashed_password"].encode('utf-8')):
+    if not await run_in_threadpool(bcrypt.checkpw, password.encode('utf-8'), user["hashed_password"].encode('utf-8')):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -0,0 +1,216 @@
+## user_context.py -- materialized per-user context snapshot, rewritten whenever one of its sources is written
+#
+# One document per user in user_contexts holds everything the chat query path needs from earlier sessions,
+# so a turn reads it with a single find_one:
+#   profile                 -- the user's profile (database.create_profile, and the service's /create profile route)
+#   recent_summaries        -- newest SNAPSHOT_SUMMARY_LIMIT session summaries (save_session_summary)
+#   session_pattern         -- latest single-session pattern (save_session_pattern)
+#   cross_session_pattern   -- latest cross-session pattern (save_cross_session_pattern)
+#   context_data, follow_ups, session_ids -- consolidated context built by the context_refresh job
+#
+# Every write increments `version`. Summary writes also increment `summary_revision`; the consolidated context
+# records the revision it was built from (`context_revision`), so a stale context is detected without a query.
+from datetime import datetime, timezone
+
+from pymongo import DESCENDING
+
+from backend.database import db, user_contexts_collection
+
+# Session summaries kept in the snapshot, newest first
+SNAPSHOT_SUMMARY_LIMIT = 3
+
+# Cross-session analysis runs once a user has this many session patterns...
+MIN_PATTERNS_FOR_CROSS_SESSION = 2
+# ...and again after this many new session patterns
+NEW_PATTERNS_FOR_REANALYSIS = 3
+
+
+def _record(user_id, fields=None, inc=None, extra=None):
+    """Apply one write to a user's snapshot and bump its version; snapshot failures never fail the source write"""
+    update = {
+        "$set": {**(fields or {}), "updated_at": datetime.now(timezone.utc)},
+        "$inc": {"version": 1, **(inc or {})},
+        **(extra or {})
+    }
+    try:
+        user_contexts_collection.update_one({"user_id": user_id}, update, upsert=True)
+    except Exception as e:
+        print(f"⚠️ Could not update the context snapshot for user {user_id}: {e}")
+
+
+def _summary_entry(session_id, summary_data, created_at):
+    return {"session_id": session_id, "summary_data": summary_data, "created_at": created_at}
+
+
+def record_profile(user_id, profile):
+    """Copy a written profile into the user's snapshot"""
+    _record(user_id, {"profile": {k: v for k, v in profile.items() if k != "_id"}})
+
+
+def record_session_summary(user_id, session_id, summary_data, created_at=None):
+    """
+    Put a written session summary at the head of the snapshot's recent summaries
+
+    The session's previous entry is pulled first (MongoDB cannot $pull and $push the
+    same array in one update), then the list is re-sorted and capped.
+    """
+    entry = _summary_entry(session_id, summary_data, created_at or datetime.now(timezone.utc))
+    try:
+        user_contexts_collection.update_one(
+            {"user_id": user_id}, {"$pull": {"recent_summaries": {"session_id": session_id}}}
+        )
+    except Exception as e:
+        print(f"⚠️ Could not update the context snapshot for user {user_id}: {e}")
+        return
+    _record(user_id, inc={"summary_revision": 1}, extra={"$push": {"recent_summaries": {
+        "$each": [entry],
+        "$sort": {"created_at": -1},
+        "$slice": SNAPSHOT_SUMMARY_LIMIT
+    }}})
+
+
+def record_session_pattern(user_id, session_id, pattern_data):
+    """Store a user's latest single-session pattern and count it towards the next cross-session analysis"""
+    _record(
+        user_id,
+        {"session_pattern": {
+            "session_id": session_id,
+            "pattern_summary": pattern_data.get("pattern_summary", "First session analysis"),
+            "created_at": datetime.now(timezone.utc)
+        }},
+        inc={"session_pattern_count": 1, "patterns_since_cross_session": 1}
+    )
+
+
+def record_cross_session_pattern(user_id, pattern_data):
+    """Store a user's cross-session pattern and reset the count of patterns since the last analysis"""
+    _record(user_id, {"cross_session_pattern": pattern_data, "patterns_since_cross_session": 0})
+
+
+def record_consolidated_context(user_id, context_data, session_ids, follow_ups=None, summary_revision=None):
+    """
+    Store a consolidated context and its follow-up suggestions in the snapshot
+
+    Args:
+        user_id: User ID
+        context_data: Consolidated context dictionary
+        session_ids: IDs of the sessions the context was built from
+        follow_ups: Follow-up suggestions generated from the context
+        summary_revision: The snapshot's summary_revision when the summaries were read
+    """
+    _record(user_id, {
+        "context_data": context_data,
+        "session_ids": session_ids,
+        "follow_ups": follow_ups or [],
+        "context_revision": summary_revision or 0
+    })
+
+
+def rebuild_user_context(user_id):
+    """
+    Backfill a user's snapshot from the source collections
+
+    Runs once per user, on the first read; afterwards the writers above keep
+    it current. A consolidated context already stored is kept.
+
+    Returns:
+        dict: The rebuilt snapshot
+    """
+    profile = db.profiles.find_one({"user_id": user_id}, {"_id": 0})
+    summaries = list(db.session_summaries.find(
+        {"user_id": user_id},
+        {"session_id": 1, "summary_data": 1, "created_at": 1}
+    ).sort("created_at", DESCENDING).limit(SNAPSHOT_SUMMARY_LIMIT))
+    session_pattern = db.session_patterns.find_one({"user_id": user_id}, sort=[("created_at", DESCENDING)])
+    cross_pattern = db.user_patterns.find_one({"user_id": user_id}, sort=[("updated_at", DESCENDING)])
+    pattern_count = db.session_patterns.count_documents({"user_id": user_id})
+    patterns_since = pattern_count
+    if cross_pattern:
+        patterns_since = db.session_patterns.count_documents({
+            "user_id": user_id,
+            "created_at": {"$gt": cross_pattern["updated_at"]}
+        })
+
+    fields = {
+        "profile": profile,
+        "recent_summaries": [
+            _summary_entry(summary["session_id"], summary["summary_data"], summary["created_at"])
+            for summary in summaries
+        ],
+        "session_pattern": {
+            "session_id": session_pattern["session_id"],
+            "pattern_summary": session_pattern["pattern_data"].get("pattern_summary", "First session analysis"),
+            "created_at": session_pattern["created_at"]
+        } if session_pattern else None,
+        "cross_session_pattern": cross_pattern["pattern_data"] if cross_pattern else None,
+        "session_pattern_count": pattern_count,
+        "patterns_since_cross_session": patterns_since,
+        "rebuilt_at": datetime.now(timezone.utc)
+    }
+    _record(user_id, fields, inc={"summary_revision": 1})
+    print(f"🧱 Rebuilt the context snapshot for user {user_id}")
+    return get_user_context(user_id, rebuild=False)
+
+
+def get_user_context(user_id, rebuild=True):
+    """
+    Read a user's whole context snapshot with one query
+
+    Args:
+        user_id: User ID
+        rebuild: Backfill the snapshot first if it was never rebuilt from the sources
+
+    Returns:
+        dict: The snapshot (see the module header for its fields), or None
+    """
+    try:
+        snapshot = user_contexts_collection.find_one({"user_id": user_id}, {"_id": 0})
+    except Exception as e:
+        print(f"Error reading the context snapshot for user {user_id}: {e}")
+        return None
+
+    if rebuild and (not snapshot or "rebuilt_at" not in snapshot):
+        try:
+            return rebuild_user_context(user_id)
+        except Exception as e:
+            print(f"⚠️ Could not rebuild the context snapshot for user {user_id}: {e}")
+    return snapshot
+
+
+def context_from_snapshot(snapshot, current_session_id=None):
+    """
+    The snapshot's consolidated context, or None if it is missing or was built from the current session
+
+    A context built from summaries older than the snapshot's summary_revision is
+    still returned; use context_is_stale to decide whether to rebuild it.
+    """
+    if not snapshot or not snapshot.get("context_data"):
+        return None
+    if current_session_id and current_session_id in snapshot.get("session_ids", []):
+        return None
+    return snapshot["context_data"]
+
+
+def context_is_stale(snapshot):
+    """True if session summaries were written after the consolidated context was built"""
+    return bool(snapshot) and snapshot.get("context_revision", 0) < snapshot.get("summary_revision", 0)
+
+
+def pattern_summary_from_snapshot(snapshot):
+    """The user's pattern summary, shaped like user_pattern_anlaysis.get_user_pattern_summary"""
+    if not snapshot:
+        return None
+    if snapshot.get("cross_session_pattern"):
+        return snapshot["cross_session_pattern"]
+    if snapshot.get("session_pattern"):
+        return {"pattern_summary": snapshot["session_pattern"]["pattern_summary"], "is_single_session": True}
+    return None
+
+
+def cross_session_analysis_due(snapshot):
+    """The should_analyze_cross_session_patterns rule, answered from the snapshot's counters"""
+    if not snapshot or snapshot.get("session_pattern_count", 0) < MIN_PATTERNS_FOR_CROSS_SESSION:
+        return False
+    if not snapshot.get("cross_session_pattern"):
+        return True
+    return snapshot.get("patterns_since_cross_session", 0) >= NEW_PATTERNS_FOR_REANALYSIS
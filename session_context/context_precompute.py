@@ -0,0 +1,136 @@
+"""
+Context Precompute
+
+A session counts as finished when the user switches to another session or when it
+has been idle for SESSION_IDLE_SECONDS. At that point the finished session is
+summarized and the user's consolidated context is rebuilt by a job queue worker
+(see backend/job_worker.py) and stored in user_contexts, so the query path (generate_consolidated_context) only
+reads a ready-made document instead of summarizing and consolidating inline.
+
+Follow-up suggestions are generated from the consolidated context at the same time and
+stored next to it in the user's context snapshot (backend/user_context.py).
+"""
+import threading
+
+from backend.job_queue import enqueue_job
+from backend.user_context import get_user_context
+from session_context.session_context_manager import (
+    consolidate_session_summaries,
+    generate_contextual_followups,
+    generate_single_session_summary,
+    get_next_summary_index,
+    get_recent_session_summaries,
+    get_session_data_for_summarization,
+    save_precomputed_context
+)
+from session_context.session_summarizer_agent import get_session_summary
+
+# Seconds without activity after which the current session counts as finished
+SESSION_IDLE_SECONDS = 10 * 60
+
+# Number of previous sessions folded into the precomputed context
+CONTEXT_SESSION_LIMIT = 3
+
+# Stands in for the user's query when follow-ups are generated ahead of the next session
+FOLLOWUP_QUERY = "(The user is starting a new conversation; suggest where to pick up from earlier sessions.)"
+
+_lock = threading.Lock()
+_active_sessions = {}
+_idle_timers = {}
+
+
+def refresh_session_summary(user_id, session_id):
+    """
+    Fold a finished session's messages since its last summary into that summary
+
+    Args:
+        user_id: User ID
+        session_id: ID of the finished session
+    """
+    previous_summary = get_session_summary(user_id, session_id)
+    session_data = get_session_data_for_summarization(
+        session_id, start_index=get_next_summary_index(previous_summary)
+    )
+    if not session_data or not session_data.get("messages"):
+        return
+    generate_single_session_summary(user_id, session_data, previous_summary=previous_summary)
+
+
+def precompute_user_context(user_id, finished_session_id=None):
+    """
+    Summarize a finished session and rebuild the user's consolidated context and follow-ups
+
+    Args:
+        user_id: User ID
+        finished_session_id: ID of the session that just ended, or None to only rebuild a stale context
+    """
+    if finished_session_id:
+        refresh_session_summary(user_id, finished_session_id)
+    # Read before the summaries, so a summary written meanwhile leaves the stored context marked stale
+    snapshot = get_user_context(user_id) or {}
+    summaries = get_recent_session_summaries(user_id, limit=CONTEXT_SESSION_LIMIT)
+    if not summaries:
+        return
+    context_data = consolidate_session_summaries(summaries)
+    try:
+        follow_ups = generate_contextual_followups(user_id, FOLLOWUP_QUERY, consolidated_context=context_data)
+    except Exception as e:
+        print(f"⚠️ Could not generate follow-ups for user {user_id}: {e}")
+        follow_ups = []
+    save_precomputed_context(
+        user_id,
+        context_data,
+        [summary["session_id"] for summary in summaries],
+        follow_ups=follow_ups,
+        summary_revision=snapshot.get("summary_revision", 0)
+    )
+    print(f"✅ Precomputed context for user {user_id} from {len(summaries)} sessions")
+
+
+def schedule_context_refresh(user_id, session_id=None):
+    """
+    Queue a background context refresh for a finished session, or a rebuild of a stale context
+
+    Returns:
+        True if queued, False if a refresh of this session is already waiting or running
+    """
+    result = enqueue_job(
+        "context_refresh",
+        {"user_id": user_id, "session_id": session_id},
+        priority="background",
+        user_id=user_id,
+        dedupe_key=f"context_refresh:{user_id}:{session_id or 'stale'}"
+    )
+    if result["status"] != "success":
+        print(f"⚠️ Could not queue context refresh for user {user_id}: {result['message']}")
+        return False
+    return not result["deduplicated"]
+
+
+def note_session_activity(user_id, session_id):
+    """
+    Record that a user is active in a session
+
+    Switching away from a session finishes it immediately; otherwise the session
+    is treated as finished once it has been idle for SESSION_IDLE_SECONDS.
+
+    Args:
+        user_id: User ID
+        session_id: ID of the session currently shown to the user
+    """
+    if not user_id or not session_id:
+        return
+
+    with _lock:
+        previous_session_id = _active_sessions.get(user_id)
+        _active_sessions[user_id] = session_id
+        timer = _idle_timers.pop(user_id, None)
+        if timer:
+            timer.cancel()
+        timer = threading.Timer(SESSION_IDLE_SECONDS, schedule_context_refresh, args=(user_id, session_id))
+        timer.daemon = True
+        _idle_timers[user_id] = timer
+    timer.start()
+
+    if previous_session_id and previous_session_id != session_id:
+        schedule_context_refresh(user_id, previous_session_id)
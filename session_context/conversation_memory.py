@@ -0,0 +1,199 @@
+"""
+Conversation Memory
+
+Token-bounded memory of the current chat session. The last MEMORY_RECENT_TURNS
+exchanges are kept verbatim; older turns are folded into a rolling summary by a
+background LLM call, so the in-session context placed in a prompt stays within
+PROMPT_BUDGETS['conversation_memory'] however long the session gets.
+
+Folding happens off the request path: a turn that has just left the verbatim
+window is shown as a one-line extract until its fold completes.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from session_context.session_summarizer_agent import get_session_summary
+from utils.chat_persistence import MESSAGE_OFFSET_KEY
+from utils.llm_registry import get_chat_llm
+from utils.prompt_budget import fit_prompt_sections, truncate_to_tokens
+
+api_key = st.secrets["GEMINI_API_KEY"]
+
+# Exchanges (user + assistant message) kept verbatim
+MEMORY_RECENT_TURNS = 3
+
+# Token caps for the rolling summary, each verbatim message, and each not-yet-folded extract;
+# when the total is still over budget, extracts go first, then the oldest verbatim turns
+SUMMARY_TOKEN_BUDGET = 400
+MAX_MESSAGE_TOKENS = 150
+EXTRACT_TOKENS = 40
+
+# Messages folded into the summary per LLM call, so each fold costs about the same
+FOLD_BATCH_MESSAGES = 8
+
+SUMMARY_MODEL = "gemini/gemini-2.0-flash-lite"
+
+_fold_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-fold")
+
+
+def format_turn(message, max_tokens=MAX_MESSAGE_TOKENS):
+    """Render one chat message as a 'ROLE: content' line within a token cap"""
+    role = str(message.get('role', '')).upper()
+    return f"{role}: {truncate_to_tokens(str(message.get('content', '')), max_tokens)}"
+
+
+def fold_into_summary(summary, messages):
+    """
+    Fold older messages into the rolling conversation summary with the LLM
+
+    Falls back to appending one-line extracts when the LLM call fails. Either way
+    the result is capped at SUMMARY_TOKEN_BUDGET tokens.
+    """
+    turns = "\n".join(format_turn(message, MAX_MESSAGE_TOKENS // 2) for message in messages)
+    prompt = f"""
+    You maintain a running summary of a career guidance chat between a user and an assistant.
+
+    Current summary:
+    {summary or "(empty)"}
+
+    New messages to fold in:
+    {turns}
+
+    Rewrite the summary so it covers everything above in at most 150 words. Keep the user's goals,
+    facts they shared about themselves, questions asked, advice and resources already given, and
+    anything left open. Reply with the summary text only.
+    """
+    try:
+        llm = get_chat_llm(api_key, model=SUMMARY_MODEL, temperature=0.2)
+        folded = str(llm.invoke(prompt).content).strip()
+    except Exception as e:
+        print(f"⚠️ Conversation summary fold failed, keeping extracts: {e}")
+        extracts = "\n".join(format_turn(message, EXTRACT_TOKENS) for message in messages)
+        folded = f"{summary}\n{extracts}".strip()
+    return truncate_to_tokens(folded, SUMMARY_TOKEN_BUDGET)
+
+
+class ConversationMemory:
+    """Rolling summary of older turns plus the most recent turns verbatim, for one chat session"""
+
+    def __init__(self, session_id, summary="", summarized_upto=0, recent_turns=MEMORY_RECENT_TURNS):
+        self.session_id = session_id
+        self.summary = summary
+        # Messages before this seq are covered by the summary
+        self.summarized_upto = summarized_upto
+        self.recent_turns = recent_turns
+        self._pending = None
+
+    def _window_start(self, messages):
+        return max(len(messages) - self.recent_turns * 2, 0)
+
+    def _folded_count(self, offset):
+        """Number of leading messages in a list starting at seq `offset` that the summary covers"""
+        return max(self.summarized_upto - offset, 0)
+
+    def update(self, messages, offset=0):
+        """
+        Apply a finished fold and start folding turns that have left the verbatim window
+
+        Args:
+            messages: The session's loaded messages (oldest first)
+            offset: seq of messages[0]; the chat page only loads the newest page of a long session
+        """
+        if self._pending is not None and self._pending.done():
+            try:
+                self.summary, self.summarized_upto = self._pending.result()
+            except Exception as e:
+                print(f"⚠️ Conversation summary fold failed: {e}")
+            self._pending = None
+
+        window_start = self._window_start(messages)
+        folded = self._folded_count(offset)
+        if self._pending is None and window_start > folded:
+            fold_end = min(window_start, folded + FOLD_BATCH_MESSAGES)
+            batch = list(messages[folded:fold_end])
+            summary = self.summary
+            self._pending = _fold_executor.submit(lambda: (fold_into_summary(summary, batch), offset + fold_end))
+
+    def render(self, messages, budget=None, offset=0):
+        """
+        Render the conversation so far for a prompt, within the conversation memory budget
+
+        Args:
+            messages: The session's loaded messages before the current query (oldest first)
+            budget: Optional token budget override
+            offset: seq of messages[0]
+
+        Returns:
+            str: Summary, not-yet-folded extracts and recent turns, or "" for a new conversation
+        """
+        window_start = self._window_start(messages)
+        unfolded = messages[min(self._folded_count(offset), window_start):window_start]
+        recent = list(reversed(messages[window_start:]))
+
+        sections = fit_prompt_sections('conversation_memory', [
+            {'name': 'summary', 'text': self.summary, 'priority': 3},
+            {'name': 'unfolded', 'items': list(reversed(unfolded)), 'priority': 1,
+             'render': lambda items: "\n".join(format_turn(message, EXTRACT_TOKENS) for message in reversed(items))},
+            {'name': 'recent', 'items': recent, 'priority': 2, 'min_items': min(len(recent), 1),
+             'render': lambda items: "\n\n".join(format_turn(message) for message in reversed(items))}
+        ], budget=budget)
+
+        parts = []
+        if sections['summary']:
+            parts.append(f"Summary of earlier conversation:\n{sections['summary']}")
+        if sections['unfolded']:
+            parts.append(f"Earlier turns (abridged):\n{sections['unfolded']}")
+        if sections['recent']:
+            parts.append(f"Most recent turns:\n{sections['recent']}")
+        return "\n\n".join(parts)
+
+
+def _history_before_query(messages, query):
+    """The chat page appends the user's message before answering; leave it out of the history"""
+    if messages and messages[-1].get('role') == 'user' and query is not None:
+        return messages[:-1]
+    return messages
+
+
+def get_session_memory(session_id=None):
+    """
+    Get the conversation memory for the current chat session, creating it on a session switch
+
+    A session reopened from history starts from its stored session summary (see
+    session_summarizer_agent.get_session_summary) instead of refolding every turn.
+    """
+    session_id = session_id or st.session_state.get('current_session_id')
+    memory = st.session_state.get('conversation_memory')
+    if memory is not None and memory.session_id == session_id:
+        return memory
+
+    memory = ConversationMemory(session_id)
+    user_id = st.session_state.get('user_id')
+    if session_id and user_id:
+        try:
+            stored = get_session_summary(user_id, session_id)
+            if stored and stored.get('last_message_index') is not None:
+                memory.summary = truncate_to_tokens(
+                    str(stored['summary_data'].get('summary_text', '')), SUMMARY_TOKEN_BUDGET
+                )
+                memory.summarized_upto = stored['last_message_index'] + 1
+        except Exception as e:
+            print(f"Could not seed conversation memory from the session summary: {e}")
+
+    st.session_state['conversation_memory'] = memory
+    return memory
+
+
+def build_conversation_context(query=None):
+    """
+    Update the current session's memory and render it for the prompt of the given query
+
+    Returns:
+        str: Token-bounded conversation context ("" for the first turn)
+    """
+    messages = _history_before_query(list(st.session_state.get('messages', [])), query)
+    offset = st.session_state.get(MESSAGE_OFFSET_KEY, 0)
+    memory = get_session_memory()
+    memory.update(messages, offset)
+    return memory.render(messages, offset=offset)
@@ -15,10 +15,11 @@ from datetime import datetime, timezone, timedelta
 from bson import ObjectId
 
 from crewai import Agent, Task, Crew, Process
-from langchain_community.chat_models import ChatLiteLLM
+from utils.llm_registry import get_chat_llm
 
 # Use your existing database functions
 from backend.database import db
+from backend.user_context import record_cross_session_pattern, record_session_pattern
 import streamlit as st
 
 api_key = st.secrets["GEMINI_API_KEY"]
@@ -31,11 +32,7 @@ if "user_patterns" not in db.list_collection_names():
 
 def create_pattern_analyzer_agent(api_key):
     """Create an agent specialized in identifying patterns in user behavior across sessions."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=api_key,
-        temperature=0.2
-    )
+    llm = get_chat_llm(api_key, model="gemini/gemini-2.0-flash-lite", temperature=0.2)
     
     return Agent(
         role="User Behavior Pattern Analyst",
@@ -162,6 +159,7 @@ def save_session_pattern(user_id, session_id, pattern_data):
     }
     
     result = db.session_patterns.insert_one(pattern_doc)
+    record_session_pattern(user_id, session_id, pattern_data)
     return str(result.inserted_id)
 
 
@@ -173,6 +171,8 @@ def save_cross_session_pattern(user_id, pattern_data):
         user_id: User ID
         pattern_data: The cross-session pattern analysis dictionary
     """
+    record_cross_session_pattern(user_id, pattern_data)
+    
     # Check if we already have a pattern document for this user
     existing_pattern = db.user_patterns.find_one({"user_id": user_id})
     
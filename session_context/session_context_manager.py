@@ -20,28 +20,28 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 
 from crewai import Agent, Task, Crew, Process
-from langchain_community.chat_models import ChatLiteLLM
+from utils.llm_registry import get_chat_llm
 
 # Use your existing database functions
-from backend.database import db
+from backend.database import db, load_messages_for_sessions, load_session_messages
+from backend.user_context import context_from_snapshot, get_user_context, record_consolidated_context
+from backend.db_metrics import track_round_trips
+from utils.prompt_budget import fit_prompt_sections, record_prompt_usage
 import streamlit as st
 
 # Import session summarizer functions
 from session_context.session_summarizer_agent import (
     create_summarizer_agent, 
     summarize_session_task, 
-    save_session_summary
+    save_session_summary,
+    get_session_summary
 )
 
 api_key = st.secrets["GEMINI_API_KEY"]
 
 def create_context_manager_agent(api_key):
     """Create an agent specialized in managing cross-session context."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=api_key,
-        temperature=0.2
-    )
+    llm = get_chat_llm(api_key, model="gemini/gemini-2.0-flash-lite", temperature=0.2)
     
     return Agent(
         role="Session Context Manager",
@@ -57,61 +57,131 @@ def create_context_manager_agent(api_key):
         llm=llm
     )
 
-def get_session_data_for_summarization(session_id):
+def get_session_data_for_summarization(session_id, start_index=0):
     """
     Get raw session data (messages) for summarization
     
     Args:
         session_id: Session ID to retrieve
+        start_index: Index of the first message to load; earlier messages are left in MongoDB
         
     Returns:
         Dict with session data or None if session not found
     """
     try:
-        session = db["chat_sessions"].find_one({"_id": ObjectId(session_id)})
-        if session and "messages" in session and len(session["messages"]) > 0:
-            return {
-                "session_id": str(session["_id"]),
-                "messages": session["messages"],
-                "created_at": session.get("created_at"),
-                "updated_at": session.get("updated_at")
-            }
+        session = db["chat_sessions"].find_one(
+            {"_id": ObjectId(session_id)},
+            {"created_at": 1, "updated_at": 1}
+        )
+        if not session:
+            return None
+        messages = load_session_messages(session_id, start_seq=start_index)
+        if messages or start_index:
+            return session_data_from_document(session, messages, start_index)
         return None
     except Exception as e:
         print(f"Error retrieving session data for {session_id}: {e}")
         return None
 
-def generate_single_session_summary(user_id, session_data):
+def session_data_from_document(session, messages, start_index=0):
+    """Shape a chat_sessions document and its messages as the session data used for summarization"""
+    return {
+        "session_id": str(session["_id"]),
+        "messages": messages,
+        "start_index": start_index,
+        "created_at": session.get("created_at"),
+        "updated_at": session.get("updated_at")
+    }
+
+def load_sessions_for_summarization(session_ids):
+    """
+    Load several sessions for summarization in two round-trips: session metadata, then all their messages
+    
+    Args:
+        session_ids: Session IDs to load
+        
+    Returns:
+        List of session data dicts for the sessions that have messages
+    """
+    try:
+        sessions = list(db["chat_sessions"].find(
+            {"_id": {"$in": [ObjectId(session_id) for session_id in session_ids]}, "message_count": {"$gt": 0}},
+            {"created_at": 1, "updated_at": 1}
+        ))
+        messages = load_messages_for_sessions([str(session["_id"]) for session in sessions])
+        return [session_data_from_document(session, messages[str(session["_id"])]) for session in sessions]
+    except Exception as e:
+        print(f"Error retrieving sessions for summarization: {e}")
+        return []
+
+def load_summary_user_profile(user_id):
+    """Get the user profile fields given to the summarizer as context, or None"""
+    try:
+        user_data = db["users"].find_one(
+            {"_id": ObjectId(user_id)},
+            {"name": 1, "background": 1, "interests": 1}
+        )
+        if user_data:
+            return {
+                "name": user_data.get("name", ""),
+                "background": user_data.get("background", ""),
+                "interests": user_data.get("interests", [])
+            }
+    except:
+        pass
+    return None
+
+def get_next_summary_index(previous_summary):
+    """Index of the first message not yet covered by a stored summary"""
+    if not previous_summary or previous_summary.get("last_message_index") is None:
+        return 0
+    return previous_summary["last_message_index"] + 1
+
+def generate_single_session_summary(user_id, session_data, previous_summary=None, user_profile=None):
     """
     Generate a summary for a single session
     
+    If the session already has a summary, only messages after its last_message_index
+    are summarized and folded into it.
+    
     Args:
         user_id: User ID
         session_data: Dict containing session data from get_session_data_for_summarization
+        previous_summary: Optional stored summary from get_session_summary (looked up if omitted;
+            pass {} when the session is known to have no summary)
+        user_profile: Optional profile from load_summary_user_profile (looked up if omitted)
         
     Returns:
         Dict with summary_id and session_id if successful, None otherwise
     """
     try:
         session_id = session_data["session_id"]
-        messages = session_data["messages"]
+        if previous_summary is None:
+            previous_summary = get_session_summary(user_id, session_id)
+        
+        # Keep only the messages after the summary cursor
+        next_index = get_next_summary_index(previous_summary)
+        start_index = session_data.get("start_index", 0)
+        messages = session_data["messages"][max(next_index - start_index, 0):]
         
         if not messages or len(messages) == 0:
+            if previous_summary:
+                print(f"Summary for session {session_id} is up to date")
+                return {
+                    "summary_id": str(previous_summary["_id"]),
+                    "session_id": session_id,
+                    "summary_data": previous_summary["summary_data"]
+                }
             print(f"No messages found for session {session_id}")
             return None
         
+        # Summaries saved before the cursor existed are redone from the full session
+        is_incremental = next_index > 0
+        last_message_index = max(next_index, start_index) + len(messages) - 1
+        
         # Get user profile for context (optional)
-        user_profile = None
-        try:
-            user_data = db["users"].find_one({"_id": ObjectId(user_id)})
-            if user_data:
-                user_profile = {
-                    "name": user_data.get("name", ""),
-                    "background": user_data.get("background", ""),
-                    "interests": user_data.get("interests", [])
-                }
-        except:
-            pass
+        if user_profile is None:
+            user_profile = load_summary_user_profile(user_id)
         
         # Create and execute summarization task
         summary_agent = create_summarizer_agent(api_key)
@@ -119,7 +189,8 @@ def generate_single_session_summary(user_id, session_data):
             messages, 
             user_profile, 
             session_id, 
-            is_incremental=False
+            is_incremental=is_incremental,
+            previous_summary=previous_summary["summary_data"] if is_incremental else None
         )
         
         summary_crew = Crew(
@@ -167,7 +238,8 @@ def generate_single_session_summary(user_id, session_data):
             user_id, 
             session_id, 
             summary_data, 
-            is_incremental=False
+            is_incremental=is_incremental,
+            last_message_index=last_message_index
         )
         
         print(f"Generated summary for session {session_id}: {summary_id}")
@@ -181,14 +253,18 @@ def generate_single_session_summary(user_id, session_data):
         print(f"Error generating summary for session {session_data.get('session_id', 'unknown')}: {e}")
         return None
 
-def batch_generate_session_summaries(user_id, sessions_to_summarize, max_workers=3):
+def batch_generate_session_summaries(user_id, sessions_to_summarize, max_workers=3, previous_summaries=None):
     """
     Generate summaries for multiple sessions in batch mode with parallel processing
     
+    The user profile is loaded once for the whole batch.
+    
     Args:
         user_id: User ID
         sessions_to_summarize: List of session data dicts
         max_workers: Maximum number of parallel workers
+        previous_summaries: Optional dict of session ID -> stored summary ({} if the session has none);
+            sessions not in it are looked up individually
         
     Returns:
         List of successfully generated summaries
@@ -198,12 +274,20 @@ def batch_generate_session_summaries(user_id, sessions_to_summarize, max_workers
     
     print(f"Batch generating summaries for {len(sessions_to_summarize)} sessions...")
     generated_summaries = []
+    previous_summaries = previous_summaries or {}
+    user_profile = load_summary_user_profile(user_id) or {}
     
     # Use ThreadPoolExecutor for parallel processing (limited to avoid rate limits)
     with ThreadPoolExecutor(max_workers=min(max_workers, len(sessions_to_summarize))) as executor:
         # Submit all summarization tasks
         future_to_session = {
-            executor.submit(generate_single_session_summary, user_id, session_data): session_data
+            executor.submit(
+                generate_single_session_summary,
+                user_id,
+                session_data,
+                previous_summaries.get(session_data["session_id"]),
+                user_profile
+            ): session_data
             for session_data in sessions_to_summarize
         }
         
@@ -241,71 +325,59 @@ def get_recent_session_summaries(user_id, limit=3, exclude_session_id=None):
     """
     print(f"Getting recent session summaries for user {user_id} (limit: {limit})")
     
-    # First, try to get existing summaries
-    query = {"user_id": user_id}
-    if exclude_session_id:
-        query["session_id"] = {"$ne": exclude_session_id}
-    
-    existing_summaries = list(db.session_summaries.find(
-        query,
-        {"session_id": 1, "summary_data": 1, "created_at": 1}
-    ).sort("created_at", -1).limit(limit))
-    
-    print(f"Found {len(existing_summaries)} existing summaries")
-    
-    # If we have enough summaries, return them
-    if len(existing_summaries) >= limit:
-        return existing_summaries
-    
-    # Otherwise, we need to generate missing summaries
-    needed_count = limit - len(existing_summaries)
-    print(f"Need to generate {needed_count} additional summaries")
-    
-    # Get recent chat sessions that don't have summaries
-    sessions_query = {"user_id": user_id}
-    if exclude_session_id:
-        sessions_query["_id"] = {"$ne": ObjectId(exclude_session_id)}
-    
-    # Get session IDs that already have summaries
-    existing_session_ids = {summary["session_id"] for summary in existing_summaries}
-    
-    # Get recent sessions, excluding those with existing summaries
-    recent_sessions_cursor = db["chat_sessions"].find(
-        sessions_query,
-        {"_id": 1, "created_at": 1, "updated_at": 1, "messages": 1}
-    ).sort("updated_at", -1).limit(needed_count * 2)  # Get more than needed to filter
-    
-    # Collect sessions that need summarization
-    sessions_to_summarize = []
-    for session in recent_sessions_cursor:
-        session_id = str(session["_id"])
-        if (session_id not in existing_session_ids and 
-            session.get("messages") and 
-            len(session["messages"]) > 0):
-            
-            session_data = get_session_data_for_summarization(session_id)
-            if session_data:
-                sessions_to_summarize.append(session_data)
-                
-                # Stop when we have enough sessions to summarize
-                if len(sessions_to_summarize) >= needed_count:
-                    break
-    
-    print(f"Found {len(sessions_to_summarize)} sessions that need summarization")
-    
-    # Generate summaries in batch if we have sessions to summarize
-    newly_generated = []
-    if sessions_to_summarize:
-        newly_generated = batch_generate_session_summaries(
-            user_id, 
-            sessions_to_summarize[:needed_count]
-        )
+    with track_round_trips("get_recent_session_summaries"):
+        # First, try to get existing summaries
+        query = {"user_id": user_id}
+        if exclude_session_id:
+            query["session_id"] = {"$ne": exclude_session_id}
+        
+        existing_summaries = list(db.session_summaries.find(
+            query,
+            {"session_id": 1, "summary_data": 1, "created_at": 1}
+        ).sort("created_at", -1).limit(limit))
+        
+        print(f"Found {len(existing_summaries)} existing summaries")
+        
+        # If we have enough summaries, return them
+        if len(existing_summaries) >= limit:
+            return existing_summaries
+        
+        # Otherwise, we need to generate missing summaries
+        needed_count = limit - len(existing_summaries)
+        print(f"Need to generate {needed_count} additional summaries")
+        
+        # Fewer than `limit` summaries exist, so these are all of the user's summarized sessions
+        skipped_ids = [ObjectId(summary["session_id"]) for summary in existing_summaries]
+        if exclude_session_id:
+            skipped_ids.append(ObjectId(exclude_session_id))
+        
+        # Load the most recent unsummarized sessions with messages: one query for the sessions, one for their messages
+        sessions = list(db["chat_sessions"].find(
+            {"user_id": user_id, "_id": {"$nin": skipped_ids}, "message_count": {"$gt": 0}},
+            {"_id": 1, "created_at": 1, "updated_at": 1}
+        ).sort("updated_at", -1).limit(needed_count))
+        session_messages = load_messages_for_sessions([str(session["_id"]) for session in sessions])
+        sessions_to_summarize = [
+            session_data_from_document(session, session_messages[str(session["_id"])])
+            for session in sessions
+        ]
+        
+        print(f"Found {len(sessions_to_summarize)} sessions that need summarization")
+        
+        # Generate summaries in batch if we have sessions to summarize
+        newly_generated = []
+        if sessions_to_summarize:
+            newly_generated = batch_generate_session_summaries(
+                user_id, 
+                sessions_to_summarize,
+                previous_summaries={session["session_id"]: {} for session in sessions_to_summarize}
+            )
     
     # Combine existing and newly generated summaries
     all_summaries = existing_summaries + newly_generated
     
-    # Sort by creation date and return the most recent ones
-    all_summaries.sort(key=lambda x: x["created_at"], reverse=True)
+    # Sort by creation date and return the most recent ones (stored dates come back naive UTC)
+    all_summaries.sort(key=lambda x: x["created_at"].replace(tzinfo=None), reverse=True)
     final_summaries = all_summaries[:limit]
     
     print(f"Returning {len(final_summaries)} total summaries")
@@ -320,16 +392,22 @@ def prepare_consolidated_context_task(summaries, current_query=None):
         current_query: Optional current user query for context
     """
     
-    summaries_text = "\n\n".join([
-        f"Session {i+1} ({summary['created_at'].strftime('%Y-%m-%d %H:%M')}): {summary['summary_data']}"
-        for i, summary in enumerate(summaries)
-    ])
+    def format_summaries(items):
+        return "\n\n".join([
+            f"Session {i+1} ({summary['created_at'].strftime('%Y-%m-%d %H:%M')}): {summary['summary_data']}"
+            for i, summary in enumerate(items)
+        ])
+    
+    # Summaries arrive newest first, so the oldest sessions are dropped when over budget
+    summaries_text = fit_prompt_sections('consolidated_context', [
+        {'name': 'summaries', 'items': summaries, 'render': format_summaries, 'priority': 1, 'min_items': 1}
+    ])['summaries']
     
     current_context = ""
     if current_query:
         current_context = f"\nThe user's current query is: \"{current_query}\"\n"
     
-    return Task(
+    task = Task(
         description=f"""
         Review these summaries from the user's previous career guidance sessions:
         
@@ -358,11 +436,42 @@ def prepare_consolidated_context_task(summaries, current_query=None):
         agent=create_context_manager_agent(api_key),
         expected_output="A concise JSON summary of relevant context from previous sessions."
     )
+    record_prompt_usage('consolidated_context', task.description)
+    return task
+
+def get_precomputed_context(user_id, current_session_id=None):
+    """
+    Read the consolidated context precomputed in the background for a user
+    
+    Args:
+        user_id: User ID
+        current_session_id: Current session ID; a context built from this session is not usable
+        
+    Returns:
+        Consolidated context dictionary, or None if nothing usable is stored
+    """
+    return context_from_snapshot(get_user_context(user_id), current_session_id)
+
+def save_precomputed_context(user_id, context_data, session_ids, follow_ups=None, summary_revision=None):
+    """
+    Store a user's consolidated context so the query path can read it without any LLM call
+    
+    Args:
+        user_id: User ID
+        context_data: Consolidated context dictionary
+        session_ids: IDs of the sessions the context was built from
+        follow_ups: Follow-up suggestions generated from the context
+        summary_revision: The context snapshot's summary_revision when the summaries were read
+    """
+    record_consolidated_context(user_id, context_data, session_ids, follow_ups, summary_revision)
 
 def generate_consolidated_context(user_id, current_session_id=None, current_query=None, limit=3):
     """
     Generate consolidated context from previous sessions
     
+    A context precomputed in the background (see context_precompute.py) is returned
+    directly; only users without one go through summarization and consolidation here.
+    
     Args:
         user_id: User ID
         current_session_id: Optional current session ID to exclude
@@ -372,6 +481,11 @@ def generate_consolidated_context(user_id, current_session_id=None, current_quer
     Returns:
         Consolidated context dictionary
     """
+    precomputed = get_precomputed_context(user_id, current_session_id)
+    if precomputed:
+        print(f"Using precomputed context for user {user_id}")
+        return precomputed
+    
     print(f"Generating consolidated context for user {user_id}")
     
     # Get recent session summaries (auto-generating missing ones in batch)
@@ -381,6 +495,19 @@ def generate_consolidated_context(user_id, current_session_id=None, current_quer
         exclude_session_id=current_session_id
     )
     
+    return consolidate_session_summaries(summaries, current_query)
+
+def consolidate_session_summaries(summaries, current_query=None):
+    """
+    Consolidate session summaries into one context dictionary with the context manager agent
+    
+    Args:
+        summaries: List of session summary documents, newest first
+        current_query: Optional current user query
+        
+    Returns:
+        Consolidated context dictionary
+    """
     # If no previous summaries, return empty context
     if not summaries:
         return {
@@ -11,14 +11,17 @@ Summaries are stored in MongoDB for context retrieval in future sessions.
 """
 
 import os
+import json
 from datetime import datetime, timezone, timedelta
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from crewai import Agent, Task, Crew, Process
-from langchain_community.chat_models import ChatLiteLLM
+from utils.llm_registry import get_chat_llm
 
 # Use your existing database functions
 from backend.database import db
+from backend.user_context import record_session_summary
 import streamlit as st
 
 api_key = st.secrets["GEMINI_API_KEY"]
@@ -26,17 +29,12 @@ api_key = st.secrets["GEMINI_API_KEY"]
 # Initialize summarizer collection if it doesn't exist
 if "session_summaries" not in db.list_collection_names():
     db.create_collection("session_summaries")
-    
-# Create TTL index for session_summaries collection (expire after 90 days)
-db.session_summaries.create_index("created_at", expireAfterSeconds=7776000)
+
+# The 90-day TTL index and query indexes are declared in backend/indexes.py
 
 def create_summarizer_agent(api_key):
     """Create an agent specialized in summarizing chat sessions."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-2.0-flash-lite",
-        api_key=api_key,
-        temperature=0.2
-    )
+    llm = get_chat_llm(api_key, model="gemini/gemini-2.0-flash-lite", temperature=0.2)
     
     return Agent(
         role="Session Summarization Specialist",
@@ -51,7 +49,7 @@ def create_summarizer_agent(api_key):
         llm=llm
     )
 
-def summarize_session_task(messages, user_profile=None, session_id=None, is_incremental=False):
+def summarize_session_task(messages, user_profile=None, session_id=None, is_incremental=False, previous_summary=None):
     """
     Create a task for summarizing a session or portion of a session.
     
@@ -60,6 +58,8 @@ def summarize_session_task(messages, user_profile=None, session_id=None, is_incr
         user_profile: Optional user profile information for context
         session_id: The session ID
         is_incremental: Whether this is an incremental summary within an ongoing session
+        previous_summary: Summary of the earlier messages; only the new messages are passed
+            in `messages` and folded into it, so the prompt does not grow with the session
     """
     
     # Construct conversation text from messages
@@ -75,12 +75,27 @@ def summarize_session_task(messages, user_profile=None, session_id=None, is_incr
     
     summary_type = "incremental" if is_incremental else "complete"
     
-    return Task(
-        description=f"""
-        {profile_context}
+    if previous_summary:
+        source = f"""
+        This is the existing summary of the earlier part of a career guidance session:
+        
+        {json.dumps(previous_summary, default=str)}
+        
+        Update it with these new messages from the same session, keeping what is still relevant:
+        
+        {conversation}
+        """
+    else:
+        source = f"""
         Review this {summary_type} conversation from a career guidance session:
         
         {conversation}
+        """
+    
+    return Task(
+        description=f"""
+        {profile_context}
+        {source}
         
         Create a structured summary with these components:
         
@@ -101,29 +116,45 @@ def summarize_session_task(messages, user_profile=None, session_id=None, is_incr
         }}
         
         Keep your summary concise, action-oriented, and focused on information that will be useful for 
-        providing context in future sessions.
+        providing context in future sessions. Keep each list to at most 5 items.
         """,
         agent=create_summarizer_agent(api_key),
         expected_output="A structured JSON summary of the session conversation."
     )
 
-def save_session_summary(user_id, session_id, summary_data, is_incremental=False):
+def save_session_summary(user_id, session_id, summary_data, is_incremental=False, last_message_index=None):
     """
     Save a session summary to MongoDB
     
+    Each session keeps one summary document, replaced as new messages are folded in.
+    The user's context snapshot (backend/user_context.py) is updated with it.
+    
     Args:
         user_id: User ID
         session_id: Session ID
         summary_data: The summary dictionary
         is_incremental: Whether this is an incremental summary
+        last_message_index: Index of the last message covered by the summary
     """
-    summary_doc = {
-        "user_id": user_id,
-        "session_id": session_id,
-        "summary_data": summary_data,
-        "is_incremental": is_incremental,
-        "created_at": datetime.now(timezone.utc)
-    }
-    
-    result = db.session_summaries.insert_one(summary_doc)
-    return str(result.inserted_id)
+    created_at = datetime.now(timezone.utc)
+    result = db.session_summaries.find_one_and_update(
+        {"user_id": user_id, "session_id": session_id},
+        {"$set": {
+            "summary_data": summary_data,
+            "is_incremental": is_incremental,
+            "last_message_index": last_message_index,
+            "created_at": created_at
+        }},
+        upsert=True,
+        projection={"_id": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    record_session_summary(user_id, session_id, summary_data, created_at)
+    return str(result["_id"])
+
+def get_session_summary(user_id, session_id):
+    """Get the stored summary of a session, including its last_message_index cursor, or None"""
+    return db.session_summaries.find_one(
+        {"user_id": user_id, "session_id": session_id},
+        {"summary_data": 1, "last_message_index": 1, "created_at": 1}
+    )
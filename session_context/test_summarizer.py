@@ -13,7 +13,7 @@ from crewai import Agent, Task, Crew, Process
 from langchain_community.chat_models import ChatLiteLLM
 
 # Import your existing database functions
-from backend.database import db, get_user_chat_sessions
+from backend.database import db, get_user_chat_sessions, load_session_messages
 import streamlit as st
 
 # Configuration
@@ -125,14 +125,10 @@ def save_session_summary(user_id, session_id, summary_data, is_incremental=False
 def get_session_messages(session_id):
     """Retrieve messages for a specific session"""
     try:
-        # Convert string ID to ObjectId if needed
-        if isinstance(session_id, str):
-            session_id = ObjectId(session_id)
-        
-        session = db["chat_sessions"].find_one({"_id": session_id})
+        session = db["chat_sessions"].find_one({"_id": ObjectId(session_id)}, {"_id": 1})
         
         if session:
-            messages = session.get("messages", [])
+            messages = load_session_messages(str(session_id))
             print(f"Found {len(messages)} messages in session")
             return messages
         else:
@@ -25,7 +25,7 @@ from session_context.pattern_analyzer_agent import (
 )
 
 # Import database functions
-from backend.database import db, get_chat_session, get_user_chat_sessions
+from backend.database import db, get_chat_session, get_user_chat_sessions, load_messages_for_sessions
 
 def clean_for_mongodb(obj):
     """
@@ -217,13 +217,18 @@ def get_sessions_needing_pattern_analysis(user_id, limit=3):
     analyzed_session_ids = {pattern["session_id"] for pattern in existing_patterns}
     
     # Get recent chat sessions that haven't been analyzed
-    sessions_cursor = db["chat_sessions"].find(
+    sessions = list(db["chat_sessions"].find(
         {"user_id": user_id},
-        {"_id": 1, "messages": 1, "created_at": 1}
-    ).sort("updated_at", -1).limit(limit * 2)  # Get more than needed to filter
+        {"_id": 1, "created_at": 1}
+    ).sort("updated_at", -1).limit(limit * 2))  # Get more than needed to filter
+    
+    # Messages of every candidate in one round-trip
+    session_messages = load_messages_for_sessions(
+        [str(session["_id"]) for session in sessions if str(session["_id"]) not in analyzed_session_ids]
+    )
     
     sessions_to_analyze = []
-    for session in sessions_cursor:
+    for session in sessions:
         session_id = str(session["_id"])
         
         # Skip if already analyzed
@@ -231,13 +236,14 @@ def get_sessions_needing_pattern_analysis(user_id, limit=3):
             continue
             
         # Skip if session doesn't have enough user messages - reduce requirement to 2
-        user_queries = extract_user_queries(session.get("messages", []))
+        messages = session_messages.get(session_id, [])
+        user_queries = extract_user_queries(messages)
         if len(user_queries) < 2:
             continue
             
         sessions_to_analyze.append({
             "session_id": session_id,
-            "messages": session["messages"],
+            "messages": messages,
             "created_at": session["created_at"]
         })
         
@@ -570,7 +576,7 @@ def test_single_session_pattern_analysis():
             selected_session = None
             for session in sessions:
                 session_id = session["_id"]
-                session_result = get_chat_session(session_id)
+                session_result = get_chat_session(session_id, message_limit=None)
                 if session_result["status"] == "success":
                     session_data = session_result["session"]
                     messages = session_data.get("messages", [])
@@ -670,7 +676,7 @@ def test_enhanced_cross_session_analysis():
                 
                 for session in all_sessions:
                     session_id = session["_id"]
-                    session_result = get_chat_session(session_id)
+                    session_result = get_chat_session(session_id, message_limit=None)
                     if session_result["status"] == "success":
                         session_data = session_result["session"]
                         messages = session_data.get("messages", [])
@@ -12,6 +12,8 @@ import base64
 from io import BytesIO
 import tempfile
 from skill_assessment import skill_ass
+from backend.job_queue import enqueue_job
+from utils.job_progress import poll_job
 import time
 import altair as alt
 import re   
@@ -1332,81 +1334,22 @@ def main():
         if analyze_button:
             if resume_file is not None and job_requirements:
                 try:
-                    # Save uploaded file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{resume_file.name.split('.')[-1]}") as tmp_file:
-                        tmp_file.write(resume_file.getvalue())
-                        temp_path = tmp_file.name
-                    
-                    # Display progress with enhanced styling
-                    progress_container = st.container()
-                    with progress_container:
-                        st.markdown("""
-                        <div style="text-align: center; margin: 16px 0; background-color: #f0f7ff; padding: 20px; border-radius: 12px; box-shadow: 0 2px 10px rgba(0,0,0,0.05);">
-                            <h3 style="color: #1e40af; margin-top: 0;">Processing Resume</h3>
-                            <p style="color: #4b5563; margin-bottom: 20px;">We're analyzing your resume data. This might take a moment.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
-                        
-                        # Create a spinner for visual feedback
-                        with st.spinner('Processing...'):
-                            # Analysis started
-                            status_text.markdown('<div style="text-align: center; color: #4b5563; padding: 10px; font-weight: 500;">Starting analysis...</div>', unsafe_allow_html=True)
-                            progress_bar.progress(10)
-                            time.sleep(0.5)  # Small delay for visual feedback
-                            
-                            # Run the assessment
-                            status_text.markdown('<div style="text-align: center; color: #4b5563; padding: 10px; font-weight: 500;">Extracting resume data...</div>', unsafe_allow_html=True)
-                            progress_bar.progress(20)
-                            time.sleep(0.5)
-                            
-                            # Open the file in binary mode
-                            with open(temp_path, "rb") as file:
-                                status_text.markdown('<div style="text-align: center; color: #4b5563; padding: 10px; font-weight: 500;">Analyzing skills and experience...</div>', unsafe_allow_html=True)
-                                progress_bar.progress(40)
-                                
-                                # Call the function from skill_ass.py
-                                results = skill_ass.run_skill_assessment(file, job_requirements)
-
-                                
-                                status_text.markdown('<div style="text-align: center; color: #4b5563; padding: 10px; font-weight: 500;">Evaluating job fit...</div>', unsafe_allow_html=True)
-                                progress_bar.progress(70)
-                                time.sleep(0.5)
-                                
-                                status_text.markdown('<div style="text-align: center; color: #4b5563; padding: 10px; font-weight: 500;">Generating recommendations...</div>', unsafe_allow_html=True)
-                                progress_bar.progress(85)
-                                time.sleep(0.5)
-                                
-                                status_text.markdown('<div style="text-align: center; color: #4b5563; padding: 10px; font-weight: 500;">Creating final report...</div>', unsafe_allow_html=True)
-                                progress_bar.progress(95)
-                                time.sleep(0.5)
-                                
-                                # Save results to session state
-                                st.session_state.results = results
-                                st.session_state.analysis_complete = True
-                                
-                                # Complete
-                                status_text.markdown('<div style="text-align: center; color: #065f46; font-weight: bold; padding: 10px;">Analysis complete!</div>', unsafe_allow_html=True)
-                                progress_bar.progress(100)
-                            
-                            # Show success message with enhanced styling
-                            st.markdown("""
-                            <div style="background-color: #d1fae5; padding: 20px; border-radius: 10px; border-left: 5px solid #10b981; margin-top: 24px; animation: fadeIn 0.5s ease-in-out;">
-                                <div style="display: flex; align-items: center; gap: 12px;">
-                                    <span style="font-size: 1.5rem; color: #059669;">✅</span>
-                                    <div>
-                                        <p style="color: #065f46; font-weight: 600; margin: 0; font-size: 1.1rem;">Analysis completed successfully!</p>
-                                        <p style="color: #065f46; margin: 5px 0 0;">Go to the Analysis tab to view your detailed results.</p>
-                                    </div>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    
-                    # Clean up temporary file
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
+                    # The assessment pipeline runs on a job queue worker; the page polls for the result
+                    result = enqueue_job(
+                        "skill_assessment",
+                        {
+                            "resume_bytes": resume_file.getvalue(),
+                            "resume_name": resume_file.name,
+                            "job_requirements": job_requirements
+                        },
+                        priority="interactive",
+                        user_id=st.session_state.get('user_id')
+                    )
+                    if result["status"] == "success":
+                        st.session_state.skill_assessment_job_id = result["job_id"]
+                        st.session_state.analysis_complete = False
+                    else:
+                        st.error(f"An error occurred: {result['message']}")
                     
                 except Exception as e:
                     st.error(f"An error occurred: {str(e)}")
@@ -1416,6 +1359,25 @@ def main():
                 if not job_requirements:
                     st.warning("Please enter or select a job description.")
         
+        results = poll_job('skill_assessment_job_id', "Your resume analysis")
+        if results:
+            # Save results to session state
+            st.session_state.results = results
+            st.session_state.analysis_complete = True
+            
+            # Show success message with enhanced styling
+            st.markdown("""
+            <div style="background-color: #d1fae5; padding: 20px; border-radius: 10px; border-left: 5px solid #10b981; margin-top: 24px; animation: fadeIn 0.5s ease-in-out;">
+                <div style="display: flex; align-items: center; gap: 12px;">
+                    <span style="font-size: 1.5rem; color: #059669;">✅</span>
+                    <div>
+                        <p style="color: #065f46; font-weight: 600; margin: 0; font-size: 1.1rem;">Analysis completed successfully!</p>
+                        <p style="color: #065f46; margin: 5px 0 0;">Go to the Analysis tab to view your detailed results.</p>
+                    </div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+        
         st.markdown('</div>', unsafe_allow_html=True)
     
     with tabs[1]:
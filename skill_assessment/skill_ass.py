@@ -12,11 +12,12 @@ import fitz
 import requests
 # For LLM integrations
 import google.generativeai as genai
-from langchain_community.chat_models import ChatLiteLLM
+from utils.llm_registry import get_chat_llm
 
 # For Crew AI
 from crewai import Agent, Task, Process, Crew
 from crewai.tools.base_tool import BaseTool as Tool
+from utils.prompt_budget import fit_prompt_sections, record_prompt_usage, to_prompt_json
 # Load environment variables
 load_dotenv()
 
@@ -439,11 +440,7 @@ def extract_certifications(text):
     return certifications
 def create_document_parser_agent():
     """Create an improved document parser agent with enhanced profile extraction capabilities."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.2)
     return Agent(
         role="Document Parser Specialist",
         goal="Extract comprehensive structured information from candidate resumes with a focus on profile links",
@@ -461,11 +458,7 @@ def create_document_parser_agent():
 
 def create_profile_scraper_agent():
     """Create an improved profile scraper agent."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.2)
     return Agent(
         role="Profile Data Collector",
         goal="Gather comprehensive data from candidates' public coding profiles",
@@ -488,11 +481,7 @@ def create_profile_scraper_agent():
 
 def create_technical_evaluator_agent():
     """Create an improved technical evaluator agent."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.2)
     return Agent(
         role="Technical Skills Evaluator",
         goal="Assess technical proficiency based on resume claims, coding profiles, and certification evidence",
@@ -509,11 +498,7 @@ def create_technical_evaluator_agent():
 
 def create_job_alignment_agent():
     """Create an improved job alignment agent."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.2)
     return Agent(
         role="Job Requirements Specialist",
         goal="Determine how well a candidate matches the specific technical requirements of a job",
@@ -531,11 +516,7 @@ def create_job_alignment_agent():
 
 def create_interview_question_generator_agent():
     """Create an improved interview question generator agent."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",  
-        api_key=GEMINI_API_KEY,
-        temperature=0.3  # Slightly higher for creative questions
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.3)  # Slightly higher for creative questions
     return Agent(
         role="Technical Interview Question Generator",
         goal="Create tailored technical interview questions based on candidate's profile and identified gaps",
@@ -553,11 +534,7 @@ def create_interview_question_generator_agent():
 
 def create_evaluation_pipeline_agent():
     """Create a new agent for implementing the stage-by-stage evaluation pipeline."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.2)
     return Agent(
         role="Evaluation Pipeline Manager",
         goal="Implement a comprehensive stage-by-stage evaluation process and produce a final numerical score",
@@ -573,11 +550,7 @@ def create_evaluation_pipeline_agent():
     )
 def create_summary_generator_agent():
     """Create an improved summary generator agent."""
-    llm = ChatLiteLLM(
-        model="gemini/gemini-1.5-flash",  # Using Pro for better quality summaries
-        api_key=GEMINI_API_KEY,
-        temperature=0.2
-    )
+    llm = get_chat_llm(GEMINI_API_KEY, model="gemini/gemini-1.5-flash", temperature=0.2)
     return Agent(
         role="Assessment Summary Specialist",
         goal="Create engaging, concise, and visually appealing assessment reports for hiring managers",
@@ -832,27 +805,36 @@ def create_generate_questions_task(interview_question_generator, resume_data, pr
 
 def create_summary_task(summary_generator, resume_data, profile_data, skill_evaluation, job_match, interview_questions, evaluation_results):
     """Create an improved summary generation task with focus on readability and visual appeal."""
-    return Task(
+    # Evaluations drive the summary; raw scraped profiles and interview questions are trimmed first
+    sections = fit_prompt_sections('skill_summary', [
+        {'name': 'profile_data', 'text': to_prompt_json(profile_data), 'priority': 1},
+        {'name': 'interview_questions', 'text': to_prompt_json(interview_questions), 'priority': 2},
+        {'name': 'resume_data', 'text': to_prompt_json(resume_data), 'priority': 3},
+        {'name': 'evaluation_results', 'text': to_prompt_json(evaluation_results), 'priority': 4},
+        {'name': 'job_match', 'text': to_prompt_json(job_match), 'priority': 5},
+        {'name': 'skill_evaluation', 'text': to_prompt_json(skill_evaluation), 'priority': 5}
+    ])
+    task = Task(
         description=f"""
         Create a comprehensive,compelling, visually engaging, yet concise assessment summary based on:
         
         Resume Information:
-        {json.dumps(resume_data, indent=2)}
+        {sections['resume_data']}
         
         Profile Data:
-        {json.dumps(profile_data, indent=2)}
+        {sections['profile_data']}
         
         Skill Evaluation:
-        {json.dumps(skill_evaluation, indent=2)}
+        {sections['skill_evaluation']}
         
         Job Match Assessment:
-        {json.dumps(job_match, indent=2)}
+        {sections['job_match']}
         
         Suggested Interview Questions:
-        {json.dumps(interview_questions, indent=2)}
+        {sections['interview_questions']}
         
         Evaluation Results:
-        {json.dumps(evaluation_results, indent=2)}
+        {sections['evaluation_results']}
         
         Create a summary that:
         1. A candidate overview highlighting their experience and education
@@ -875,6 +857,8 @@ def create_summary_task(summary_generator, resume_data, profile_data, skill_eval
         agent=summary_generator,
         expected_output="A concise, visually engaging markdown assessment summary"
     )
+    record_prompt_usage('skill_summary', task.description)
+    return task
 
 
 def run_skill_assessment(resume_file, job_requirements):
@@ -0,0 +1,120 @@
+## abandonable_executor.py -- bounded thread pool whose callers can give up on a task that missed its deadline
+#
+# Future.cancel() cannot stop a task that is already running (a CrewAI crew or an HTTP call
+# has no interrupt), so with a plain ThreadPoolExecutor a timed-out task keeps its worker until
+# it finishes, and a few slow LLM calls starve everyone else. Here the caller abandons the task
+# instead: it runs to completion on its own daemon thread, but its slot is handed back so queued
+# work can start. At most max_abandoned tasks run abandoned at once; past that a timed-out task
+# keeps its slot, so the number of threads stays bounded at max_workers + max_abandoned.
+import collections
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+
+class AbandonableExecutor:
+    """Runs at most max_workers tasks at once, each on a daemon thread, and lets callers abandon slow ones"""
+
+    def __init__(self, max_workers, thread_name_prefix="worker", max_abandoned=None):
+        self.max_workers = max_workers
+        self.max_abandoned = max_workers if max_abandoned is None else max_abandoned
+        self.thread_name_prefix = thread_name_prefix
+        self._queue = collections.deque()
+        # future -> {'slot': holds a worker slot, 'abandoned_at': monotonic time or None}
+        self._running = {}
+        self._active = 0
+        # Abandoned tasks still running, and how many of them gave their slot back
+        self._abandoned = 0
+        self._detached = 0
+        self._stats = {"abandoned_total": 0, "abandoned_finished": 0, "abandoned_seconds": 0.0}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return its Future"""
+        future = Future()
+        with self._lock:
+            self._queue.append((future, fn, args, kwargs))
+        self._dispatch()
+        return future
+
+    def _dispatch(self):
+        """Start queued tasks while worker slots are free"""
+        with self._lock:
+            while self._queue and self._active < self.max_workers:
+                future, fn, args, kwargs = self._queue.popleft()
+                # Skips tasks whose caller cancelled them while they were queued
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._active += 1
+                self._running[future] = {'slot': True, 'abandoned_at': None}
+                threading.Thread(
+                    target=self._run, args=(future, fn, args, kwargs),
+                    name=f"{self.thread_name_prefix}_{next(self._counter)}", daemon=True
+                ).start()
+
+    def _run(self, future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                task = self._running.pop(future)
+                if task['slot']:
+                    self._active -= 1
+                elif task['abandoned_at'] is not None:
+                    self._detached -= 1
+                if task['abandoned_at'] is not None:
+                    self._abandoned -= 1
+                    overran = time.monotonic() - task['abandoned_at']
+                    self._stats["abandoned_finished"] += 1
+                    self._stats["abandoned_seconds"] += overran
+                    print(f"Abandoned {self.thread_name_prefix} task finished {overran:.1f}s after its deadline "
+                          f"({self._abandoned} still running)")
+            self._dispatch()
+
+    def abandon(self, future):
+        """
+        Give up on a task whose caller stopped waiting for it
+
+        A queued task is cancelled. A running one keeps running, but its slot is
+        released for queued work unless max_abandoned tasks already run without one.
+
+        Returns:
+            bool: True if the task will no longer hold a worker slot
+        """
+        if future.cancel():
+            return True
+        with self._lock:
+            task = self._running.get(future)
+            if task is None:
+                # Already finished
+                return True
+            if task['abandoned_at'] is not None:
+                return not task['slot']
+            task['abandoned_at'] = time.monotonic()
+            self._abandoned += 1
+            self._stats["abandoned_total"] += 1
+            if self._detached < self.max_abandoned:
+                task['slot'] = False
+                self._active -= 1
+                self._detached += 1
+            freed = not task['slot']
+            print(f"⚠️ {self._abandoned} abandoned {self.thread_name_prefix} tasks still running"
+                  f"{'' if freed else '; limit reached, the slot stays in use'}")
+        if freed:
+            self._dispatch()
+        return freed
+
+    def stats(self):
+        """Return running, queued and abandoned task counts, and how long abandoned tasks overran on average"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({"running": self._active, "queued": len(self._queue), "abandoned": self._abandoned})
+        overrun_seconds, finished = stats.pop("abandoned_seconds"), stats["abandoned_finished"]
+        stats["mean_overrun_seconds"] = overrun_seconds / finished if finished else 0.0
+        return stats
@@ -0,0 +1,124 @@
+## chat_persistence.py -- append-only saving and paged loading of the Streamlit chat history
+#
+# st.session_state.messages holds a window of the current session: the newest page when the
+# session is opened, extended with older pages on demand. The window starts at message
+# seq st.session_state['message_offset']; a per-session high-water mark records how many of
+# the session's messages are stored, so each save only appends the new ones.
+import streamlit as st
+
+from backend.database import (
+    MESSAGE_PAGE_SIZE,
+    append_session_messages,
+    get_message_page,
+    save_session_messages,
+    session_title_from_messages,
+    update_message_feedback
+)
+
+# session_id -> number of the session's messages already stored in MongoDB
+PERSISTED_COUNTS_KEY = 'persisted_message_counts'
+
+# seq of st.session_state.messages[0], and whether older messages are left to load
+MESSAGE_OFFSET_KEY = 'message_offset'
+HAS_OLDER_KEY = 'has_older_messages'
+
+
+def mark_session_persisted(session_id, count, first_seq=0, has_older=False):
+    """
+    Record that a session's first `count` messages are stored and where the loaded window starts
+
+    Call after creating a session (count 0) or loading one into st.session_state.messages;
+    with session_id None only the window is reset.
+    """
+    if session_id:
+        st.session_state.setdefault(PERSISTED_COUNTS_KEY, {})[session_id] = count
+    st.session_state[MESSAGE_OFFSET_KEY] = first_seq
+    st.session_state[HAS_OLDER_KEY] = has_older
+
+
+def show_loaded_session(session_id, session):
+    """Put a session returned by database.get_chat_session into the chat window"""
+    st.session_state['messages'] = session["messages"]
+    first_seq = session.get("first_seq", 0)
+    mark_session_persisted(session_id, first_seq + len(session["messages"]), first_seq, session.get("has_older", False))
+
+
+def load_older_messages(session_id=None, limit=MESSAGE_PAGE_SIZE):
+    """
+    Prepend the page of messages before the loaded window
+
+    Returns:
+        int: Number of messages loaded
+    """
+    session_id = session_id or st.session_state.get('current_session_id')
+    offset = st.session_state.get(MESSAGE_OFFSET_KEY, 0)
+    if not session_id or offset <= 0:
+        st.session_state[HAS_OLDER_KEY] = False
+        return 0
+
+    page = get_message_page(session_id, before_seq=offset, limit=limit)
+    if page["status"] != "success":
+        print(f"Warning: Failed to load older messages: {page['message']}")
+        return 0
+
+    st.session_state['messages'] = page["messages"] + st.session_state.get('messages', [])
+    st.session_state[MESSAGE_OFFSET_KEY] = page["first_seq"]
+    st.session_state[HAS_OLDER_KEY] = page["has_older"]
+    return len(page["messages"])
+
+
+def persist_session_messages(session_id=None):
+    """
+    Store the messages added to the current chat since the last save
+
+    Only the new messages are appended, so the cost of a save does not grow with the
+    session. The session title is set on the append that carries the first user
+    message. A session without a usable high-water mark (unknown, or out of sync
+    with another tab) has its loaded window rewritten once with save_session_messages.
+
+    Args:
+        session_id: Chat session ID, defaults to the current session
+
+    Returns:
+        dict: Status of the save, or None if there is no session
+    """
+    session_id = session_id or st.session_state.get('current_session_id')
+    if not session_id:
+        return None
+
+    messages = st.session_state.get('messages', [])
+    offset = st.session_state.get(MESSAGE_OFFSET_KEY, 0)
+    start_index = st.session_state.get(PERSISTED_COUNTS_KEY, {}).get(session_id)
+
+    if start_index is not None and start_index == offset + len(messages):
+        return {"status": "success", "message": "Nothing new to save"}
+
+    result = {"status": "conflict"}
+    if start_index is not None and offset <= start_index < offset + len(messages):
+        stored, new = messages[:start_index - offset], messages[start_index - offset:]
+        title = None
+        if offset == 0 and session_title_from_messages(stored) is None:
+            title = session_title_from_messages(new)
+        result = append_session_messages(session_id, new, start_index, title=title)
+
+    if result["status"] == "conflict":
+        print(f"⚠️ Resyncing {len(messages)} loaded messages of session {session_id}")
+        result = save_session_messages(session_id, messages, start_seq=offset)
+
+    if result["status"] == "success":
+        st.session_state.setdefault(PERSISTED_COUNTS_KEY, {})[session_id] = offset + len(messages)
+    else:
+        print(f"Warning: Failed to save session messages: {result['message']}")
+    return result
+
+
+def persist_message_feedback(message_index, feedback, session_id=None):
+    """Store feedback on the message at message_index in the loaded window, in place if it is already stored"""
+    session_id = session_id or st.session_state.get('current_session_id')
+    if not session_id:
+        return None
+
+    seq = st.session_state.get(MESSAGE_OFFSET_KEY, 0) + message_index
+    if seq < st.session_state.get(PERSISTED_COUNTS_KEY, {}).get(session_id, 0):
+        return update_message_feedback(session_id, seq, feedback)
+    return persist_session_messages(session_id)
@@ -0,0 +1,55 @@
+## job_progress.py -- Streamlit polling of background jobs queued in backend.job_queue
+import time
+
+import streamlit as st
+
+from backend.job_queue import JOB_FAILED, JOB_QUEUED, JOB_SUCCEEDED, get_job_status
+
+# Seconds between status checks while a job is still queued or running
+JOB_POLL_SECONDS = 3
+
+
+def poll_job(state_key, label):
+    """
+    Show the status of the job whose ID is stored in st.session_state[state_key]
+
+    While the job is queued or running this shows its status and reruns the page
+    every JOB_POLL_SECONDS. Once the job finishes the state key is cleared.
+
+    Args:
+        state_key: Session state key holding the job ID
+        label: What the job produces, e.g. "Your learning roadmap"
+
+    Returns:
+        The job's result once it has succeeded, otherwise None
+    """
+    job_id = st.session_state.get(state_key)
+    if not job_id:
+        return None
+
+    status = get_job_status(job_id)
+    if status["status"] != "success":
+        st.error(f"Could not check progress: {status['message']}")
+        del st.session_state[state_key]
+        return None
+
+    job = status["job"]
+    if job["state"] == JOB_SUCCEEDED:
+        del st.session_state[state_key]
+        return job["result"]
+
+    if job["state"] == JOB_FAILED:
+        del st.session_state[state_key]
+        st.error(f"{label} could not be generated: {job['last_error']}")
+        return None
+
+    if job["state"] == JOB_QUEUED and job["attempts"] > 0:
+        st.warning(f"⏳ {label} hit a temporary problem and will be retried shortly "
+                   f"(attempt {job['attempts'] + 1} of {job['max_attempts']}).")
+    elif job["state"] == JOB_QUEUED:
+        st.info(f"⏳ {label} is queued and will start shortly. You can leave this page and come back.")
+    else:
+        st.info(f"⚙️ {label} is being generated. This may take a few minutes.")
+
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
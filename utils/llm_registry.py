@@ -0,0 +1,96 @@
+## llm_registry.py -- long-lived, shared LLM clients per (provider, model, temperature) over a keep-alive HTTP pool
+import hashlib
+import threading
+
+import httpx
+
+DEFAULT_CHAT_MODEL = "gemini/gemini-2.0-flash-lite"
+
+# Connection pool shared by every LiteLLM call in the process
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+_clients = {}
+_clients_lock = threading.Lock()
+_http_configured = False
+
+
+def _configure_http_session():
+    """Point LiteLLM at one pooled keep-alive HTTP client so TLS connections are reused across calls"""
+    global _http_configured
+    if _http_configured:
+        return
+    try:
+        import litellm
+        if litellm.client_session is None:
+            litellm.client_session = httpx.Client(limits=HTTP_POOL_LIMITS, timeout=HTTP_TIMEOUT)
+        if litellm.aclient_session is None:
+            litellm.aclient_session = httpx.AsyncClient(limits=HTTP_POOL_LIMITS, timeout=HTTP_TIMEOUT)
+    except Exception as e:
+        print(f"Could not configure shared LLM HTTP session: {e}")
+    _http_configured = True
+
+
+def _client_key(kind, model, temperature, api_key):
+    provider = model.split("/", 1)[0] if "/" in model else "default"
+    # Key on a digest so API keys are not held in the registry keys
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    return (kind, provider, model, float(temperature), key_digest)
+
+
+def _get_or_create(key, factory):
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            _configure_http_session()
+            client = factory()
+            _clients[key] = client
+            print(f"Created shared LLM client {key[0]}:{key[2]} (temperature {key[3]})")
+        return client
+
+
+def get_chat_llm(api_key, model=DEFAULT_CHAT_MODEL, temperature=0.2):
+    """
+    Get the shared LangChain ChatLiteLLM client for a model and temperature
+
+    Parameters:
+    api_key (str): Provider API key
+    model (str): LiteLLM model name, e.g. "gemini/gemini-2.0-flash-lite"
+    temperature (float): Sampling temperature
+
+    Returns:
+    ChatLiteLLM: Client shared by every caller with the same settings
+    """
+    def factory():
+        from langchain_community.chat_models import ChatLiteLLM
+        return ChatLiteLLM(model=model, api_key=api_key, temperature=temperature)
+
+    return _get_or_create(_client_key("chat", model, temperature, api_key), factory)
+
+
+def get_crew_llm(api_key, model=DEFAULT_CHAT_MODEL, temperature=0.7):
+    """
+    Get the shared CrewAI LLM client for a model and temperature
+
+    Parameters:
+    api_key (str): Provider API key
+    model (str): LiteLLM model name, e.g. "gemini/gemini-1.5-flash"
+    temperature (float): Sampling temperature
+
+    Returns:
+    crewai.LLM: Client shared by every caller with the same settings
+    """
+    def factory():
+        from crewai import LLM
+        return LLM(model=model, api_key=api_key, temperature=temperature)
+
+    return _get_or_create(_client_key("crew", model, temperature, api_key), factory)
+
+
+def get_registered_clients():
+    """Return (kind, provider, model, temperature) for every client created so far"""
+    with _clients_lock:
+        return [key[:4] for key in _clients]
@@ -0,0 +1,188 @@
+## prompt_budget.py -- token accounting for prompt sections, trimming the lowest-priority sections to fit a per-task budget
+import json
+import threading
+
+from utils.input import DateTimeEncoder
+
+# Token budget for the variable sections (profile, context, search results, catalog) of each task's prompt
+PROMPT_BUDGETS = {
+    'profile_analysis': 2500,
+    'job_recommendation': 6000,
+    'event_recommendation': 3000,
+    'session_recommendation': 4000,
+    'community_recommendation': 3500,
+    'career_guidance': 4500,
+    'conversation_memory': 1200,
+    'consolidated_context': 3000,
+    'skill_summary': 6000,
+    'roadmap': 1500
+}
+
+DEFAULT_PROMPT_BUDGET = 4000
+
+# Rough characters-per-token ratio used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = "\n...[trimmed to fit the prompt budget]"
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+_usage_stats = {}
+_usage_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; None means fall back to the character estimate"""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                print(f"tiktoken unavailable, estimating tokens from characters: {e}")
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text):
+    """Count the tokens in a piece of prompt text"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text down to at most max_tokens, marking the cut"""
+    if not text or count_tokens(text) <= max_tokens:
+        return text or ""
+    marker_tokens = count_tokens(TRUNCATION_MARKER)
+    if max_tokens <= marker_tokens:
+        return ""
+
+    keep = max_tokens - marker_tokens
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARKER
+    return text[:keep * CHARS_PER_TOKEN] + TRUNCATION_MARKER
+
+
+def to_prompt_json(value):
+    """Serialize a value the way prompts embed JSON"""
+    return json.dumps(value, indent=2, cls=DateTimeEncoder)
+
+
+def _render(section, items):
+    render = section.get('render') or to_prompt_json
+    return render(list(items))
+
+
+def _fit_items(section, max_tokens):
+    """Keep the longest prefix of a ranked item list whose rendering fits max_tokens"""
+    items = section['items']
+    low, high = section.get('min_items', 0), len(items)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(_render(section, items[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return _render(section, items[:low])
+
+
+def fit_prompt_sections(task_name, sections, budget=None):
+    """
+    Fit the variable sections of a prompt into the task's token budget
+
+    Sections are trimmed lowest priority first. A section with 'items' (a ranked
+    list, best first) drops items from the end; any other section is truncated.
+
+    Parameters:
+    task_name (str): Key into PROMPT_BUDGETS, also used for usage accounting
+    sections (list): Dicts with 'name', 'priority' (higher is kept longer) and either
+        'text' or 'items' (with an optional 'render' callable and 'min_items');
+        'required': True sections are never trimmed
+    budget (int, optional): Override for PROMPT_BUDGETS[task_name]
+
+    Returns:
+    dict: Section name -> text to place in the prompt
+    """
+    budget = budget or PROMPT_BUDGETS.get(task_name, DEFAULT_PROMPT_BUDGET)
+
+    texts = {}
+    tokens = {}
+    for section in sections:
+        text = _render(section, section['items']) if 'items' in section else (section.get('text') or "")
+        texts[section['name']] = text
+        tokens[section['name']] = count_tokens(text)
+
+    original_total = total = sum(tokens.values())
+    trimmed = []
+
+    for section in sorted(sections, key=lambda s: s.get('priority', 0)):
+        if total <= budget:
+            break
+        if section.get('required'):
+            continue
+
+        name = section['name']
+        allowed = max(tokens[name] - (total - budget), 0)
+        if 'items' in section:
+            text = _fit_items(section, allowed)
+        else:
+            text = truncate_to_tokens(texts[name], allowed)
+
+        new_tokens = count_tokens(text)
+        total += new_tokens - tokens[name]
+        texts[name], tokens[name] = text, new_tokens
+        trimmed.append(name)
+
+    if trimmed:
+        print(f"✂️ {task_name}: trimmed {', '.join(trimmed)} from {original_total} to {total} tokens (budget {budget})")
+        with _usage_lock:
+            stats = _usage_stats.setdefault(task_name, _empty_stats())
+            stats["trimmed_calls"] += 1
+            stats["trimmed_tokens"] += original_total - total
+
+    return texts
+
+
+def _empty_stats():
+    return {"calls": 0, "total_tokens": 0, "max_tokens": 0, "trimmed_calls": 0, "trimmed_tokens": 0}
+
+
+def record_prompt_usage(task_name, prompt):
+    """
+    Record the size of a prompt that is about to be sent
+
+    Parameters:
+    task_name (str): Task the prompt belongs to
+    prompt (str): Final prompt text
+
+    Returns:
+    int: Prompt size in tokens
+    """
+    prompt_tokens = count_tokens(prompt)
+    with _usage_lock:
+        stats = _usage_stats.setdefault(task_name, _empty_stats())
+        stats["calls"] += 1
+        stats["total_tokens"] += prompt_tokens
+        stats["max_tokens"] = max(stats["max_tokens"], prompt_tokens)
+    return prompt_tokens
+
+
+def get_prompt_usage_stats():
+    """Return per-task prompt token usage for this process"""
+    with _usage_lock:
+        stats = {task_name: dict(values) for task_name, values in _usage_stats.items()}
+    for values in stats.values():
+        values["avg_tokens"] = round(values["total_tokens"] / values["calls"]) if values["calls"] else 0
+    return stats